@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""End-to-end throughput of analyze and check on generated trees.
+
+Usage: python benchmarks/bench_e2e.py [--shapes tiny,huge,deep,wide,excludes]
+                                      [-A md5,sha256] [--scale 1.0] [--workdir DIR] [--output FILE]
+
+Trees are generated from a fixed seed, so the same --scale always produces
+byte-identical files.  They are reused from --workdir when it already holds
+a tree with the same parameters.  Each shape/algorithm pair is timed for:
+
+  analyze         fresh analyze of the whole tree (manifests removed first)
+  check           check against the manifests written by analyze
+  analyze-change  analyze again after modifying, adding and deleting one file
+
+Results are printed as JSON (files/s and MB/s per step) for comparison
+across commits.  --scale 10 gives the million-entry directory.
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import shutil
+import tempfile
+from typing import Any, Callable
+
+from common import filecheck, reset_options, silenced, write_report, best_of
+
+
+SHAPES: dict[str, dict[str, Any]] = {
+    "tiny": {"dirs": 100, "files": 200, "size": (0, 4096)},
+    "huge": {"dirs": 1, "files": 3, "size": (64 * 1048576, 64 * 1048576)},
+    "deep": {"depth": 64, "files": 8, "size": (512, 8192)},
+    "wide": {"dirs": 1, "files": 100_000, "size": (0, 256)},
+    "excludes": {"dirs": 50, "files": 100, "size": (256, 4096), "patterns": 100},
+}
+
+
+def scaled(spec: dict[str, Any], scale: float) -> dict[str, Any]:
+    spec = dict(spec)
+    key: str = "depth" if "depth" in spec else ("files" if spec.get("dirs") == 1 else "dirs")
+    spec[key] = max(1, int(spec[key] * scale))
+    return spec
+
+
+def write_file(path: str, size: int, rng: random.Random) -> None:
+    length: int = min(size, 1048576)
+    block: bytes = rng.getrandbits(length * 8).to_bytes(length, "little") if length else b""
+    with open(path, "wb") as f:
+        remaining: int = size
+        counter: int = 0
+        while remaining > 0:
+            chunk: bytes = block[:remaining]
+            if counter:
+                chunk = counter.to_bytes(8, "little") + chunk[8:]
+            f.write(chunk)
+            remaining -= len(chunk)
+            counter += 1
+
+
+def generate(root: str, shape: str, spec: dict[str, Any]) -> None:
+    rng: random.Random = random.Random(f"{shape}:{sorted(spec.items())}")
+    low, high = spec["size"]
+    if "depth" in spec:
+        dirs: list[str] = [os.path.join(root, *[f"d{i}" for i in range(level)]) for level in range(spec["depth"])]
+    else:
+        dirs = [os.path.join(root, f"dir{i:05d}") for i in range(spec["dirs"])] if spec["dirs"] > 1 else [root]
+    for directory in dirs:
+        os.makedirs(directory, exist_ok=True)
+        for i in range(spec["files"]):
+            ext: str = rng.choice((".txt", ".jpg", ".log", ".tmp", ".o", ".bin"))
+            write_file(os.path.join(directory, f"file{i:07d}{ext}"), rng.randint(low, high), rng)
+
+
+def exclude_patterns(spec: dict[str, Any]) -> list[str]:
+    count: int = spec.get("patterns", 0)
+    real: list[str] = ["*.tmp", "*.o", "*/cache/*", "build"]
+    return real + [f"*.ext{i}" for i in range(max(count - len(real), 0))] if count else []
+
+
+def tree_stats(root: str) -> tuple[int, int]:
+    files: int = 0
+    size: int = 0
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            if not name.startswith(filecheck.filecheckName):
+                files += 1
+                size += os.path.getsize(os.path.join(dirpath, name))
+    return files, size
+
+
+def remove_manifests(root: str) -> None:
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            if name == filecheck.filecheckName:
+                os.unlink(os.path.join(dirpath, name))
+
+
+def small_change(root: str, stash: str, undo: list[Callable[[], None]]) -> None:
+    for dirpath, _, names in os.walk(root):
+        names = sorted(n for n in names if not n.startswith(filecheck.filecheckName) and not n.startswith("added-"))
+        if len(names) < 2:
+            continue
+        modified: str = os.path.join(dirpath, names[0])
+        size: int = os.path.getsize(modified)
+        with open(modified, "ab") as f:
+            f.write(b"x")
+        undo.append(lambda: os.truncate(modified, size))
+        added: str = os.path.join(dirpath, f"added-{len(undo)}.txt")
+        with open(added, "wb") as f:
+            f.write(b"new file")
+        undo.append(lambda: os.unlink(added))
+        deleted: str = os.path.join(dirpath, names[-1])
+        moved: str = os.path.join(stash, f"{len(undo)}-{names[-1]}")
+        os.replace(deleted, moved)
+        undo.append(lambda: os.replace(moved, deleted))
+        return
+
+
+def restore(undo: list[Callable[[], None]]) -> None:
+    while undo:
+        undo.pop()()
+
+
+def prepare(workdir: str, shape: str, spec: dict[str, Any]) -> str:
+    root: str = os.path.join(workdir, shape)
+    marker: str = os.path.join(workdir, f"{shape}.spec")
+    wanted: str = repr(sorted(spec.items()))
+    if os.path.isdir(root) and os.path.isfile(marker):
+        with open(marker, encoding="utf-8") as f:
+            if f.read() == wanted:
+                return root
+    shutil.rmtree(root, ignore_errors=True)
+    generate(root, shape, spec)
+    with open(marker, "w", encoding="utf-8") as f:
+        f.write(wanted)
+    return root
+
+
+def result(shape: str, algorithm: str, step: str, seconds: float, files: int, size: int) -> dict[str, Any]:
+    return {
+        "shape": shape,
+        "algorithm": algorithm,
+        "step": step,
+        "seconds": round(seconds, 6),
+        "files": files,
+        "bytes": size,
+        "files_per_s": round(files / seconds, 1) if seconds > 0 else None,
+        "mb_per_s": round(size / seconds / 1048576, 1) if seconds > 0 else None,
+    }
+
+
+def run_shape(root: str, stash: str, shape: str, spec: dict[str, Any], algorithm: str, repeat: int,
+              extra: dict[str, Any]) -> list[dict[str, Any]]:
+    opts: dict[str, Any] = dict(extra, algorithm=algorithm, recursive=True, exclude=exclude_patterns(spec))
+    files, size = tree_stats(root)
+    rows: list[dict[str, Any]] = []
+
+    def analyze() -> None:
+        reset_options(**opts)
+        filecheck.analyze(root)
+
+    def check() -> None:
+        reset_options(**opts)
+        filecheck.check(root)
+
+    with silenced():
+        seconds: float = best_of(analyze, repeat, setup=lambda: remove_manifests(root))
+        rows.append(result(shape, algorithm, "analyze", seconds, files, size))
+        seconds = best_of(check, repeat)
+        rows.append(result(shape, algorithm, "check", seconds, files, size))
+        undo: list[Callable[[], None]] = []
+        try:
+            seconds = best_of(analyze, repeat, setup=lambda: small_change(root, stash, undo))
+            rows.append(result(shape, algorithm, "analyze-change", seconds, *tree_stats(root)))
+        finally:
+            restore(undo)
+            remove_manifests(root)
+    return rows
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shapes", default=",".join(SHAPES), help="comma separated tree shapes")
+    parser.add_argument("-A", "--algorithms", default="md5,sha256", help="comma separated hash algorithms")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply the number of dirs/files per shape")
+    parser.add_argument("--repeat", type=int, default=1, help="report the best of N runs per step")
+    parser.add_argument("--jobs", type=int, default=4, help="hashing workers passed to filecheck")
+    parser.add_argument("--stream", action="store_true", help="benchmark the --stream code path")
+    parser.add_argument("--workdir", default="", help="keep generated trees here between runs")
+    parser.add_argument("--output", default="", help="write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    algorithms: list[str] = [a for a in args.algorithms.split(",") if a]
+    for algo in algorithms:
+        if algo not in filecheck._ALGORITHMS:
+            parser.error(filecheck._algorithm_error(algo))
+    shapes: list[str] = [s for s in args.shapes.split(",") if s]
+    for shape in shapes:
+        if shape not in SHAPES:
+            parser.error(f"unknown shape {shape!r}, choose from {', '.join(SHAPES)}")
+    extra: dict[str, Any] = {"jobs": args.jobs, "stream": args.stream}
+    workdir: str = args.workdir or tempfile.mkdtemp(prefix="filecheck-bench-")
+    stash: str = tempfile.mkdtemp(prefix="stash-", dir=workdir)
+    results: list[dict[str, Any]] = []
+    try:
+        for shape in shapes:
+            spec: dict[str, Any] = scaled(SHAPES[shape], args.scale)
+            root: str = prepare(workdir, shape, spec)
+            for algo in algorithms:
+                results.extend(run_shape(root, stash, shape, spec, algo, args.repeat, extra))
+    finally:
+        shutil.rmtree(stash if args.workdir else workdir, ignore_errors=True)
+    write_report("e2e", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the individual hot paths of filecheck.
+
+Usage: python benchmarks/bench_micro.py [--bench ignore,manifest,compare,hash]
+                                        [--lines 10k,1M] [--repeat 3] [--output FILE]
+
+  ignore    shouldIgnore over unique paths with 0, 10 and 100 exclude patterns,
+            for plain strings and for the walker's pre-split entries
+  manifest  filecheckSave and filecheckLoad of text and binary manifests
+  compare   _metadata_changed and compareData on large in-memory manifests
+  hash      _compute_hash (readinto strategy) with fixed read chunk sizes
+
+Each row reports the best of --repeat runs as seconds and ns per item, in
+the same JSON format as bench_e2e.py, so a regression in one function shows
+up without the noise of a full tree walk.
+"""
+from __future__ import annotations
+import argparse
+import itertools
+import os
+import shutil
+import tempfile
+from typing import Any, Callable
+
+from common import filecheck, best_of, parse_count, reset_options, silenced, write_report
+
+
+def row(bench: str, params: dict[str, Any], items: int, seconds: float) -> dict[str, Any]:
+    return {
+        "bench": bench,
+        "params": params,
+        "items": items,
+        "seconds": round(seconds, 6),
+        "ns_per_item": round(seconds * 1e9 / items, 1) if items else None,
+    }
+
+
+def make_entries(dirName: str, count: int) -> dict[str, dict[str, Any]]:
+    files: dict[str, dict[str, Any]] = {}
+    for i in range(count):
+        name: str = f"file{i:08d}.dat"
+        files[name] = {"fileName": name, "dirName": dirName, "hash": f"{i:032x}", "size": i % 65536,
+                       "ctime": 1600000000.0 + i, "mtime": 1600000000.0 + i, "atime": 1600000000.0 + i}
+    return files
+
+
+def bench_ignore(args: argparse.Namespace, workdir: str) -> list[dict[str, Any]]:
+    count: int = 200_000
+    paths: list[str] = [os.path.join(workdir, f"dir{i % 100:03d}", f"file{i:07d}.{('txt', 'log', 'dat')[i % 3]}")
+                        for i in range(count)]
+    records: list[str] = []
+    for path in paths:
+        record = filecheck._WalkEntry(path)
+        record.name = os.path.basename(path)
+        record.dirName = os.path.dirname(path)
+        records.append(record)
+    rows: list[dict[str, Any]] = []
+    for patterns, (kind, names) in itertools.product((0, 10, 100), (("str", paths), ("walk-entry", records))):
+        exclude: list[str] = [f"*.ext{i}" for i in range(patterns - patterns // 5)]
+        exclude += [f"build{i}" for i in range(patterns // 5)]
+        reset_options(exclude=exclude)
+        should_ignore: Callable[[str], bool] = filecheck.shouldIgnore
+
+        def run(names: list[str] = names) -> None:
+            for name in names:
+                should_ignore(name)
+
+        def fresh() -> None:
+            filecheck._matcher = None
+            filecheck._get_matcher()
+
+        seconds: float = best_of(run, args.repeat, setup=fresh)
+        rows.append(row("shouldIgnore", {"patterns": patterns, "input": kind}, count, seconds))
+    return rows
+
+
+def bench_manifest(args: argparse.Namespace, workdir: str) -> list[dict[str, Any]]:
+    rows: list[dict[str, Any]] = []
+    for lines in args.lines:
+        files: dict[str, dict[str, Any]] = make_entries(workdir, lines)
+        for fmt in ("text", "binary"):
+            reset_options(manifest_format=fmt)
+            data: dict[str, Any] = filecheck.filecheckNew(workdir)
+            data["files"] = files
+            save: float = best_of(lambda: filecheck.filecheckSave(data, workdir), args.repeat)
+            load: float = best_of(lambda: filecheck.filecheckLoad(workdir), args.repeat)
+            params: dict[str, Any] = {"lines": lines, "format": fmt,
+                                      "bytes": os.path.getsize(os.path.join(workdir, filecheck.filecheckName))}
+            rows.append(row("filecheckSave", params, lines, save))
+            rows.append(row("filecheckLoad", params, lines, load))
+            os.unlink(os.path.join(workdir, filecheck.filecheckName))
+        del files
+    return rows
+
+
+def bench_compare(args: argparse.Namespace, workdir: str) -> list[dict[str, Any]]:
+    rows: list[dict[str, Any]] = []
+    for lines in args.lines:
+        saved_files: dict[str, dict[str, Any]] = make_entries(workdir, lines)
+        current_files: dict[str, dict[str, Any]] = {key: dict(info) for key, info in saved_files.items()}
+        for i, info in enumerate(current_files.values()):
+            if i % 100 == 0:
+                info["mtime"] += 10
+        pairs: list[tuple[dict[str, Any], dict[str, Any]]] = [(current_files[k], v) for k, v in saved_files.items()]
+        reset_options()
+        metadata_changed = filecheck._metadata_changed
+
+        def changed() -> None:
+            for currentValue, savedValue in pairs:
+                metadata_changed(currentValue, savedValue)
+
+        rows.append(row("_metadata_changed", {"lines": lines}, lines, best_of(changed, args.repeat)))
+        current: dict[str, Any] = {"dirName": workdir, "files": current_files}
+        saved: dict[str, Any] = {"dirName": workdir, "algorithm": "md5", "files": {}}
+
+        def refill() -> None:
+            reset_options()
+            saved["files"] = dict(saved_files)
+
+        with silenced():
+            seconds: float = best_of(lambda: filecheck.compareData(current, saved, workdir), args.repeat, setup=refill)
+        rows.append(row("compareData", {"lines": lines, "modified": lines // 100}, lines, seconds))
+        del saved_files, current_files, pairs
+    return rows
+
+
+def bench_hash(args: argparse.Namespace, workdir: str) -> list[dict[str, Any]]:
+    rows: list[dict[str, Any]] = []
+    size: int = args.hash_size
+    path: str = os.path.join(workdir, "hash.bin")
+    block: bytes = os.urandom(min(size, 1048576))
+    with open(path, "wb") as f:
+        remaining: int = size
+        while remaining > 0:
+            f.write(block[:remaining])
+            remaining -= len(block)
+    real_buffer_size = filecheck._buffer_size
+    try:
+        for chunk in args.chunks:
+            filecheck._buffer_size = lambda _size, chunk=chunk: chunk
+            for algo in args.algorithms:
+                reset_options(algorithm=algo, io_strategy="readinto")
+                seconds: float = best_of(lambda: filecheck._compute_hash(path, algo, size), args.repeat)
+                result: dict[str, Any] = row("_compute_hash", {"chunk": chunk, "algorithm": algo, "size": size},
+                                             size, seconds)
+                result["mb_per_s"] = round(size / seconds / 1048576, 1) if seconds > 0 else None
+                rows.append(result)
+    finally:
+        filecheck._buffer_size = real_buffer_size
+    return rows
+
+
+BENCHES: dict[str, Callable[[argparse.Namespace, str], list[dict[str, Any]]]] = {
+    "ignore": bench_ignore,
+    "manifest": bench_manifest,
+    "compare": bench_compare,
+    "hash": bench_hash,
+}
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bench", default=",".join(BENCHES), help="comma separated benchmarks to run")
+    parser.add_argument("--lines", default="10K,1M", help="manifest sizes for the manifest and compare benchmarks")
+    parser.add_argument("--chunks", default="4K,64K,256K,1M", help="read chunk sizes for the hash benchmark")
+    parser.add_argument("--hash-size", default="64M", help="file size for the hash benchmark")
+    parser.add_argument("-A", "--algorithms", default="md5", help="comma separated algorithms for the hash benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="report the best of N runs")
+    parser.add_argument("--output", default="", help="write the JSON report to this file")
+    args = parser.parse_args(argv)
+
+    benches: list[str] = [b for b in args.bench.split(",") if b]
+    for bench in benches:
+        if bench not in BENCHES:
+            parser.error(f"unknown benchmark {bench!r}, choose from {', '.join(BENCHES)}")
+    args.algorithms = [a for a in args.algorithms.split(",") if a]
+    for algo in args.algorithms:
+        if algo not in filecheck._ALGORITHMS:
+            parser.error(filecheck._algorithm_error(algo))
+    args.lines = [parse_count(text) for text in args.lines.split(",") if text]
+    args.chunks = [filecheck._parse_bytes(text) for text in args.chunks.split(",") if text]
+    args.hash_size = filecheck._parse_bytes(args.hash_size)
+
+    workdir: str = tempfile.mkdtemp(prefix="filecheck-micro-")
+    results: list[dict[str, Any]] = []
+    try:
+        for bench in benches:
+            results.extend(BENCHES[bench](args, workdir))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    write_report("micro", results, args.output)
+
+
+if __name__ == "__main__":
+    main()
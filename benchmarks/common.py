@@ -0,0 +1,78 @@
+"""Helpers shared by the JSON-reporting benchmarks.
+
+Every benchmark writes one document of the form
+``{"suite": ..., "env": {...}, "results": [{...}, ...]}`` so runs from
+different commits can be diffed or loaded side by side.
+"""
+from __future__ import annotations
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import filecheck  # noqa: E402
+
+
+def environment() -> dict[str, Any]:
+    try:
+        commit: str = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                     cwd=os.path.dirname(os.path.abspath(__file__)), check=False).stdout.strip()
+    except OSError:
+        commit = ""
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+_COUNT_UNITS: dict[str, int] = {"K": 1000, "M": 1000 ** 2}
+
+
+def parse_count(text: str) -> int:
+    text = text.strip().upper()
+    if text and text[-1] in _COUNT_UNITS:
+        return int(float(text[:-1]) * _COUNT_UNITS[text[-1]])
+    return int(text)
+
+
+def best_of(func: Callable[[], Any], repeat: int, setup: Callable[[], Any] | None = None) -> float:
+    best: float = float("inf")
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start: float = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def reset_options(**values: Any) -> None:
+    filecheck.options = filecheck.Options()
+    filecheck.options.quiet = True
+    for name, value in values.items():
+        setattr(filecheck.options, name, value)
+    filecheck._reset_counters()
+
+
+@contextlib.contextmanager
+def silenced():
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        yield
+
+
+def write_report(suite: str, results: list[dict[str, Any]], output: str) -> None:
+    text: str = json.dumps({"suite": suite, "env": environment(), "results": results}, indent=2)
+    if output:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
@@ -3,26 +3,47 @@ from __future__ import annotations
 import traceback
 import sys
 import argparse
+import cProfile
+import ctypes
+import pstats
 import os
 import stat
 import hashlib
-from fnmatch import fnmatch
+import heapq
+import io
+from fnmatch import fnmatch, translate
 from dataclasses import dataclass, field
 from pathlib import Path
+import functools
 import itertools
+import json
+import mmap
+import re
 import shutil
+import sqlite3
+import struct
 import sys
+import tempfile
+import threading
+import time
+import zlib
 from collections import deque
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Callable, Any
+from datetime import datetime
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from typing import Callable, Any, Iterator
 
-version: str = "0.2"
+version: str = "0.3"
 signature: str = "FLCK"
 endline: str = "\n"
 
 filecheckName: str = ".filecheck"
 filecheckTempName: str = ".filecheck.tmp"
-_IGNORE_EXACT: list[str] = [filecheckName, filecheckTempName, ".git", ".DS_Store"]
+filecheckDbName: str = ".filecheck.db"
+filecheckIgnoreName: str = ".filecheckignore"
+filecheckJournalName: str = ".filecheck.journal"
+_IGNORE_EXACT: list[str] = [filecheckName, filecheckTempName, filecheckDbName, filecheckDbName + "-journal",
+                            filecheckJournalName,
+                            filecheckDbName + "-wal", filecheckDbName + "-shm", ".git", ".DS_Store"]
 _IGNORE_GLOB: list[str] = ["._Icon*", "Icon*"]
 
 check_exit_code: int = 0
@@ -30,12 +51,17 @@ check_added: int = 0
 check_deleted: int = 0
 check_modified: int = 0
 check_same: int = 0
+check_moved: int = 0
+check_sampled: int = 0
 
-_SUPPORTED_VERSIONS: tuple[str, ...] = ("0.1", "0.2")
+_SUPPORTED_VERSIONS: tuple[str, ...] = ("0.1", "0.2", "0.3")
 _SUPPORTED_SIGS: tuple[str, ...] = ("\u27f9", "FLCK")
 _SPINNER_FRAMES: tuple[str, ...] = ("⣾", "⣽", "⣻", "⢿", "⡿", "⣟", "⣯", "⣷")
 _spinner_cycle = itertools.cycle(_SPINNER_FRAMES)
 _terminal_width: int = 0
+_SMALL_FILE: int = 65536
+_MMAP_THRESHOLD: int = 64 * 1048576
+_thread_local = threading.local()
 
 
 def _get_width() -> int:
@@ -48,31 +74,177 @@ def _get_width() -> int:
     return _terminal_width
 
 
-def _progress(path: str) -> None:
-    avail: int = _get_width() - 2
+class _ProgressState:
+    def __init__(self) -> None:
+        self.message: str = ""
+        self.hidden: bool = True
+        self.drawn: bool = False
+        self.scanned: int = 0
+        self.hashed: int = 0
+        self.hashed_bytes: int = 0
+        self.queued_bytes: int = 0
+        self.start: float = time.monotonic()
+
+
+_progress_state: _ProgressState = _ProgressState()
+_progress_lock = threading.Lock()
+_progress_stop = threading.Event()
+_progress_thread: threading.Thread | None = None
+_in_worker: bool = False
+
+
+def _format_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB", "GB", "TB"):
+        if n < 1024 or unit == "TB":
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return ""
+
+
+def _format_progress(state: _ProgressState, now: float) -> str:
+    elapsed: float = max(now - state.start, 1e-9)
+    rate: float = state.hashed_bytes / elapsed
+    remaining: int = max(state.queued_bytes - state.hashed_bytes, 0)
+    if remaining and rate > 0:
+        eta: int = int(remaining / rate)
+        eta_text: str = f"{eta // 3600}:{eta // 60 % 60:02d}:{eta % 60:02d}"
+    else:
+        eta_text = "--:--:--"
+    return (f"{state.scanned} files  {state.hashed / elapsed:.1f} files/s  {rate / 1048576:.1f} MB/s  "
+            f"{_format_bytes(remaining)} left  ETA {eta_text}  ")
+
+
+def _render_progress() -> None:
+    state: _ProgressState = _progress_state
+    if state.hidden:
+        return
+    status: str = _format_progress(state, time.monotonic())
+    avail: int = _get_width() - 2 - len(status)
     if avail < 1:
         avail = 1
+    path: str = state.message
     if len(path) > avail:
         display: str = path[-(avail - 1):]
     else:
         display = path
     try:
-        print(f"\r\033[K{next(_spinner_cycle)} {display}", end="", file=sys.stderr)
-    except (OSError, UnicodeEncodeError):
+        print(f"\r\033[K{next(_spinner_cycle)} {status}{display}", end="", file=sys.stderr)
+        sys.stderr.flush()
+        state.drawn = True
+    except (OSError, UnicodeEncodeError, ValueError):
         pass
 
 
+def _progress_loop(interval: float) -> None:
+    while not _progress_stop.wait(interval):
+        with _progress_lock:
+            _render_progress()
+
+
+def _progress(path: str) -> None:
+    global _progress_thread
+    if _in_worker:
+        return
+    _progress_state.message = path
+    _progress_state.hidden = False
+    if _progress_thread is None:
+        _progress_stop.clear()
+        interval: float = 1.0 / options.progress_rate if options.progress_rate > 0 else 0.1
+        _progress_thread = threading.Thread(target=_progress_loop, args=(interval,), name="filecheck-progress", daemon=True)
+        _progress_thread.start()
+
+
+def _progress_queued(size: int | None) -> None:
+    _progress_state.queued_bytes += size or 0
+
+
+def _progress_hashed(size: int | None) -> None:
+    _progress_state.hashed += 1
+    _progress_state.hashed_bytes += size or 0
+
+
 def _clear_progress() -> None:
-    width: int = _get_width()
-    try:
-        print("\r" + " " * width + "\r", end="", file=sys.stderr)
-    except (OSError, UnicodeEncodeError):
-        pass
+    with _progress_lock:
+        _progress_state.hidden = True
+        if not _progress_state.drawn:
+            return
+        _progress_state.drawn = False
+        width: int = _get_width()
+        try:
+            print("\r" + " " * width + "\r", end="", file=sys.stderr)
+        except (OSError, UnicodeEncodeError, ValueError):
+            pass
+
+
+def _stop_progress() -> None:
+    global _progress_thread, _progress_state
+    if _progress_thread is not None:
+        _progress_stop.set()
+        _progress_thread.join()
+        _progress_thread = None
+        _clear_progress()
+    _progress_state = _ProgressState()
+
+
+class _ZlibChecksum:
+    digest_size: int = 4
+
+    def __init__(self, func: Callable[[Any, int], int], start: int) -> None:
+        self._func = func
+        self._value: int = start
+
+    def update(self, data: Any) -> None:
+        self._value = self._func(data, self._value)
+
+    def digest(self) -> bytes:
+        return self._value.to_bytes(4, "big")
+
+    def hexdigest(self) -> str:
+        return f"{self._value:08x}"
 
-_ALGORITHMS: dict[str, Callable[[], Any]] = {
-    "md5": hashlib.md5,
-    "sha256": hashlib.sha256,
-}
+
+_ALGORITHMS: dict[str, Callable[[], Any]] = {}
+_MISSING_ALGORITHMS: dict[str, str] = {}
+
+
+def _register_algorithm(name: str, factory: Callable[[], Any]) -> bool:
+    try:
+        factory().update(b"")
+    except (ValueError, TypeError, AttributeError):
+        return False
+    _ALGORITHMS[name] = factory
+    return True
+
+
+def _algorithm_error(algo: str) -> str:
+    if algo in _MISSING_ALGORITHMS:
+        return f"hash algorithm '{algo}' requires the '{_MISSING_ALGORITHMS[algo]}' package"
+    return f"hash algorithm '{algo}' is not available"
+
+
+for _name in ("md5", "sha1", "sha256", "sha512", "blake2b", "blake2s"):
+    if hasattr(hashlib, _name):
+        _register_algorithm(_name, getattr(hashlib, _name))
+_register_algorithm("crc32", lambda: _ZlibChecksum(zlib.crc32, 0))
+_register_algorithm("adler32", lambda: _ZlibChecksum(zlib.adler32, 1))
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+for _name in ("xxh64", "xxh3_64", "xxh3_128"):
+    if hasattr(xxhash, _name):
+        _register_algorithm(_name, getattr(xxhash, _name))
+    else:
+        _MISSING_ALGORITHMS[_name] = "xxhash"
+try:
+    import blake3
+    _register_algorithm("blake3", blake3.blake3)
+except ImportError:
+    _MISSING_ALGORITHMS["blake3"] = "blake3"
+try:
+    import resource
+except ImportError:
+    resource = None
 
 @dataclass
 class Options:
@@ -89,88 +261,657 @@ class Options:
     algorithm: str = "md5"
     exclude: list[str] = field(default_factory=list)
     include: list[str] = field(default_factory=list)
+    jobs: int = 4
+    executor: str = "thread"
+    io_strategy: str = "auto"
+    store: str = "text"
+    manifest_format: str | None = None
+    stream: bool = False
+    progress_rate: float = 10.0
+    format: str = "text"
+    output: str = ""
+    stats: bool = False
+    profile: str = ""
+    walk_jobs: int = 1
+    resume: bool = False
+    detect_moves: bool = False
+    quick: bool = False
+    budget_bytes: int = 0
+    budget_time: float = 0.0
+    max_read_rate: float = 0.0
+    max_files_per_sec: float = 0.0
+    ionice: str = ""
+    query_hash: str = ""
+    query_size: int | None = None
+    query_mtime_after: str = ""
+    query_mtime_before: str = ""
+    query_glob: str = ""
     _skip_new_dirs: bool = False
 
 
 options: Options = Options()
+_executor: Executor | None = None
+_executor_key: tuple[str, int] | None = None
+_index: sqlite3.Connection | None = None
+_index_root: str = ""
+_index_pending: int = 0
+
+
+_output: Any = None
+_run_start: float = 0.0
+
+
+def _out() -> Any:
+    return _output if _output is not None else sys.stdout
+
+
+def _text_out() -> Any:
+    return sys.stderr if options.format == "jsonl" and _output is None else sys.stdout
+
+
+def _open_output() -> None:
+    global _output, _run_start
+    _close_output()
+    _run_start = time.monotonic()
+    if options.output:
+        _output = open(options.output, "w", encoding="utf-8", buffering=1048576)
+
+
+def _close_output() -> None:
+    global _output
+    if _output is not None:
+        _output.close()
+    _output = None
+
+
+def _json_info(info: dict[str, Any] | None) -> dict[str, Any] | None:
+    if info is None:
+        return None
+    return {"size": info["size"], "mtime": info["mtime"], "hash": info["hash"] or None}
+
+
+def _emit_status(status: str, path: str, currentValue: dict[str, Any] | None = None,
+                 savedValue: dict[str, Any] | None = None, source: str | None = None) -> None:
+    if options.format == "jsonl":
+        record: dict[str, Any] = {"type": "entry", "status": status, "path": path,
+                                  "saved": _json_info(savedValue), "current": _json_info(currentValue),
+                                  "elapsed": round(time.monotonic() - _run_start, 6)}
+        if source is not None:
+            record["from"] = source
+        _out().write(json.dumps(record) + "\n")
+    elif source is not None:
+        print(f"{status}: {source} -> {path}", file=_out())
+    else:
+        print(f"{status}: {path}", file=_out())
 
 
 def error(message: str) -> None:
-    print(f"ERROR: {message}")
+    print(f"ERROR: {message}", file=_text_out())
+
+
+def _buffer_size(file_size: int) -> int:
+    if file_size <= _SMALL_FILE:
+        return _SMALL_FILE
+    if file_size <= 16 * 1048576:
+        return 262144
+    return 1048576
+
+
+def _get_buffer(size: int) -> memoryview:
+    buf: bytearray | None = getattr(_thread_local, "buffer", None)
+    if buf is None or len(buf) < size:
+        buf = bytearray(size)
+        _thread_local.buffer = buf
+    return memoryview(buf)[:size]
+
+
+def _read_readinto(f: Any, file_size: int, h: Any) -> Any:
+    view: memoryview = _get_buffer(_buffer_size(file_size))
+    readinto = f.readinto
+    update = h.update
+    while True:
+        n: int = readinto(view)
+        if not n:
+            break
+        update(view[:n])
+    return h
+
+
+def _read_throttled(f: Any, file_size: int, h: Any) -> Any:
+    view: memoryview = _get_buffer(_buffer_size(file_size))
+    bucket: _TokenBucket = _get_buckets()[0]
+    while True:
+        n: int = f.readinto(view)
+        if not n:
+            break
+        bucket.take(n)
+        h.update(view[:n])
+    return h
+
+
+def _read_mmap(f: Any, file_size: int, h: Any) -> Any:
+    if file_size == 0:
+        return _read_readinto(f, file_size, h)
+    try:
+        mm: mmap.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return _read_readinto(f, file_size, h)
+    with mm:
+        h.update(mm)
+    return h
+
 
+def _read_file_digest(f: Any, file_size: int, h: Any) -> Any:
+    return hashlib.file_digest(f, lambda: h)
 
-def _compute_hash(fileName: str, algorithm: str | None = None) -> str:
-    algo = algorithm or options.algorithm
-    if algo not in _ALGORITHMS:
-        algo = "md5"
+
+_IO_STRATEGIES: dict[str, Callable[[Any, int, Any], Any]] = {
+    "readinto": _read_readinto,
+    "mmap": _read_mmap,
+}
+if hasattr(hashlib, "file_digest"):
+    _IO_STRATEGIES["file_digest"] = _read_file_digest
+
+
+def _pick_strategy(file_size: int) -> Callable[[Any, int, Any], Any]:
+    if _get_buckets()[0] is not None:
+        return _read_throttled
+    if file_size <= _SMALL_FILE:
+        return _read_readinto
+    if options.io_strategy == "auto":
+        return _read_mmap if file_size >= _MMAP_THRESHOLD else _read_readinto
+    return _IO_STRATEGIES.get(options.io_strategy, _read_readinto)
+
+
+class _ProgressHash:
+    def __init__(self, h: Any, fileName: str, file_size: int) -> None:
+        self.h: Any = h
+        self.fileName: str = fileName
+        self.file_size: int = file_size
+        self.step: int = -(-file_size // 20)
+        self.bytes_read: int = 0
+        self.next_report: int = self.step
+
+    def update(self, data: Any) -> None:
+        with memoryview(data) as view:
+            offset: int = 0
+            while offset < len(view):
+                n: int = self.next_report - self.bytes_read
+                chunk: memoryview = view[offset:offset + n]
+                self.h.update(chunk)
+                offset += len(chunk)
+                self.bytes_read += len(chunk)
+                if self.bytes_read >= self.next_report:
+                    _progress(f"{self.fileName} ({min(self.bytes_read * 100 // self.file_size, 100)}%)")
+                    self.next_report = self.bytes_read + self.step
+                    if self.bytes_read < self.file_size:
+                        self.next_report = min(self.next_report, self.file_size)
+
+
+_THROTTLE_BURST: float = 0.1
+_IOPRIO_CLASSES: dict[str, tuple[int, int]] = {"idle": (3, 0), "low": (2, 7)}
+_SYS_IOPRIO_SET: dict[str, int] = {"x86_64": 251, "i386": 289, "i686": 289, "aarch64": 30, "riscv64": 30,
+                                   "armv7l": 314, "ppc64le": 273, "ppc64": 273, "s390x": 282}
+
+
+class _TokenBucket:
+    def __init__(self, rate: float) -> None:
+        self.rate: float = rate
+        self.capacity: float = max(rate * _THROTTLE_BURST, 1.0)
+        self.tokens: float = self.capacity
+        self.stamp: float = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self, amount: float) -> None:
+        with self.lock:
+            now: float = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate) - amount
+            self.stamp = now
+            wait: float = -self.tokens / self.rate
+        if wait > 0:
+            time.sleep(wait)
+
+
+_buckets: tuple[_TokenBucket | None, _TokenBucket | None] = (None, None)
+_buckets_key: tuple[float, float, int, bool] = (0.0, 0.0, 1, False)
+
+
+def _get_buckets() -> tuple[_TokenBucket | None, _TokenBucket | None]:
+    global _buckets, _buckets_key
+    share: int = _worker_count() if _in_worker and options.executor == "process" else 1
+    key: tuple[float, float, int, bool] = (options.max_read_rate, options.max_files_per_sec, share, _in_worker)
+    if key != _buckets_key:
+        _buckets = (_TokenBucket(options.max_read_rate * 1048576 / share) if options.max_read_rate > 0 else None,
+                    _TokenBucket(options.max_files_per_sec / share) if options.max_files_per_sec > 0 else None)
+        _buckets_key = key
+    return _buckets
+
+
+def _throttle_file() -> None:
+    bucket: _TokenBucket | None = _get_buckets()[1]
+    if bucket is not None:
+        bucket.take(1)
+
+
+def _throttle_read(size: int) -> None:
+    bucket: _TokenBucket | None = _get_buckets()[0]
+    if bucket is not None:
+        bucket.take(size)
+
+
+def _set_io_priority(level: str) -> bool:
+    if not sys.platform.startswith("linux"):
+        error("--ionice is only supported on Linux")
+        return False
+    number: int | None = _SYS_IOPRIO_SET.get(os.uname().machine)
+    if number is None:
+        error(f"--ionice: unknown syscall number for {os.uname().machine}")
+        return False
+    ioclass, data = _IOPRIO_CLASSES[level]
+    libc: Any = ctypes.CDLL(None, use_errno=True)
+    if libc.syscall(number, 1, 0, (ioclass << 13) | data) != 0:
+        error(f"cannot set I/O priority: {os.strerror(ctypes.get_errno())}")
+        return False
+    return True
+
+
+class _MultiHash:
+    def __init__(self, hashers: list[Any]) -> None:
+        self.hashers: list[Any] = hashers
+
+    def update(self, data: Any) -> None:
+        for h in self.hashers:
+            h.update(data)
+
+
+def _compute_hashes(fileName: str, algorithms: tuple[str, ...], size: int | None = None) -> dict[str, str]:
+    for algo in algorithms:
+        if algo not in _ALGORITHMS:
+            error(f"cannot hash {fileName}: {_algorithm_error(algo)}")
+            return dict.fromkeys(algorithms, "error")
+    _throttle_file()
     try:
-        h = _ALGORITHMS[algo]()
-        try:
-            file_size: int = os.path.getsize(fileName)
-        except OSError:
-            file_size = 0
-        show_progress: bool = not options.quiet and not options.verbose and file_size > 1048576
-        bytes_read: int = 0
-        next_pct: int = 5
-        with open(fileName, "rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                h.update(chunk)
-                if show_progress:
-                    bytes_read += len(chunk)
-                    new_pct: int = bytes_read * 100 // file_size
-                    if new_pct >= next_pct:
-                        _progress(f"{fileName} ({new_pct}%)")
-                        next_pct = ((new_pct // 5) + 1) * 5
-        return h.hexdigest()
+        hashers: list[Any] = [_ALGORITHMS[algo]() for algo in algorithms]
+        h: Any = hashers[0] if len(hashers) == 1 else _MultiHash(hashers)
+        with open(fileName, "rb", buffering=0) as f:
+            file_size: int = os.fstat(f.fileno()).st_size if size is None else size
+            reader: Callable[[Any, int, Any], Any] = _pick_strategy(file_size)
+            if not options.quiet and not options.verbose and file_size > 1048576:
+                h = _ProgressHash(h, fileName, file_size)
+            reader(f, file_size, h)
+        return {algo: hasher.hexdigest() for algo, hasher in zip(algorithms, hashers)}
     except (OSError, PermissionError, FileNotFoundError) as e:
-        print(f"Error calculating {algo} for {fileName}: {e}")
+        print(f"Error calculating {', '.join(algorithms)} for {fileName}: {e}", file=_text_out())
+        return dict.fromkeys(algorithms, "error")
+
+
+def _compute_hash(fileName: str, algorithm: str | None = None, size: int | None = None) -> str:
+    algo: str = algorithm or options.algorithm
+    return _compute_hashes(fileName, (algo,), size)[algo]
+
+
+_QUICK_BLOCK: int = 65536
+_QUICK_SAMPLES: int = 8
+
+
+def _sample_offsets(size: int) -> range | list[int]:
+    if size <= (_QUICK_SAMPLES + 2) * _QUICK_BLOCK:
+        return range(0, size, _QUICK_BLOCK)
+    last: int = size - _QUICK_BLOCK
+    return [0] + [last * (i + 1) // (_QUICK_SAMPLES + 1) for i in range(_QUICK_SAMPLES)] + [last]
+
+
+def _sampled_bytes(size: int) -> int:
+    return min(size, (_QUICK_SAMPLES + 2) * _QUICK_BLOCK)
+
+
+def _sample_fingerprint(fileName: str, size: int | None = None) -> str:
+    try:
+        h: Any = hashlib.blake2b(digest_size=16)
+        with open(fileName, "rb", buffering=0) as f:
+            file_size: int = os.fstat(f.fileno()).st_size if size is None else size
+            h.update(file_size.to_bytes(8, "little"))
+            _throttle_file()
+            for offset in _sample_offsets(file_size):
+                f.seek(offset)
+                _throttle_read(min(_QUICK_BLOCK, file_size - offset))
+                h.update(f.read(_QUICK_BLOCK))
+        return h.hexdigest()
+    except OSError as e:
+        print(f"Error sampling {fileName}: {e}", file=_text_out())
         return "error"
 
 
-def _compute_hash_batch(files_dict: dict[str, dict[str, Any]]) -> None:
+def _worker_count() -> int:
+    return options.jobs if options.jobs > 0 else (os.cpu_count() or 1)
+
+
+def _init_worker(opts: Options) -> None:
+    global options, _in_worker
+    options = opts
+    _in_worker = True
+
+
+def _get_executor() -> Executor:
+    global _executor, _executor_key
+    key: tuple[str, int] = (options.executor, _worker_count())
+    if _executor is None or _executor_key != key:
+        _shutdown_executor()
+        if options.executor == "process":
+            _executor = ProcessPoolExecutor(max_workers=key[1], initializer=_init_worker, initargs=(options,))
+        else:
+            _executor = ThreadPoolExecutor(max_workers=key[1])
+        _executor_key = key
+    executor: Any = _executor
+    if _profile_gen and options.executor == "thread":
+        executor = _ProfilingExecutor(executor)
+    if _stats is not None:
+        executor = _StatsExecutor(executor, _stats)
+    return executor
+
+
+def _shutdown_executor() -> None:
+    global _executor, _executor_key
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+    _executor = None
+    _executor_key = None
+
+
+def _compute_hash_batch(files_dict: dict[str, dict[str, Any]], algorithm: str | None = None) -> None:
     paths: list[str] = []
     keys: list[str] = []
+    sizes: list[int | None] = []
     for key, info in files_dict.items():
         if info["hash"] == "" and info["hash"] != "<DIR>":
             paths.append(os.path.join(info["dirName"], info["fileName"]))
             keys.append(key)
+            sizes.append(info.get("size"))
     if not paths:
         return
     key_to_path: dict[str, str] = dict(zip(keys, paths))
-    with ThreadPoolExecutor(max_workers=4) as executor:
-        fut_to_key = {executor.submit(_compute_hash, p): k for p, k in zip(paths, keys)}
-        for fut in as_completed(fut_to_key):
-            key = fut_to_key[fut]
-            try:
-                files_dict[key]["hash"] = fut.result()
-            except Exception:
-                files_dict[key]["hash"] = "error"
-            if not options.quiet and not options.verbose:
-                _progress(key_to_path[key])
+    algo: str = algorithm or options.algorithm
+    executor: Executor = _get_executor()
+    _progress_queued(sum(sz or 0 for sz in sizes))
+    fut_to_key = {executor.submit(_compute_hash, p, algo, sz): k for p, k, sz in zip(paths, keys, sizes)}
+    for fut in as_completed(fut_to_key):
+        key = fut_to_key[fut]
+        try:
+            files_dict[key]["hash"] = fut.result()
+        except Exception:
+            files_dict[key]["hash"] = "error"
+        if _journal is not None:
+            _journal.hashed(files_dict[key])
+        _progress_hashed(files_dict[key].get("size"))
+        if not options.quiet and not options.verbose:
+            _progress(key_to_path[key])
+
+
+def _fingerprint_result(future: Any, info: dict[str, Any], analyzing: bool) -> None:
+    try:
+        fp: str = future.result()
+    except Exception:
+        fp = "error"
+    info["fp"] = "" if analyzing and fp == "error" else fp
+    _progress_hashed(_sampled_bytes(info["size"]))
+
+
+def _compute_fingerprint_batch(files_dict: dict[str, dict[str, Any]], analyzing: bool) -> None:
+    if not files_dict:
+        return
+    executor: Executor = _get_executor()
+    _progress_queued(sum(_sampled_bytes(info["size"]) for info in files_dict.values()))
+    fut_to_key = {executor.submit(_sample_fingerprint, os.path.join(info["dirName"], info["fileName"]), info["size"]): key
+                  for key, info in files_dict.items()}
+    for fut in as_completed(fut_to_key):
+        info: dict[str, Any] = files_dict[fut_to_key[fut]]
+        _fingerprint_result(fut, info, analyzing)
+        if not options.quiet and not options.verbose:
+            _progress(os.path.join(info["dirName"], info["fileName"]))
+
+
+def _wants_fingerprint(info: dict[str, Any]) -> bool:
+    return options.quick and info["hash"] != "<DIR>" and not info.get("fp")
+
+
+def _compute_hashes_batch(jobs: dict[str, tuple[str, int | None]], algorithms: tuple[str, ...]) -> dict[str, dict[str, str]]:
+    results: dict[str, dict[str, str]] = {}
+    if not jobs:
+        return results
+    executor: Executor = _get_executor()
+    _progress_queued(sum(size or 0 for _, size in jobs.values()))
+    fut_to_key = {executor.submit(_compute_hashes, path, algorithms, size): key
+                  for key, (path, size) in jobs.items()}
+    for fut in as_completed(fut_to_key):
+        key = fut_to_key[fut]
+        try:
+            results[key] = fut.result()
+        except Exception:
+            results[key] = dict.fromkeys(algorithms, "error")
+        _progress_hashed(jobs[key][1])
+        if not options.quiet and not options.verbose:
+            _progress(jobs[key][0])
+    return results
+
+
+def _compile_patterns(patterns: list[str]) -> tuple[frozenset[str], re.Pattern[str] | None]:
+    literals: set[str] = set()
+    globs: list[str] = []
+    for pattern in patterns:
+        pattern = os.path.normcase(pattern)
+        if any(c in pattern for c in "*?["):
+            globs.append(translate(pattern))
+        else:
+            literals.add(pattern)
+    return frozenset(literals), re.compile("|".join(globs)) if globs else None
+
+
+class _IgnoreMatcher:
+    _CACHE_LIMIT: int = 65536
+
+    def __init__(self, include: list[str], exclude: list[str]) -> None:
+        self.include_names, self.include_re = _compile_patterns(include)
+        self.exclude_names, self.exclude_re = _compile_patterns(exclude)
+        ignore_names, self.ignore_re = _compile_patterns(_IGNORE_GLOB)
+        self.ignore_names: frozenset[str] = ignore_names | frozenset(os.path.normcase(n) for n in _IGNORE_EXACT)
+        self.by_name: dict[str, bool | None] = {}
+
+    @staticmethod
+    def _match(value: str, names: frozenset[str], regex: re.Pattern[str] | None) -> bool:
+        return value in names or (regex is not None and regex.match(value) is not None)
+
+    def _name_state(self, name: str) -> bool | None:
+        state: bool | None = self.by_name.get(name, ...)
+        if state is ...:
+            if self._match(name, self.include_names, self.include_re):
+                state = False
+            elif (self._match(name, self.ignore_names, self.ignore_re)
+                  or self._match(name, self.exclude_names, self.exclude_re)):
+                state = True
+            else:
+                state = None
+            if len(self.by_name) >= self._CACHE_LIMIT:
+                self.by_name.clear()
+            self.by_name[name] = state
+        return state
+
+    def __call__(self, filename: str, name: str) -> bool:
+        state: bool | None = self._name_state(os.path.normcase(name))
+        if state is False:
+            return False
+        path: str = os.path.normcase(filename)
+        if path == os.path.normcase(name):
+            return state is True
+        if self._match(path, self.include_names, self.include_re):
+            return False
+        return state is True or self._match(path, self.exclude_names, self.exclude_re)
+
+
+_matcher: _IgnoreMatcher | None = None
+_matcher_key: tuple[tuple[str, ...], ...] = ()
+
+
+def _get_matcher() -> _IgnoreMatcher:
+    global _matcher, _matcher_key
+    key: tuple[tuple[str, ...], ...] = (tuple(options.include), tuple(options.exclude),
+                                        tuple(_IGNORE_EXACT), tuple(_IGNORE_GLOB))
+    if _matcher is None or key != _matcher_key:
+        _matcher = _IgnoreMatcher(options.include, options.exclude)
+        _matcher_key = key
+    return _matcher
 
 
 def shouldIgnore(filename: str) -> bool:
-    name: str = Path(filename).name
+    name: str = filename.name if isinstance(filename, _WalkEntry) else Path(filename).name
+    return _get_matcher()(filename, name)
+
+
+def _gitignore_regex(pattern: str) -> str:
+    out: list[str] = []
+    i: int = 0
+    n: int = len(pattern)
+    while i < n:
+        c: str = pattern[i]
+        if c == "*":
+            if pattern.startswith("**", i):
+                i += 2
+                if i < n and pattern[i] == "/":
+                    out.append("(?:.*/)?")
+                    i += 1
+                else:
+                    out.append(".*")
+                continue
+            out.append("[^/]*")
+        elif c == "?":
+            out.append("[^/]")
+        elif c == "[":
+            j: int = pattern.find("]", i + 2 if pattern.startswith("[!", i) or pattern.startswith("[^", i) else i + 1)
+            if j < 0:
+                out.append(re.escape(c))
+            else:
+                body: str = pattern[i + 1:j].replace("\\", "\\\\")
+                if body[0] in "!^":
+                    body = "^" + body[1:]
+                out.append(f"(?!/)[{body}]")
+                i = j + 1
+                continue
+        elif c == "\\" and i + 1 < n:
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+            continue
+        else:
+            out.append(re.escape(c))
+        i += 1
+    return "".join(out)
+
+
+class _IgnoreRules:
+    _FLAGS: int = re.DOTALL | (re.IGNORECASE if os.path.normcase("A") == "a" else 0)
+
+    def __init__(self, parent: _IgnoreRules | None, dirName: str, lines: list[str]) -> None:
+        rules: list[tuple[re.Pattern[str], bool, bool, bool, str]] = list(parent.rules) if parent is not None else []
+        for line in lines:
+            rule = self._parse(line, dirName)
+            if rule is not None:
+                rules.append(rule)
+        self.rules: tuple[tuple[re.Pattern[str], bool, bool, bool, str], ...] = tuple(rules)
+
+    def _parse(self, line: str, dirName: str) -> tuple[re.Pattern[str], bool, bool, bool, str] | None:
+        line = line.rstrip("\r\n")
+        if not line or line.startswith("#"):
+            return None
+        stripped: str = line.rstrip(" ")
+        if stripped.endswith("\\") and len(stripped) < len(line):
+            stripped += " "
+        line = stripped
+        negate: bool = line.startswith("!")
+        if negate or line.startswith(("\\!", "\\#")):
+            line = line[1:]
+        dir_only: bool = line.endswith("/")
+        line = line.rstrip("/")
+        if not line:
+            return None
+        anchored: bool = "/" in line
+        regex: re.Pattern[str] = re.compile(_gitignore_regex(line.lstrip("/")) + r"\Z", self._FLAGS)
+        return regex, negate, dir_only, anchored, dirName
+
+    def ignored(self, path: str, name: str, is_dir: bool) -> bool:
+        for regex, negate, dir_only, anchored, base in reversed(self.rules):
+            if dir_only and not is_dir:
+                continue
+            if anchored:
+                rel: str = path if base == "." else path[len(base) + 1:]
+                if os.sep != "/":
+                    rel = rel.replace(os.sep, "/")
+                if regex.match(rel) is None:
+                    continue
+            elif regex.match(name) is None:
+                continue
+            return not negate
+        return False
 
-    include_patterns: list[str] = options.include
-    if include_patterns:
-        for pattern in include_patterns:
-            if fnmatch(name, pattern) or fnmatch(filename, pattern):
-                return False
 
-    if name in _IGNORE_EXACT:
-        return True
+_active_rules: _IgnoreRules | None = None
 
-    for pattern in _IGNORE_GLOB:
-        if fnmatch(name, pattern):
-            return True
 
-    exclude_patterns: list[str] = options.exclude
-    for pattern in exclude_patterns:
-        if fnmatch(name, pattern) or fnmatch(filename, pattern):
-            return True
+def _load_ignore_rules(dirName: str, parent: _IgnoreRules | None) -> _IgnoreRules | None:
+    try:
+        with open(os.path.join(dirName, filecheckIgnoreName), encoding="utf-8", errors="surrogateescape") as f:
+            return _IgnoreRules(parent, dirName, f.readlines())
+    except (OSError, PermissionError) as e:
+        error(f"cannot read {os.path.join(dirName, filecheckIgnoreName)}: {e}")
+        return parent
 
-    return False
+
+def _rule_ignored(dirName: str, key: str, is_dir: bool) -> bool:
+    if _active_rules is None:
+        return False
+    return _active_rules.ignored(key if dirName == "." else os.path.join(dirName, key), key, is_dir)
+
+
+class _WalkEntry(str):
+    name: str
+    dirName: str
+    stat: os.stat_result
+
+
+def _walk_entry(dirName: str, name: str, st: os.stat_result) -> _WalkEntry:
+    record: _WalkEntry = _WalkEntry(name if dirName == "." else os.path.join(dirName, name))
+    record.name = name
+    record.dirName = dirName
+    record.stat = st
+    return record
+
+
+def _stat_entry(dirName: str, name: str) -> os.stat_result | OSError:
+    files: _TokenBucket | None = _get_buckets()[1]
+    if files is not None:
+        files.take(1)
+    try:
+        return os.lstat(os.path.join(dirName, name))
+    except (OSError, PermissionError) as e:
+        return e
+
+
+def _list_dir(dirName: str) -> list[tuple[str, os.stat_result | OSError | None]]:
+    try:
+        if options.stream:
+            return [(name, None) for name in sorted(os.listdir(dirName)) if not shouldIgnore(name)]
+        with os.scandir(dirName) as it:
+            entries: list[os.DirEntry] = sorted(it, key=lambda e: e.name)
+    except (OSError, PermissionError):
+        return []
+    listing: list[tuple[str, os.stat_result | OSError | None]] = []
+    files: _TokenBucket | None = _get_buckets()[1]
+    for entry in entries:
+        if not shouldIgnore(entry.name):
+            if files is not None:
+                files.take(1)
+            try:
+                listing.append((entry.name, entry.stat(follow_symlinks=False)))
+            except (OSError, PermissionError) as e:
+                listing.append((entry.name, e))
+    return listing
 
 
 def walkTree(
@@ -182,50 +923,72 @@ def walkTree(
     beginDirCallback: Callable[[str], Any] | bool = False,
     endDirCallback: Callable[[str, Any], None] | bool = False,
     bfs: bool = False,
+    walkJobs: int | None = None,
 ) -> None:
-    top_path: Path = Path(top)
+    jobs: int = options.walk_jobs if walkJobs is None else walkJobs
+    pool: ThreadPoolExecutor | None = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    global _active_rules
+    top_dir: str = str(Path(top))
     if bfs:
-        container: deque = deque([(top_path, data)])
+        container: deque = deque([[top_dir, data, None, None]])
         pop = container.popleft
+        upcoming = lambda: itertools.islice(container, 2 * jobs)
     else:
-        container = [(top_path, data)]
+        container = [[top_dir, data, None, None]]
         pop = container.pop
-    while container:
-        dirPath: Path
-        inheritedData: Any
-        dirPath, inheritedData = pop()
-        if callable(beginDirCallback):
-            dirData: Any = beginDirCallback(str(dirPath))
-        else:
-            dirData = inheritedData
-        try:
-            entries: list[Path] = list(dirPath.iterdir())
-        except (OSError, PermissionError):
-            entries = []
-        for entry in entries:
-            if not shouldIgnore(entry.name):
-                try:
-                    st: os.stat_result = entry.lstat()
-                    mode: int = st.st_mode
-                except (OSError, PermissionError) as e:
+        upcoming = lambda: container[:-2 * jobs - 1:-1]
+    try:
+        while container:
+            if pool is not None:
+                for item in upcoming():
+                    if item[2] is None:
+                        item[2] = pool.submit(_list_dir, item[0])
+            dirName: str
+            inheritedData: Any
+            rules: _IgnoreRules | None
+            dirName, inheritedData, listed, rules = pop()
+            if callable(beginDirCallback):
+                dirData: Any = beginDirCallback(dirName)
+            else:
+                dirData = inheritedData
+            listing: list[tuple[str, os.stat_result | OSError | None]] = listed.result() if listed is not None else _list_dir(dirName)
+            if any(name == filecheckIgnoreName for name, _ in listing):
+                rules = _load_ignore_rules(dirName, rules)
+            _active_rules = rules
+            for name, st in listing:
+                if st is None:
+                    st = _stat_entry(dirName, name)
+                if isinstance(st, OSError):
                     _clear_progress()
-                    print(f"cannot stat {entry}: {e}")
+                    print(f"cannot stat {os.path.join(dirName, name)}: {st}", file=_text_out())
                     continue
+                mode: int = st.st_mode
 
                 if stat.S_ISLNK(mode) and not followLink:
                     continue
 
+                record: _WalkEntry = _walk_entry(dirName, name, st)
+                if rules is not None and rules.ignored(record, name, stat.S_ISDIR(mode)):
+                    continue
                 if stat.S_ISDIR(mode):
-                    ret = callback(str(entry), dirData)
+                    ret = callback(record, dirData)
                     if recursive and ret is not False:
-                        container.append((entry, dirData))
+                        container.append([record, None if callable(beginDirCallback) else dirData, None, rules])
                 elif stat.S_ISREG(mode):
-                    callback(str(entry), dirData)
+                    callback(record, dirData)
                 else:
                     _clear_progress()
-                    print(f'Skipping {entry}')
-        if callable(endDirCallback):
-            endDirCallback(str(dirPath), dirData)
+                    print(f'Skipping {record}', file=_text_out())
+            if callable(endDirCallback):
+                endDirCallback(dirName, dirData)
+            _active_rules = None
+    finally:
+        _active_rules = None
+        if pool is not None:
+            for item in container:
+                if item[2] is not None:
+                    item[2].cancel()
+            pool.shutdown(wait=True)
 
 
 def filecheckNew(dirName: str) -> dict[str, Any]:
@@ -239,78 +1002,1071 @@ def filecheckSet(data: dict[str, Any], info: dict[str, Any]) -> None:
     data["files"][info["fileName"]] = info
 
 
-def filecheckSave(data: dict[str, Any], dirName: str) -> None:
+def filecheckSave(data: dict[str, Any], dirName: str) -> bool:
     dirName = data["dirName"]
-    dbFile: Path = Path(dirName) / filecheckName
-    tmpFile: Path = Path(dirName) / filecheckTempName
-    try:
-        with open(tmpFile, "w", encoding='utf-8') as f:
-            f.write(f"FILECHECK:{version}:{signature}:{options.algorithm}{endline}")
-            for fn, info in data["files"].items():
-                line: str = f"{info['hash']}:{info['size']}:{info['ctime']:.10f}:{info['mtime']:.10f}:{info['atime']:.10f}:{info['fileName']}{endline}"
-                f.write(line)
-        os.replace(str(tmpFile), str(dbFile))
+    if _index is not None:
+        return _index_save(data, dirName)
+    try:
+        writer: _TextWriter | _BinaryWriter = _manifest_writer(dirName)
+        try:
+            files: dict[str, Any] = data["files"]
+            for key in sorted(files):
+                writer.write(files[key])
+        except BaseException:
+            writer.abort()
+            raise
+        writer.close()
     except (OSError, PermissionError) as e:
         error(f"cannot save info for dir {dirName}: {e}")
         traceback.print_exc()
+        return False
+    return True
+
+
+_EXTRA_FIELDS: dict[str, Callable[[str], Any]] = {"ino": int, "dev": int, "fp": str, "verified": float}
+
+
+def _format_extra(info: dict[str, Any]) -> str:
+    return ";".join(f"{key}={info[key]}" for key in _EXTRA_FIELDS if info.get(key))
+
+
+def _parse_extra(text: str, info: dict[str, Any]) -> None:
+    for item in text.split(";"):
+        key, sep, value = item.partition("=")
+        if sep and key in _EXTRA_FIELDS:
+            try:
+                info[key] = _EXTRA_FIELDS[key](value)
+            except ValueError:
+                pass
+
+
+def _manifest_header(fileVersion: str) -> str:
+    return f"FILECHECK:{fileVersion}:{signature}:{options.algorithm}:sorted{endline}"
+
+
+def _fsync_dir(dirName: str) -> None:
+    try:
+        fd: int = os.open(dirName, os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class _TextWriter:
+    def __init__(self, dirName: str) -> None:
+        self.dbFile: str = os.path.join(dirName, filecheckName)
+        self.tmpFile: str = os.path.join(dirName, filecheckTempName)
+        self.f = open(self.tmpFile, "w", encoding="utf-8")
+        self.f.write(_manifest_header(version))
+
+    def write(self, info: dict[str, Any]) -> None:
+        self.f.write(f"{info['hash']}:{info['size']}:{info['ctime']:.10f}:{info['mtime']:.10f}:{info['atime']:.10f}:"
+                     f"{_format_extra(info)}:{info['fileName']}{endline}")
+
+    def close(self) -> None:
+        if _journal is not None:
+            self.f.flush()
+            os.fsync(self.f.fileno())
+        self.f.close()
+        os.replace(self.tmpFile, self.dbFile)
+        if _journal is not None:
+            _fsync_dir(os.path.dirname(self.dbFile))
+
+    def abort(self) -> None:
+        self.f.close()
+        try:
+            os.unlink(self.tmpFile)
+        except OSError:
+            pass
+
+
+def _info_ns(info: dict[str, Any], field: str) -> int:
+    ns: int | None = info.get(f"{field}_ns")
+    return int(info[field] * 1_000_000_000) if ns is None else ns
+
+
+class _BinaryWriter(_TextWriter):
+    _FLUSH_RECORDS: int = 4096
+
+    def __init__(self, dirName: str) -> None:
+        self.dbFile = os.path.join(dirName, filecheckName)
+        self.tmpFile = os.path.join(dirName, filecheckTempName)
+        self.digest_len: int = len(_ALGORITHMS[options.algorithm]().digest())
+        self.record: struct.Struct = _bin_record(self.digest_len)
+        self.count: int = 0
+        self.names_len: int = 0
+        self.body: bytearray = bytearray()
+        self.names = tempfile.SpooledTemporaryFile(max_size=8 * 1048576)
+        self.f = open(self.tmpFile, "wb")
+        self.f.write(_manifest_header(_BINARY_VERSIONS[-1]).encode("utf-8"))
+        self.header_pos: int = self.f.tell()
+        self.f.write(_BIN_HEADER.pack(0, 0, self.digest_len))
+
+    def write(self, info: dict[str, Any]) -> None:
+        hsh: str = info["hash"]
+        flag: int = _BIN_MARKERS.get(hsh, _BIN_DIGEST)
+        digest: bytes = b""
+        if flag == _BIN_DIGEST:
+            try:
+                digest = bytes.fromhex(hsh)
+            except ValueError:
+                flag = _BIN_ERROR
+            if len(digest) != self.digest_len:
+                flag = _BIN_ERROR
+        fp: bytes = _BIN_NO_FP
+        if info.get("fp"):
+            try:
+                fp = bytes.fromhex(info["fp"])
+            except ValueError:
+                pass
+        name: bytes = info["fileName"].encode("utf-8", "surrogateescape")
+        self.body += self.record.pack(flag, digest, info["size"],
+                                      _info_ns(info, "ctime"), _info_ns(info, "mtime"), _info_ns(info, "atime"),
+                                      info.get("ino", 0), info.get("dev", 0),
+                                      fp if len(fp) == len(_BIN_NO_FP) else _BIN_NO_FP,
+                                      int(info.get("verified", 0) * 1_000_000_000), self.names_len, len(name))
+        self.names.write(name)
+        self.names_len += len(name)
+        self.count += 1
+        if self.count % self._FLUSH_RECORDS == 0:
+            self.f.write(self.body)
+            self.body.clear()
+
+    def close(self) -> None:
+        self.f.write(self.body)
+        self.names.seek(0)
+        shutil.copyfileobj(self.names, self.f)
+        self.names.close()
+        self.f.seek(self.header_pos)
+        self.f.write(_BIN_HEADER.pack(self.count, self.names_len, self.digest_len))
+        super().close()
+
+    def abort(self) -> None:
+        self.names.close()
+        super().abort()
+
+
+def _manifest_writer(dirName: str) -> _TextWriter | _BinaryWriter | _IndexWriter:
+    if _index is not None:
+        return _IndexWriter(dirName)
+    if options.manifest_format == "binary":
+        return _BinaryWriter(dirName)
+    return _TextWriter(dirName)
+
+
+def _parse_header(line: str, res: dict[str, Any], fileName: Path) -> str | None:
+    headerFields: list[str] = line.split(":")
+    if len(headerFields) < 3:
+        return None
+    h0: str = headerFields[0].lstrip("\ufeff")
+    h1: str = headerFields[1]
+    h2: str = headerFields[2]
+    if h0 != "FILECHECK" or (h1 not in _SUPPORTED_VERSIONS and h1 not in _BINARY_VERSIONS) or h2 not in _SUPPORTED_SIGS:
+        return None
+    res["algorithm"] = headerFields[3].strip() if len(headerFields) > 3 else "md5"
+    if res["algorithm"] not in _ALGORITHMS:
+        raise ValueError(f"{fileName}: {_algorithm_error(res['algorithm'])}")
+    res["sorted"] = "sorted" in headerFields[4:]
+    return h1
+
+
+def _manifest_entries(fileName: Path, res: dict[str, Any]) -> Iterator[dict[str, Any]] | bool:
+    raw = open(fileName, "rb")
+    try:
+        first: bytes = raw.readline()
+        if not first:
+            raw.close()
+            return iter(())
+        fileVersion: str | None = _parse_header(first.decode("utf-8", "replace").rstrip("\r\n"), res, fileName)
+        if fileVersion is None:
+            raw.close()
+            error("Invalid header")
+            return False
+        if fileVersion in _BINARY_VERSIONS:
+            res["format"] = "binary"
+            entries: Iterator[dict[str, Any]] | None = _binary_entries(raw, len(first), str(fileName.parent), fileVersion)
+            if entries is None:
+                error(f"Invalid manifest {fileName}")
+                return False
+            return entries
+        return _text_entries(io.TextIOWrapper(raw, encoding="utf-8"), str(fileName.parent), fileVersion not in ("0.1", "0.2"))
+    except BaseException:
+        raw.close()
+        raise
+
+
+def _text_entries(f: io.TextIOWrapper, dirName: str, extended: bool = False) -> Iterator[dict[str, Any]]:
+    fields: int = 7 if extended else 6
+    with f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            lineFields: list[str] = line.split(":", fields - 1)
+            if len(lineFields) >= fields:
+                info: dict[str, Any] = {
+                    'dirName': dirName,
+                    'fileName': lineFields[-1],
+                    'hash': lineFields[0],
+                    'size': int(lineFields[1]),
+                    'ctime': float(lineFields[2]),
+                    'mtime': float(lineFields[3]),
+                    'atime': float(lineFields[4]),
+                    'ino': 0,
+                    'dev': 0,
+                    'fp': "",
+                    'verified': 0.0,
+                }
+                if extended and lineFields[5]:
+                    _parse_extra(lineFields[5], info)
+                yield info
 
 
 def filecheckLoad(dirName: str) -> dict[str, Any] | bool:
     fileName: Path = Path(dirName) / filecheckName
     res: dict[str, Any] = filecheckNew(dirName)
     res["algorithm"] = options.algorithm
-    header: bool = False
+    if _index is not None:
+        return _index_load(res, dirName)
     if not fileName.is_file():
         return res
+    entries: Iterator[dict[str, Any]] | bool = _manifest_entries(fileName, res)
+    if entries is False:
+        return False
+    files: dict[str, Any] = res["files"]
+    for info in entries:
+        files[info["fileName"]] = info
+    return res
 
-    with open(fileName, "rt", encoding="utf-8") as f:
-        for line in f:
-            line = line.rstrip("\r\n")
-            if not header:
-                headerFields: list[str] = line.split(":")
-                if len(headerFields) < 3:
-                    error("Invalid header")
-                    return False
-                h0: str = headerFields[0].lstrip("\ufeff")
-                h1: str = headerFields[1]
-                h2: str = headerFields[2]
-                if h0 != "FILECHECK" or h1 not in _SUPPORTED_VERSIONS or h2 not in _SUPPORTED_SIGS:
-                    error("Invalid header")
-                    return False
-                res["algorithm"] = headerFields[3].strip() if len(headerFields) > 3 else "md5"
-                header = True
-            else:
-                lineFields: list[str] = line.split(":", 5)
-                if len(lineFields) >= 6:
-                    data: dict[str, Any] = {
-                        'dirName': str(fileName.parent),
-                        'fileName': lineFields[5],
-                        'hash': lineFields[0],
-                        'size': int(lineFields[1]),
-                        'ctime': float(lineFields[2]),
-                        'mtime': float(lineFields[3]),
-                        'atime': float(lineFields[4])
-                    }
-                    res["files"][data["fileName"]] = data
+
+def _saved_entries(dirName: str, res: dict[str, Any]) -> Iterator[dict[str, Any]] | bool:
+    fileName: Path = Path(dirName) / filecheckName
+    res["algorithm"] = options.algorithm
+    if _index is not None:
+        return _index_entries(res, dirName)
+    if not fileName.is_file():
+        return iter(())
+    entries: Iterator[dict[str, Any]] | bool = _manifest_entries(fileName, res)
+    if entries is False or res.get("sorted"):
+        return entries
+    return iter(sorted(entries, key=lambda info: info["fileName"]))
+
+
+_BINARY_VERSIONS: tuple[str, ...] = ("1.0", "1.1", "1.2", "1.3")
+_BIN_RECORDS: dict[str, str] = {"1.0": "<B{}sQqqqII", "1.1": "<B{}sQqqqQQII", "1.2": "<B{}sQqqqQQ16sII",
+                                 "1.3": "<B{}sQqqqQQ16sqII"}
+_BIN_HEADER = struct.Struct("<IIH")
+_BIN_DIGEST, _BIN_DIR, _BIN_EMPTY, _BIN_ERROR = range(4)
+_BIN_MARKERS: dict[str, int] = {"<DIR>": _BIN_DIR, "": _BIN_EMPTY, "error": _BIN_ERROR}
+_BIN_HASHES: dict[int, str] = {v: k for k, v in _BIN_MARKERS.items()}
+_BIN_NO_FP: bytes = bytes(16)
+
+
+def _bin_record(digest_len: int, fileVersion: str = _BINARY_VERSIONS[-1]) -> struct.Struct:
+    return struct.Struct(_BIN_RECORDS[fileVersion].format(digest_len))
+
+
+def _binary_entries(raw: Any, start: int, dirName: str, fileVersion: str = _BINARY_VERSIONS[-1]) -> Iterator[dict[str, Any]] | None:
+    try:
+        size: int = os.fstat(raw.fileno()).st_size
+        mm: mmap.mmap | bytes = mmap.mmap(raw.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+    finally:
+        raw.close()
+    view: memoryview = memoryview(mm)
+    if len(view) < start + _BIN_HEADER.size:
+        return None
+    count, names_len, digest_len = _BIN_HEADER.unpack_from(view, start)
+    record: struct.Struct = _bin_record(digest_len, fileVersion)
+    start += _BIN_HEADER.size
+    names_start: int = start + count * record.size
+    if len(view) != names_start + names_len:
+        return None
+    return _iter_binary(mm, view, record, start, names_start, dirName, fileVersion)
+
+
+def _iter_binary(mm: Any, view: memoryview, record: struct.Struct, start: int, names_start: int,
+                 dirName: str, fileVersion: str = _BINARY_VERSIONS[-1]) -> Iterator[dict[str, Any]]:
+    with view:
+        records: Iterator[tuple[Any, ...]] = record.iter_unpack(view[start:names_start])
+        if fileVersion == "1.0":
+            records = ((flag, digest, size, ctime, mtime, atime, 0, 0, _BIN_NO_FP, 0, name_off, name_len)
+                       for flag, digest, size, ctime, mtime, atime, name_off, name_len in records)
+        elif fileVersion == "1.1":
+            records = ((flag, digest, size, ctime, mtime, atime, ino, dev, _BIN_NO_FP, 0, name_off, name_len)
+                       for flag, digest, size, ctime, mtime, atime, ino, dev, name_off, name_len in records)
+        elif fileVersion == "1.2":
+            records = ((flag, digest, size, ctime, mtime, atime, ino, dev, fp, 0, name_off, name_len)
+                       for flag, digest, size, ctime, mtime, atime, ino, dev, fp, name_off, name_len in records)
+        for flag, digest, size, ctime, mtime, atime, ino, dev, fp, verified, name_off, name_len in records:
+            name: str = bytes(view[names_start + name_off:names_start + name_off + name_len]).decode("utf-8", "surrogateescape")
+            yield {
+                'dirName': dirName,
+                'fileName': name,
+                'hash': digest.hex() if flag == _BIN_DIGEST else _BIN_HASHES.get(flag, "error"),
+                'size': size,
+                'ctime': ctime / 1_000_000_000,
+                'mtime': mtime / 1_000_000_000,
+                'atime': atime / 1_000_000_000,
+                'ctime_ns': ctime,
+                'mtime_ns': mtime,
+                'atime_ns': atime,
+                'ino': ino,
+                'dev': dev,
+                'fp': fp.hex() if fp != _BIN_NO_FP else "",
+                'verified': verified / 1_000_000_000,
+            }
+    if isinstance(mm, mmap.mmap):
+        mm.close()
+
+
+_INDEX_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS dirs (
+    dir TEXT PRIMARY KEY,
+    algorithm TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS entries (
+    dir TEXT NOT NULL,
+    name TEXT NOT NULL,
+    hash TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    ctime REAL NOT NULL,
+    mtime REAL NOT NULL,
+    atime REAL NOT NULL,
+    ino INTEGER NOT NULL DEFAULT 0,
+    dev INTEGER NOT NULL DEFAULT 0,
+    fp TEXT NOT NULL DEFAULT '',
+    verified REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (dir, name)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_hash ON entries (hash);
+CREATE INDEX IF NOT EXISTS entries_size ON entries (size);
+CREATE INDEX IF NOT EXISTS entries_mtime ON entries (mtime);
+"""
+_INDEX_COMMIT_EVERY: int = 500
+_SQL_LOAD_DIR: str = "SELECT algorithm FROM dirs WHERE dir = ?"
+_SQL_LOAD_ENTRIES: str = ("SELECT name, hash, size, ctime, mtime, atime, ino, dev, fp, verified FROM entries "
+                          "WHERE dir = ? ORDER BY name")
+_SQL_SAVE_DIR: str = "INSERT OR REPLACE INTO dirs (dir, algorithm) VALUES (?, ?)"
+_SQL_DELETE_ENTRIES: str = "DELETE FROM entries WHERE dir = ?"
+_SQL_SAVED_DIRS: str = "SELECT name FROM entries WHERE dir = ? AND hash = '<DIR>'"
+_SQL_STAGED_DIRS: str = "SELECT name FROM staging WHERE hash = '<DIR>'"
+_SQL_DROP_DIRS: str = "DELETE FROM dirs WHERE dir = ? OR substr(dir, 1, ?) = ?"
+_SQL_DROP_SUBTREE: str = "DELETE FROM entries WHERE dir = ? OR substr(dir, 1, ?) = ?"
+_SQL_SAVE_ENTRY: str = ("INSERT INTO entries (dir, name, hash, size, ctime, mtime, atime, ino, dev, fp, verified) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+_SQL_STAGING: str = ("CREATE TEMP TABLE IF NOT EXISTS staging (name TEXT PRIMARY KEY, hash TEXT, size INTEGER, "
+                     "ctime REAL, mtime REAL, atime REAL, ino INTEGER, dev INTEGER, fp TEXT, verified REAL)")
+_SQL_STAGE_ENTRY: str = ("INSERT INTO staging (name, hash, size, ctime, mtime, atime, ino, dev, fp, verified) "
+                         "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+_SQL_UNSTAGE: str = ("INSERT INTO entries (dir, name, hash, size, ctime, mtime, atime, ino, dev, fp, verified) "
+                     "SELECT ?, name, hash, size, ctime, mtime, atime, ino, dev, fp, verified FROM staging")
+_SQL_ADDED_COLUMNS: dict[str, str] = {"ino": "INTEGER NOT NULL DEFAULT 0", "dev": "INTEGER NOT NULL DEFAULT 0",
+                                      "fp": "TEXT NOT NULL DEFAULT ''", "verified": "REAL NOT NULL DEFAULT 0"}
+_SQL_PATH: str = "CASE WHEN dir = '' THEN name ELSE dir || '/' || name END"
+
+
+_U64: int = (1 << 64) - 1
+
+
+def _int64(value: int) -> int:
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def _index_dir(dirName: str) -> str:
+    rel: str = os.path.relpath(dirName, _index_root)
+    return "" if rel == "." else rel.replace(os.sep, "/")
+
+
+def _open_store(root: str, create: bool = True) -> bool:
+    global _index, _index_root, _index_pending
+    if options.store != "sqlite":
+        return True
+    dbFile: str = os.path.join(root, filecheckDbName)
+    if not create and not os.path.isfile(dbFile):
+        error(f"no index database {dbFile}; run analyze --store sqlite first")
+        return False
+    _index = sqlite3.connect(dbFile)
+    _index.execute("PRAGMA journal_mode=WAL")
+    _index.execute("PRAGMA synchronous=FULL")
+    _index.executescript(_INDEX_SCHEMA)
+    columns: set[str] = {row[1] for row in _index.execute("PRAGMA table_info(entries)")}
+    for column, definition in _SQL_ADDED_COLUMNS.items():
+        if column not in columns:
+            _index.execute(f"ALTER TABLE entries ADD COLUMN {column} {definition}")
+    _index_root = root
+    _index_pending = 0
+    return True
+
+
+def _close_store() -> None:
+    global _index, _index_pending
+    if _index is not None:
+        _index.commit()
+        _index.close()
+    _index = None
+    _index_pending = 0
+    if _journal is not None:
+        _journal.committed()
+
+
+def _index_load(res: dict[str, Any], dirName: str) -> dict[str, Any]:
+    files: dict[str, Any] = res["files"]
+    for info in _index_entries(res, dirName):
+        files[info["fileName"]] = info
     return res
 
 
-def checkBegin(dirName: str) -> dict[str, Any]:
-    if options.verbose:
-        print(dirName)
-    elif not options.quiet:
+def _index_entries(res: dict[str, Any], dirName: str) -> Iterator[dict[str, Any]]:
+    key: str = _index_dir(dirName)
+    row = _index.execute(_SQL_LOAD_DIR, (key,)).fetchone()
+    if row is None:
+        return iter(())
+    res["algorithm"] = row[0]
+    if res["algorithm"] not in _ALGORITHMS:
+        raise ValueError(f"{dirName} in {filecheckDbName}: {_algorithm_error(res['algorithm'])}")
+    return ({
+        'dirName': dirName,
+        'fileName': name,
+        'hash': hsh,
+        'size': size,
+        'ctime': ctime,
+        'mtime': mtime,
+        'atime': atime,
+        'ino': ino & _U64,
+        'dev': dev & _U64,
+        'fp': fp,
+        'verified': verified,
+    } for name, hsh, size, ctime, mtime, atime, ino, dev, fp, verified in _index.execute(_SQL_LOAD_ENTRIES, (key,)))
+
+
+def _index_commit_pending() -> None:
+    global _index_pending
+    _index_pending += 1
+    if _index_pending >= _INDEX_COMMIT_EVERY:
+        _index.commit()
+        _index_pending = 0
+        if _journal is not None:
+            _journal.committed()
+
+
+def _index_drop_subtrees(key: str, kept: set[str]) -> None:
+    for (name,) in _index.execute(_SQL_SAVED_DIRS, (key,)).fetchall():
+        if name in kept:
+            continue
+        sub: str = f"{key}/{name}" if key else name
+        params: tuple[Any, ...] = (sub, len(sub) + 1, sub + "/")
+        _index.execute(_SQL_DROP_DIRS, params)
+        _index.execute(_SQL_DROP_SUBTREE, params)
+
+
+class _IndexWriter:
+    _FLUSH_ROWS: int = 4096
+
+    def __init__(self, dirName: str) -> None:
+        self.dirName: str = dirName
+        self.key: str = _index_dir(dirName)
+        self.rows: list[tuple[Any, ...]] = []
+        _index.execute(_SQL_STAGING)
+        _index.execute("DELETE FROM staging")
+
+    def write(self, info: dict[str, Any]) -> None:
+        self.rows.append((info["fileName"], info["hash"], info["size"], info["ctime"], info["mtime"], info["atime"],
+                          _int64(info.get("ino", 0)), _int64(info.get("dev", 0)), info.get("fp", ""),
+                          info.get("verified", 0.0)))
+        if len(self.rows) >= self._FLUSH_ROWS:
+            self._flush()
+
+    def _flush(self) -> None:
+        _index.executemany(_SQL_STAGE_ENTRY, self.rows)
+        self.rows.clear()
+
+    def close(self) -> None:
+        try:
+            self._flush()
+            _index.execute(_SQL_SAVE_DIR, (self.key, options.algorithm))
+            _index_drop_subtrees(self.key, {row[0] for row in _index.execute(_SQL_STAGED_DIRS)})
+            _index.execute(_SQL_DELETE_ENTRIES, (self.key,))
+            _index.execute(_SQL_UNSTAGE, (self.key,))
+            _index.execute("DELETE FROM staging")
+            _index_commit_pending()
+        except sqlite3.Error as e:
+            error(f"cannot save info for dir {self.dirName}: {e}")
+
+    def abort(self) -> None:
+        self.rows.clear()
+        _index.execute("DELETE FROM staging")
+
+
+def _index_save(data: dict[str, Any], dirName: str) -> bool:
+    key: str = _index_dir(dirName)
+    try:
+        _index.execute(_SQL_SAVE_DIR, (key, options.algorithm))
+        _index_drop_subtrees(key, {name for name, info in data["files"].items() if info["hash"] == "<DIR>"})
+        _index.execute(_SQL_DELETE_ENTRIES, (key,))
+        _index.executemany(_SQL_SAVE_ENTRY, (
+            (key, info["fileName"], info["hash"], info["size"], info["ctime"], info["mtime"], info["atime"],
+             _int64(info.get("ino", 0)), _int64(info.get("dev", 0)), info.get("fp", ""),
+             info.get("verified", 0.0))
+            for info in data["files"].values()
+        ))
+        _index_commit_pending()
+    except sqlite3.Error as e:
+        error(f"cannot save info for dir {dirName}: {e}")
+        return False
+    return True
+
+
+def _parse_time(text: str) -> float:
+    try:
+        return float(text)
+    except ValueError:
+        return datetime.fromisoformat(text).timestamp()
+
+
+def query(directory: str) -> int:
+    if not _open_store(directory, create=False):
+        return 1
+    clauses: list[str] = []
+    params: list[Any] = []
+    if options.query_hash:
+        clauses.append("hash = ?")
+        params.append(options.query_hash.lower())
+    if options.query_size is not None:
+        clauses.append("size = ?")
+        params.append(options.query_size)
+    if options.query_mtime_after:
+        clauses.append("mtime >= ?")
+        params.append(_parse_time(options.query_mtime_after))
+    if options.query_mtime_before:
+        clauses.append("mtime < ?")
+        params.append(_parse_time(options.query_mtime_before))
+    if options.query_glob:
+        clauses.append(f"{_SQL_PATH} GLOB ?")
+        params.append(options.query_glob)
+    sql: str = f"SELECT hash, size, mtime, {_SQL_PATH} FROM entries"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY dir, name"
+    count: int = 0
+    try:
+        for hsh, size, mtime, path in _index.execute(sql, params):
+            print(f"{hsh}  {size}  {datetime.fromtimestamp(mtime).isoformat(timespec='seconds')}  {os.path.join(directory, path)}")
+            count += 1
+    finally:
+        _close_store()
+    if not options.quiet:
+        print(f"Matches: {count}")
+    return 0 if count else 1
+
+
+_DUPES_BLOCK: int = 16384
+_DUPES_CHUNK: int = 4096
+_DUPES_SCHEMA: str = """
+CREATE TABLE files (path TEXT NOT NULL, size INTEGER NOT NULL, hash TEXT, partial TEXT, ino INTEGER, dev INTEGER);
+CREATE UNIQUE INDEX files_inode ON files (dev, ino) WHERE ino != 0;
+CREATE TEMP TABLE todo (id INTEGER PRIMARY KEY);
+"""
+_SQL_DUPES_INSERT: str = "INSERT OR IGNORE INTO files (path, size, hash, ino, dev) VALUES (?, ?, ?, ?, ?)"
+_SQL_DUPES_PARTIAL_TODO: str = ("INSERT INTO todo SELECT rowid FROM files WHERE size IN "
+                                "(SELECT size FROM files WHERE size > 0 GROUP BY size "
+                                "HAVING count(*) > 1 AND count(hash) < count(*))")
+_SQL_DUPES_FULL_TODO: str = ("INSERT INTO todo SELECT rowid FROM files WHERE hash IS NULL AND (size, partial) IN "
+                             "(SELECT size, partial FROM files WHERE partial IS NOT NULL GROUP BY size, partial "
+                             "HAVING count(*) > 1)")
+_SQL_DUPES_NEXT: str = ("SELECT todo.id, files.path, files.size FROM todo JOIN files ON files.rowid = todo.id "
+                        "WHERE todo.id > ? ORDER BY todo.id LIMIT ?")
+_SQL_DUPES_GROUPS: str = ("SELECT hash, size, path FROM files WHERE (size, hash) IN "
+                          "(SELECT size, hash FROM files WHERE hash IS NOT NULL AND size > 0 GROUP BY size, hash "
+                          "HAVING count(*) > 1) ORDER BY size DESC, hash, path")
+_dupes_db: sqlite3.Connection | None = None
+
+
+def _partial_digest(fileName: str, algorithm: str, size: int) -> tuple[str, str]:
+    if size <= 2 * _DUPES_BLOCK:
+        digest: str = _compute_hash(fileName, algorithm, size)
+        return digest, digest
+    h: Any = _ALGORITHMS[algorithm]()
+    _throttle_file()
+    _throttle_read(2 * _DUPES_BLOCK)
+    with open(fileName, "rb", buffering=0) as f:
+        h.update(f.read(_DUPES_BLOCK))
+        f.seek(-_DUPES_BLOCK, os.SEEK_END)
+        h.update(f.read(_DUPES_BLOCK))
+    return h.hexdigest(), ""
+
+
+def dupesBegin(dirName: str) -> dict[str, Any]:
+    if not options.quiet and not options.verbose:
         _progress(dirName)
+    data: dict[str, Any] = filecheckNew(dirName)
+    saved: dict[str, Any] | bool = filecheckLoad(dirName)
+    usable: bool = saved is not False and saved.get("algorithm", options.algorithm) == options.algorithm
+    data["_saved"] = saved["files"] if usable else {}
+    data["_rows"] = []
+    return data
+
+
+def dupesFile(fileName: str, data: dict[str, Any]) -> bool | None:
+    _progress_state.scanned += 1
+    if shouldIgnore(fileName):
+        return None
+    currentValue: dict[str, Any] | None = makeInfo(fileName)
+    if currentValue is None or currentValue["hash"] == "<DIR>":
+        return None
+    savedValue: dict[str, Any] | None = data["_saved"].get(currentValue["fileName"])
+    digest: str | None = None
+    if (savedValue is not None and savedValue["hash"] not in _NO_DIGEST
+            and not _metadata_changed(currentValue, savedValue)):
+        digest = savedValue["hash"]
+    data["_rows"].append((str(fileName), currentValue["size"], digest,
+                          _int64(currentValue["ino"]), _int64(currentValue["dev"])))
+    return None
+
+
+def dupesEnd(dirName: str, data: dict[str, Any]) -> None:
+    _dupes_db.executemany(_SQL_DUPES_INSERT, data["_rows"])
+
+
+def _dupes_hash_todo(todo_sql: str, job: Callable[..., Any], store: Callable[[Any], tuple[Any, ...]],
+                     update_sql: str) -> None:
+    db: sqlite3.Connection = _dupes_db
+    db.execute("DELETE FROM todo")
+    db.execute(todo_sql)
+    last: int = 0
+    while True:
+        rows: list[tuple[int, str, int]] = db.execute(_SQL_DUPES_NEXT, (last, _DUPES_CHUNK)).fetchall()
+        if not rows:
+            break
+        last = rows[-1][0]
+        executor: Executor = _get_executor()
+        _progress_queued(sum(size for _, _, size in rows))
+        futures: list[tuple[int, str, int, Any]] = [(rowid, path, size, executor.submit(job, path, options.algorithm, size))
+                                                    for rowid, path, size in rows]
+        updates: list[tuple[Any, ...]] = []
+        failed: list[tuple[int]] = []
+        for rowid, path, size, future in futures:
+            try:
+                result: Any = future.result()
+            except OSError as e:
+                error(f"cannot read {path}: {e}")
+                result = None
+            _progress_hashed(size)
+            if not options.quiet and not options.verbose:
+                _progress(path)
+            if result is None or "error" in (result if isinstance(result, tuple) else (result,)):
+                failed.append((rowid,))
+            else:
+                updates.append(store(result) + (rowid,))
+        db.executemany(update_sql, updates)
+        db.executemany("DELETE FROM files WHERE rowid = ?", failed)
+
+
+def dupes(directory: str) -> int:
+    global _dupes_db
+    if not _open_store(directory, create=False):
+        return 1
+    _dupes_db = sqlite3.connect("")
+    groups: int = 0
+    files: int = 0
+    wasted: int = 0
+    try:
+        _dupes_db.executescript(_DUPES_SCHEMA)
+        walkTree(directory, dupesFile, options.recursive, options.follow_links, {}, dupesBegin, dupesEnd, bfs=True)
+        _dupes_db.execute("CREATE INDEX files_size ON files (size, partial)")
+        _dupes_hash_todo(_SQL_DUPES_PARTIAL_TODO, _partial_digest, lambda r: (r[0], r[1] or None),
+                         "UPDATE files SET partial = ?, hash = coalesce(hash, ?) WHERE rowid = ?")
+        _dupes_hash_todo(_SQL_DUPES_FULL_TODO, _compute_hash, lambda r: (r,),
+                         "UPDATE files SET hash = ? WHERE rowid = ?")
+        if not options.quiet and not options.verbose:
+            _clear_progress()
+        current: tuple[str, int] | None = None
+        for hsh, size, path in _dupes_db.execute(_SQL_DUPES_GROUPS):
+            if (hsh, size) != current:
+                if current is not None:
+                    print()
+                current = (hsh, size)
+                groups += 1
+            else:
+                wasted += size
+            files += 1
+            print(f"{hsh}  {size}  {path}")
+    finally:
+        _dupes_db.close()
+        _dupes_db = None
+        _shutdown_executor()
+        _close_store()
+        _stop_progress()
+    if not options.quiet:
+        if groups:
+            print()
+        print(f"Groups: {groups}  Files: {files}  Reclaimable: {_format_bytes(wasted)}")
+    return 0 if groups else 1
+
+
+_SCRUB_BATCH: int = 100_000
+_SQL_SCRUB_CANDIDATES: str = ("SELECT e.dir, e.name, e.hash, e.size, e.ctime, e.mtime, e.atime, e.verified, d.algorithm "
+                              "FROM entries e JOIN dirs d ON d.dir = e.dir "
+                              "WHERE e.hash NOT IN ('', '<DIR>', 'error') AND e.verified < ? "
+                              "ORDER BY e.verified, e.dir, e.name LIMIT ?")
+_SQL_SCRUB_VERIFIED: str = "UPDATE entries SET verified = ? WHERE dir = ? AND name = ?"
+_UNITS: dict[str, int] = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+_DURATIONS: dict[str, int] = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+_scrub_heap: list[tuple[float, int, dict[str, Any]]] = []
+_scrub_order: Iterator[int] = itertools.count()
+_scrub_start: float = 0.0
+
+
+def _parse_bytes(text: str) -> int:
+    text = text.strip().upper()
+    if text.endswith("B"):
+        text = text[:-1]
+    if text.endswith("I"):
+        text = text[:-1]
+    try:
+        if text and text[-1] in _UNITS:
+            return int(float(text[:-1]) * _UNITS[text[-1]])
+        return int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size {text!r}, e.g. 500G or 2T")
+
+
+def _parse_duration(text: str) -> float:
+    text = text.strip().lower()
+    try:
+        if text and text[-1] in _DURATIONS:
+            return float(text[:-1]) * _DURATIONS[text[-1]]
+        return float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid duration {text!r}, e.g. 90m or 6h")
+
+
+def _scrub_push(info: dict[str, Any]) -> None:
+    item: tuple[float, int, dict[str, Any]] = (-info["verified"], -next(_scrub_order), info)
+    if len(_scrub_heap) < _SCRUB_BATCH:
+        heapq.heappush(_scrub_heap, item)
+    elif item > _scrub_heap[0]:
+        heapq.heapreplace(_scrub_heap, item)
+
+
+def scrubBegin(dirName: str) -> dict[str, Any]:
+    if not options.quiet and not options.verbose:
+        _progress(dirName)
+    res: dict[str, Any] = {}
+    entries: Iterator[dict[str, Any]] | bool = _saved_entries(dirName, res)
+    if entries is False:
+        error(f"invalid or corrupt manifest in {dirName}")
+        return {}
+    for info in entries:
+        if info["hash"] not in _NO_DIGEST and info.get("verified", 0.0) < _scrub_start:
+            info["algorithm"] = res["algorithm"]
+            _scrub_push(info)
+    return {}
+
+
+def scrubFile(fileName: str, data: dict[str, Any]) -> bool | None:
+    return None
+
+
+def _scrub_candidates(directory: str) -> list[dict[str, Any]]:
+    if _index is not None:
+        rows = _index.execute(_SQL_SCRUB_CANDIDATES, (_scrub_start, _SCRUB_BATCH)).fetchall()
+        return [{"dirName": os.path.join(_index_root, *rel.split("/")) if rel else _index_root, "fileName": name,
+                 "hash": hsh, "size": size, "ctime": ctime, "mtime": mtime, "atime": atime, "verified": verified,
+                 "algorithm": algorithm}
+                for rel, name, hsh, size, ctime, mtime, atime, verified, algorithm in rows]
+    _scrub_heap.clear()
+    walkTree(directory, scrubFile, options.recursive, options.follow_links, {}, scrubBegin, False, bfs=True)
+    candidates: list[dict[str, Any]] = [info for _, _, info in sorted(_scrub_heap, reverse=True)]
+    _scrub_heap.clear()
+    return candidates
+
+
+def _rewrite_manifest(saved: dict[str, Any], dirName: str) -> bool:
+    algorithm: str = options.algorithm
+    manifest_format: str | None = options.manifest_format
+    options.algorithm = saved["algorithm"]
+    options.manifest_format = saved.get("format", "text")
+    try:
+        return filecheckSave(saved, dirName)
+    finally:
+        options.algorithm = algorithm
+        options.manifest_format = manifest_format
+
+
+def _scrub_persist(verified: dict[str, dict[str, float]]) -> None:
+    for dirName, stamps in verified.items():
+        if _index is not None:
+            key: str = _index_dir(dirName)
+            _index.executemany(_SQL_SCRUB_VERIFIED, ((stamp, key, name) for name, stamp in stamps.items()))
+            continue
+        saved: dict[str, Any] | bool = filecheckLoad(dirName)
+        if saved is False:
+            error(f"cannot record verification for {dirName}: invalid or corrupt manifest")
+            continue
+        for name, stamp in stamps.items():
+            if name in saved["files"]:
+                saved["files"][name]["verified"] = stamp
+        _rewrite_manifest(saved, dirName)
+    if _index is not None:
+        _index.commit()
+    verified.clear()
+
+
+def _scrub_result(info: dict[str, Any], future: Any, verified: dict[str, dict[str, float]], skipped: set[str]) -> None:
+    try:
+        digest: str = future.result()
+    except Exception:
+        digest = "error"
+    _progress_hashed(info["size"])
+    progress: str = os.path.join(info["dirName"], info["fileName"])
+    if digest == info["hash"]:
+        verified.setdefault(info["dirName"], {})[info["fileName"]] = time.time()
+        _record_status("same file", info["fileName"], info["dirName"], progress, info, info)
+    else:
+        skipped.add(progress)
+        _record_status(f"{info['algorithm'].upper()} mismatch", info["fileName"], info["dirName"], progress,
+                       dict(info, hash=digest), info)
+
+
+def scrub(directory: str) -> int:
+    global _scrub_start
+    _reset_counters()
+    _open_output()
+    print(f"SCRUB: {directory}", file=_text_out())
+    if not _open_store(directory, create=False):
+        _close_output()
+        return 1
+    _scrub_start = time.time()
+    deadline: float = time.monotonic() + options.budget_time if options.budget_time > 0 else float("inf")
+    budget: float = options.budget_bytes if options.budget_bytes > 0 else float("inf")
+    scrubbed: int = 0
+    files: int = 0
+    verified: dict[str, dict[str, float]] = {}
+    skipped: set[str] = set()
+    window: deque = deque()
+    try:
+        exhausted: bool = False
+        while not exhausted:
+            candidates: list[dict[str, Any]] = _scrub_candidates(directory)
+            exhausted = len(candidates) < _SCRUB_BATCH
+            started: int = files
+            for info in candidates:
+                if scrubbed >= budget or time.monotonic() >= deadline:
+                    exhausted = True
+                    break
+                path: str = os.path.join(info["dirName"], info["fileName"])
+                if path in skipped:
+                    continue
+                try:
+                    currentValue: dict[str, Any] = _make_info(info["dirName"], info["fileName"], os.stat(path), path, False)
+                except FileNotFoundError:
+                    skipped.add(path)
+                    _record_status("deleted file", info["fileName"], info["dirName"], path, None, info)
+                    continue
+                except OSError as e:
+                    skipped.add(path)
+                    error(f"cannot stat {path}: {e}")
+                    continue
+                if _metadata_changed(currentValue, info):
+                    skipped.add(path)
+                    _record_status("changed, not verified", info["fileName"], info["dirName"], path, currentValue, info)
+                    continue
+                _progress_queued(info["size"])
+                window.append((info, _get_executor().submit(_compute_hash, path, info["algorithm"], info["size"])))
+                scrubbed += info["size"]
+                files += 1
+                while window and (len(window) > _stream_window() or window[0][1].done()):
+                    _scrub_result(*window.popleft(), verified, skipped)
+            while window:
+                _scrub_result(*window.popleft(), verified, skipped)
+            _scrub_persist(verified)
+            exhausted = exhausted or files == started
+    finally:
+        for _, future in window:
+            future.cancel()
+        _shutdown_executor()
+        _scrub_persist(verified)
+        _close_store()
+        _stop_progress()
+    if not options.quiet:
+        _clear_progress()
+        print(f"Scrubbed: {files} files, {_format_bytes(scrubbed)} in {time.time() - _scrub_start:.1f}s", file=_text_out())
+    _print_summary()
+    _close_output()
+    return check_exit_code
+
+
+_JOURNAL_MAGIC: str = "FILECHECK-JOURNAL"
+_JOURNAL_FLUSH_SECONDS: float = 1.0
+
+
+class _Journal:
+    def __init__(self, root: str, resume: bool) -> None:
+        self.root: str = root
+        self.path: str = os.path.join(root, filecheckJournalName)
+        self.done: set[str] = set()
+        self.hashes: dict[str, dict[str, tuple[int, float, str, str]]] = {}
+        self.pending_dirs: list[str] = []
+        self.flushed: float = time.monotonic()
+        valid: bool = resume and self._load()
+        self.file: io.TextIOWrapper = open(self.path, "a" if valid else "w", encoding="utf-8")
+        if not valid:
+            self._append([_JOURNAL_MAGIC, version])
+            self.flush()
+
+    def _load(self) -> bool:
+        try:
+            with open(self.path, "rb") as f:
+                raw: bytes = f.read()
+        except FileNotFoundError:
+            return False
+        lines: list[bytes] = raw.split(b"\n")
+        try:
+            if json.loads(lines[0]) != [_JOURNAL_MAGIC, version]:
+                return False
+        except ValueError:
+            return False
+        complete: int = len(raw) - len(lines[-1])
+        for line in lines[1:-1]:
+            try:
+                record: list[Any] = json.loads(line)
+            except ValueError:
+                continue
+            if record[0] == "H":
+                self.hashes.setdefault(record[1], {})[record[2]] = (record[3], record[4], record[5], record[6])
+            elif record[0] == "D":
+                self.done.add(record[1])
+                self.hashes.pop(record[1], None)
+        if complete != len(raw):
+            os.truncate(self.path, complete)
+        return True
+
+    def _key(self, dirName: str) -> str:
+        return os.path.relpath(dirName, self.root)
+
+    def _append(self, record: list[Any]) -> None:
+        self.file.write(json.dumps(record) + "\n")
+
+    def flush(self) -> None:
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.flushed = time.monotonic()
+
+    def _flush_due(self) -> None:
+        if time.monotonic() - self.flushed >= _JOURNAL_FLUSH_SECONDS:
+            self.flush()
+
+    def is_done(self, dirName: str) -> bool:
+        return self._key(dirName) in self.done
+
+    def reuse(self, info: dict[str, Any]) -> bool:
+        entry: tuple[int, float, str, str] | None = self.hashes.get(self._key(info["dirName"]), {}).get(info["fileName"])
+        if entry is None or entry[:3] != (info["size"], info["mtime"], options.algorithm):
+            return False
+        info["hash"] = entry[3]
+        return True
+
+    def hashed(self, info: dict[str, Any]) -> None:
+        if info["hash"] in ("", "error", "<DIR>"):
+            return
+        self._append(["H", self._key(info["dirName"]), info["fileName"], info["size"], info["mtime"],
+                      options.algorithm, info["hash"]])
+        self._flush_due()
+
+    def finished(self, dirName: str) -> None:
+        if _index is not None and _index_pending:
+            self.pending_dirs.append(dirName)
+            return
+        self._append(["D", self._key(dirName)])
+        self._flush_due()
+
+    def committed(self) -> None:
+        for dirName in self.pending_dirs:
+            self._append(["D", self._key(dirName)])
+        if self.pending_dirs:
+            self.pending_dirs.clear()
+            self._flush_due()
+
+    def close(self, completed: bool) -> None:
+        self.file.close()
+        if completed:
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+
+
+_journal: _Journal | None = None
+
+
+def _open_journal(root: str) -> None:
+    global _journal
+    try:
+        _journal = _Journal(root, options.resume)
+    except OSError as e:
+        error(f"cannot open {filecheckJournalName} in {root}: {e}")
+        return
+    if _journal.done and not options.quiet:
+        print(f"RESUME: skipping {len(_journal.done)} finished directories")
+
+
+def _close_journal(completed: bool) -> None:
+    global _journal
+    if _journal is not None:
+        _journal.close(completed)
+    _journal = None
+
+
+def _journal_reuse(files: dict[str, dict[str, Any]]) -> None:
+    if _journal is None:
+        return
+    for info in files.values():
+        if info["hash"] == "":
+            _journal.reuse(info)
+
+
+def _resumed_dir(dirName: str) -> dict[str, Any] | None:
+    if _journal is None or not _journal.is_done(dirName):
+        return None
+    data: dict[str, Any] = filecheckNew(dirName)
+    data["_done"] = True
+    return data
+
+
+def analyzeBegin(dirName: str) -> dict[str, Any]:
+    resumed: dict[str, Any] | None = _resumed_dir(dirName)
+    return resumed if resumed is not None else checkBegin(dirName)
+
+
+def checkBegin(dirName: str) -> dict[str, Any]:
     data: dict[str, Any] = generateBegin(dirName)
     saved: dict[str, Any] | bool = filecheckLoad(dirName)
+    data["_manifest"] = saved
     data["_saved_keys"] = set(saved["files"].keys()) if saved is not False else set()
     return data
 
 
+def _take_manifest(dirName: str, data: dict[str, Any]) -> dict[str, Any] | bool:
+    if "_manifest" in data:
+        return data.pop("_manifest")
+    return filecheckLoad(dirName)
+
+
 def checkFile(fileName: str, data: dict[str, Any]) -> bool | None:
+    if "_done" in data:
+        return None
     generateFileWithoutHash(fileName, data)
     try:
-        if options._skip_new_dirs and Path(fileName).is_dir():
-            key: str = Path(fileName).name
+        if isinstance(fileName, _WalkEntry):
+            is_dir: bool = stat.S_ISDIR(fileName.stat.st_mode)
+            key: str = fileName.name
+        else:
+            is_dir = options._skip_new_dirs and Path(fileName).is_dir()
+            key = Path(fileName).name
+        if options._skip_new_dirs and is_dir:
             if key not in data.get("_saved_keys", set()):
                 return False
     except OSError:
@@ -329,78 +2085,236 @@ def _metadata_changed(currentValue: dict[str, Any], savedValue: dict[str, Any])
     return False
 
 
-def compareData(current: dict[str, Any], saved: dict[str, Any], dirName: str) -> list[dict[str, Any]]:
-    global check_exit_code, check_added, check_deleted, check_modified, check_same
-    showSameFile: bool = options.show_same_files
-    total: int = len(current["files"])
-    changes: list[dict[str, Any]] = []
-    for idx, (key, currentValue) in enumerate(current["files"].items()):
+def _needs_hash(currentValue: dict[str, Any], savedValue: dict[str, Any] | None) -> bool:
+    return (not options.ignore_hash and savedValue is not None and currentValue["hash"] == ""
+            and savedValue["hash"] not in ("", "<DIR>")
+            and not _metadata_changed(currentValue, savedValue))
+
+
+def _compare_entry(currentValue: dict[str, Any], savedValue: dict[str, Any] | None, algorithm: str = "md5") -> str:
+    if savedValue is None:
+        return "new item"
+    if currentValue["hash"] == "<DIR>" or savedValue["hash"] == "<DIR>":
+        return "directory mismatch" if currentValue["hash"] != savedValue["hash"] else "same file"
+    if not options.ignore_size and savedValue["size"] != currentValue["size"]:
+        return "size mismatch"
+    if not options.ignore_mtime and int(savedValue["mtime"]) != int(currentValue["mtime"]):
+        return "mtime mismatch"
+    if options.check_atime and int(savedValue["atime"]) != int(currentValue["atime"]):
+        return "atime mismatch"
+    if options.check_ctime and int(savedValue["ctime"]) != int(currentValue["ctime"]):
+        return "ctime mismatch"
+    if not options.ignore_hash and currentValue.get("fp") and currentValue["hash"] == "":
+        return "sampled" if currentValue["fp"] == savedValue.get("fp") else "sample mismatch"
+    if not options.ignore_hash and savedValue["hash"] != currentValue["hash"]:
+        return f"{algorithm.upper()} mismatch"
+    return "same file"
+
+
+def _deleted_ignored(dirName: str, key: str, savedValue: dict[str, Any]) -> bool:
+    return shouldIgnore(key) or _rule_ignored(dirName, key, savedValue["hash"] == "<DIR>")
+
+
+def _record_status(status: str, key: str, dirName: str, progress: str,
+                   currentValue: dict[str, Any] | None = None, savedValue: dict[str, Any] | None = None,
+                   source: str | None = None) -> None:
+    global check_exit_code, check_added, check_deleted, check_modified, check_same, check_moved, check_sampled
+    if options.show_same_files or status not in ("same file", "sampled"):
+        if not options.quiet and not options.verbose:
+            _clear_progress()
+        _emit_status(status, os.path.join(dirName, key), currentValue, savedValue, source)
         if not options.quiet and not options.verbose:
-            _progress(f"{dirName} [{idx+1}/{total}] {key}")
-        status: str = "pending"
-        if key not in saved["files"]:
-            status = "new item"
+            _progress(progress)
+    if status == "same file":
+        check_same += 1
+    elif status == "sampled":
+        check_sampled += 1
+    elif status == "new item":
+        check_added += 1
+        check_exit_code += 1
+    elif status == "deleted file":
+        check_deleted += 1
+        check_exit_code += 1
+    elif status == "moved":
+        check_moved += 1
+        check_exit_code += 1
+    else:
+        check_modified += 1
+        check_exit_code += 1
+
+
+_NO_DIGEST: tuple[str, ...] = ("", "<DIR>", "error")
+_SQL_SUBTREE: str = ("SELECT e.dir, e.name, e.hash, e.size, e.ctime, e.mtime, e.atime, e.ino, e.dev, d.algorithm "
+                     "FROM entries e JOIN dirs d ON d.dir = e.dir WHERE e.dir = ? OR substr(e.dir, 1, ?) = ?")
+
+
+def _set_identity(target: dict[str, Any], source: dict[str, Any]) -> None:
+    target["ino"] = source.get("ino", 0)
+    target["dev"] = source.get("dev", 0)
+
+
+class _MoveTracker:
+    def __init__(self) -> None:
+        self.gone: list[list[Any]] = []
+        self.by_inode: dict[tuple[int, int], list[list[Any]]] = {}
+        self.by_size: dict[int, list[list[Any]]] = {}
+        self.new: list[tuple[str, str, dict[str, Any]]] = []
+        self.pending: list[tuple[str, dict[str, Any], list[str]]] = []
+
+    def deleted(self, dirName: str, key: str, savedValue: dict[str, Any], algorithm: str,
+                subtree: bool = False) -> None:
+        entry: list[Any] = [dirName, key, savedValue, algorithm, False]
+        self.gone.append(entry)
+        if savedValue.get("ino"):
+            self.by_inode.setdefault((savedValue.get("dev", 0), savedValue["ino"]), []).append(entry)
+        if savedValue["hash"] not in _NO_DIGEST:
+            self.by_size.setdefault(savedValue["size"], []).append(entry)
+        elif subtree and savedValue["hash"] == "<DIR>" and _index is not None:
+            self._add_subtree(os.path.join(dirName, key))
+
+    def _add_subtree(self, dirName: str) -> None:
+        key: str = _index_dir(dirName)
+        rows = _index.execute(_SQL_SUBTREE, (key, len(key) + 1, key + "/")).fetchall()
+        for row in rows:
+            rel, name, hsh, size, ctime, mtime, atime, ino, dev, algorithm = row
+            subdir: str = os.path.join(_index_root, *rel.split("/"))
+            self.deleted(subdir, name, {"dirName": subdir, "fileName": name, "hash": hsh, "size": size,
+                                        "ctime": ctime, "mtime": mtime, "atime": atime,
+                                        "ino": ino & _U64, "dev": dev & _U64}, algorithm)
+
+    def take_inode(self, currentValue: dict[str, Any]) -> list[Any] | None:
+        if not currentValue.get("ino"):
+            return None
+        is_dir: bool = currentValue["hash"] == "<DIR>"
+        for entry in self.by_inode.get((currentValue.get("dev", 0), currentValue["ino"]), ()):
+            savedValue: dict[str, Any] = entry[2]
+            if entry[4] or (savedValue["hash"] == "<DIR>") != is_dir:
+                continue
+            if is_dir or (savedValue["size"] == currentValue["size"]
+                          and int(savedValue["mtime"]) == int(currentValue["mtime"])):
+                entry[4] = True
+                return entry
+        return None
+
+    def take_digest(self, size: int, digests: dict[str, str]) -> list[Any] | None:
+        for entry in self.by_size.get(size, ()):
+            if not entry[4] and digests.get(entry[3]) == entry[2]["hash"]:
+                entry[4] = True
+                return entry
+        return None
+
+    def candidate_algorithms(self, size: int) -> set[str]:
+        return {entry[3] for entry in self.by_size.get(size, ()) if not entry[4]}
+
+    def carry(self, currentValue: dict[str, Any]) -> bool:
+        entry: list[Any] | None = self.take_inode(currentValue)
+        if entry is None or entry[3] != options.algorithm or entry[2]["hash"] in _NO_DIGEST:
+            return False
+        currentValue["hash"] = entry[2]["hash"]
+        currentValue["fp"] = entry[2].get("fp", "")
+        currentValue["verified"] = entry[2].get("verified", 0.0)
+        return True
+
+
+_moves: _MoveTracker | None = None
+_MOVES_PENDING_MAX: int = 10_000
+
+
+def _defer_move(status: str, dirName: str, key: str, currentValue: dict[str, Any] | None,
+                savedValue: dict[str, Any] | None, algorithm: str) -> bool:
+    if _moves is None:
+        return False
+    if status == "new item":
+        _moves.new.append((dirName, key, currentValue))
+    elif status == "deleted file":
+        _moves.deleted(dirName, key, savedValue, algorithm)
+    else:
+        return False
+    return True
+
+
+def _report_moves() -> None:
+    matches: dict[int, list[Any]] = {}
+    jobs: dict[str, tuple[str, int | None]] = {}
+    algorithms: set[str] = set()
+    for idx, (dirName, key, currentValue) in enumerate(_moves.new):
+        entry: list[Any] | None = _moves.take_inode(currentValue)
+        if entry is not None:
+            matches[idx] = entry
+        elif currentValue["hash"] != "<DIR>" and not options.ignore_hash:
+            candidates: set[str] = _moves.candidate_algorithms(currentValue["size"])
+            if candidates:
+                jobs[str(idx)] = (os.path.join(dirName, key), currentValue["size"])
+                algorithms |= candidates
+    if jobs:
+        digests: dict[str, dict[str, str]] = _compute_hashes_batch(jobs, tuple(sorted(algorithms)))
+        for idx_text in jobs:
+            idx = int(idx_text)
+            entry = _moves.take_digest(_moves.new[idx][2]["size"], digests.get(idx_text, {}))
+            if entry is not None:
+                matches[idx] = entry
+    for idx, (dirName, key, currentValue) in enumerate(_moves.new):
+        entry = matches.get(idx)
+        if entry is None:
+            _record_status("new item", key, dirName, f"{dirName} [new] {key}", currentValue, None)
         else:
-            savedValue: dict[str, Any] = saved["files"][key]
-            if currentValue["hash"] == "<DIR>" or savedValue["hash"] == "<DIR>":
-                if currentValue["hash"] != savedValue["hash"]:
-                    status = "directory mismatch"
-                else:
-                    status = "same file"
-            elif _metadata_changed(currentValue, savedValue):
-                if not options.ignore_size and savedValue["size"] != currentValue["size"]:
-                    status = "size mismatch"
-                elif not options.ignore_mtime and int(savedValue["mtime"]) != int(currentValue["mtime"]):
-                    status = "mtime mismatch"
-                elif options.check_atime and int(savedValue["atime"]) != int(currentValue["atime"]):
-                    status = "atime mismatch"
-                elif options.check_ctime and int(savedValue["ctime"]) != int(currentValue["ctime"]):
-                    status = "ctime mismatch"
-            else:
-                if not options.ignore_hash and currentValue["hash"] == "" and savedValue["hash"] != "":
-                    saved_algo: str = saved.get("algorithm", "md5")
-                    currentValue["hash"] = _compute_hash(
-                        os.path.join(currentValue["dirName"], currentValue["fileName"]),
-                        saved_algo
-                    )
-
-                if not options.ignore_hash and savedValue["hash"] != currentValue["hash"]:
-                    status = "MD5 mismatch"
-                else:
-                    status = "same file"
-            del saved["files"][key]
-        changes.append({"status": status, "key": key, "dirName": dirName})
-        if showSameFile or status != "same file":
-            if not options.quiet and not options.verbose:
-                _clear_progress()
-            print(f"{status}: {os.path.join(dirName, key)}")
-            if not options.quiet and not options.verbose:
-                _progress(f"{dirName} [{idx+1}/{total}] {key}")
-        if status in ("same file", "pending"):
-            check_same += 1
-        elif status in ("new item"):
-            check_added += 1
-            check_exit_code += 1
+            _record_status("moved", key, dirName, f"{dirName} [moved] {key}", currentValue, entry[2],
+                           os.path.join(entry[0], entry[1]))
+    for dirName, key, savedValue, _, taken in _moves.gone:
+        if not taken:
+            _record_status("deleted file", key, dirName, f"{dirName} [deleted] {key}", None, savedValue)
+
+
+def _retry_moves() -> None:
+    waiting: list[tuple[str, dict[str, Any], list[str]]] = []
+    for dirName, new_data, pending in _moves.pending:
+        pending = [key for key in pending if not _moves.carry(new_data["files"][key])]
+        if pending:
+            waiting.append((dirName, new_data, pending))
         else:
-            check_modified += 1
-            check_exit_code += 1
+            _analyze_save(dirName, new_data)
+    _moves.pending = waiting
+
+
+def _finish_moves(keep: int = 0) -> None:
+    waiting: int = sum(len(pending) for _, _, pending in _moves.pending)
+    while _moves.pending and waiting > keep:
+        dirName, new_data, pending = _moves.pending.pop(0)
+        for key in pending:
+            _moves.carry(new_data["files"][key])
+        _analyze_save(dirName, new_data)
+        waiting -= len(pending)
+
+
+def compareData(current: dict[str, Any], saved: dict[str, Any], dirName: str) -> None:
+    total: int = len(current["files"])
+    saved_algo: str = saved.get("algorithm", "md5")
+    if not options.ignore_hash:
+        pending: dict[str, dict[str, Any]] = {key: currentValue for key, currentValue in current["files"].items()
+                                              if _needs_hash(currentValue, saved["files"].get(key))}
+        if options.quick:
+            sampled: dict[str, dict[str, Any]] = {key: pending.pop(key) for key in list(pending)
+                                                  if saved["files"][key].get("fp")}
+            _compute_fingerprint_batch(sampled, False)
+        _compute_hash_batch(pending, saved_algo)
+    for idx, (key, currentValue) in enumerate(current["files"].items()):
+        progress: str = f"{dirName} [{idx+1}/{total}] {key}"
+        if not options.quiet and not options.verbose:
+            _progress(progress)
+        savedValue: dict[str, Any] | None = saved["files"].pop(key, None)
+        status: str = _compare_entry(currentValue, savedValue, saved_algo)
+        if not _defer_move(status, dirName, key, currentValue, savedValue, saved_algo):
+            _record_status(status, key, dirName, progress, currentValue, savedValue)
     for key, savedValue in saved["files"].items():
-        if not shouldIgnore(key):
-            if not options.quiet and not options.verbose:
-                _clear_progress()
-            print(f"deleted file: {os.path.join(dirName, key)}")
-            if not options.quiet and not options.verbose:
-                _progress(f"{dirName} [deleted] {key}")
-            changes.append({"status": "deleted file", "key": key, "dirName": dirName})
-            check_exit_code += 1
-            check_deleted += 1
-    return changes
+        if not _deleted_ignored(dirName, key, savedValue):
+            if not _defer_move("deleted file", dirName, key, None, savedValue, saved_algo):
+                _record_status("deleted file", key, dirName, f"{dirName} [deleted] {key}", None, savedValue)
 
 
 def checkEnd(dirName: str, data: dict[str, Any]) -> None:
     if not options.quiet and not options.verbose:
         _clear_progress()
-    savedData: dict[str, Any] | bool = filecheckLoad(dirName)
+    savedData: dict[str, Any] | bool = _take_manifest(dirName, data)
     if savedData is False:
         error(f"invalid or corrupt manifest in {dirName}")
         return
@@ -410,16 +2324,22 @@ def checkEnd(dirName: str, data: dict[str, Any]) -> None:
 def analyzeEnd(dirName: str, data: dict[str, Any]) -> None:
     if not options.quiet and not options.verbose:
         _clear_progress()
-    savedData: dict[str, Any] | bool = filecheckLoad(dirName)
+    if "_done" in data:
+        return
+    savedData: dict[str, Any] | bool = _take_manifest(dirName, data)
     if savedData is False:
         savedData = filecheckNew(dirName)
     new_data: dict[str, Any] = filecheckNew(dirName)
+    saved_algo: str = savedData.get("algorithm", options.algorithm)
+    new_keys: list[str] = []
     for key, currentValue in data["files"].items():
         if currentValue["hash"] == "<DIR>":
             new_data["files"][key] = currentValue
+            savedData["files"].pop(key, None)
         elif key in savedData["files"]:
             savedValue = savedData["files"][key]
-            if not _metadata_changed(currentValue, savedValue):
+            if saved_algo == options.algorithm and not _metadata_changed(currentValue, savedValue):
+                _set_identity(savedValue, currentValue)
                 new_data["files"][key] = savedValue
             else:
                 currentValue["hash"] = ""
@@ -428,13 +2348,276 @@ def analyzeEnd(dirName: str, data: dict[str, Any]) -> None:
         else:
             currentValue["hash"] = ""
             new_data["files"][key] = currentValue
+            new_keys.append(key)
+    if _moves is not None:
+        gone: int = len(_moves.gone)
+        for key, savedValue in savedData["files"].items():
+            if not _deleted_ignored(dirName, key, savedValue):
+                _moves.deleted(dirName, key, savedValue, saved_algo, subtree=True)
+        if len(_moves.gone) > gone:
+            _retry_moves()
+        pending: list[str] = [key for key in new_keys
+                              if new_data["files"][key].get("ino") and not _moves.carry(new_data["files"][key])]
+        if pending:
+            _moves.pending.append((dirName, new_data, pending))
+            _finish_moves(_MOVES_PENDING_MAX)
+            return
+    _analyze_save(dirName, new_data)
+
+
+def _analyze_save(dirName: str, new_data: dict[str, Any]) -> None:
+    _journal_reuse(new_data["files"])
     _compute_hash_batch(new_data["files"])
-    filecheckSave(new_data, dirName)
+    if options.quick:
+        _compute_fingerprint_batch({key: info for key, info in new_data["files"].items()
+                                    if info["hash"] not in _NO_DIGEST and _wants_fingerprint(info)}, True)
+    if filecheckSave(new_data, dirName) and _journal is not None:
+        _journal.finished(dirName)
+
+
+def _stream_begin(dirName: str, analyzing: bool) -> dict[str, Any]:
+    data: dict[str, Any] = generateBegin(dirName)
+    res: dict[str, Any] = {}
+    entries: Iterator[dict[str, Any]] | bool = _saved_entries(dirName, res)
+    data["_invalid"] = entries is False
+    if entries is False:
+        if not analyzing:
+            error(f"invalid or corrupt manifest in {dirName}")
+        entries = iter(())
+    data["_saved"] = entries
+    data["_next"] = next(entries, None)
+    data["_algorithm"] = res.get("algorithm", options.algorithm)
+    data["_window"] = deque()
+    data["_count"] = 0
+    data["_writer"] = _manifest_writer(dirName) if analyzing else None
+    return data
+
+
+def streamCheckBegin(dirName: str) -> dict[str, Any]:
+    return _stream_begin(dirName, False)
+
+
+def streamAnalyzeBegin(dirName: str) -> dict[str, Any]:
+    resumed: dict[str, Any] | None = _resumed_dir(dirName)
+    return resumed if resumed is not None else _stream_begin(dirName, True)
+
+
+def _stream_window() -> int:
+    return max(64, 16 * _worker_count())
+
+
+def _stream_push(data: dict[str, Any], key: str, currentValue: dict[str, Any] | None,
+                 savedValue: dict[str, Any] | None) -> None:
+    future: Any = None
+    fp_future: Any = None
+    writer: Any = data["_writer"]
+    if currentValue is None:
+        if writer is not None:
+            if _moves is not None and not _deleted_ignored(data["dirName"], key, savedValue):
+                _moves.deleted(data["dirName"], key, savedValue, data["_algorithm"], subtree=True)
+            return
+    elif writer is not None:
+        if currentValue["hash"] != "<DIR>":
+            if (savedValue is not None and data["_algorithm"] == options.algorithm
+                    and not _metadata_changed(currentValue, savedValue)):
+                _set_identity(savedValue, currentValue)
+                currentValue = savedValue
+            elif savedValue is None and _moves is not None and _moves.carry(currentValue):
+                pass
+            elif _journal is None or not _journal.reuse(currentValue):
+                future = _get_executor().submit(_compute_hash, os.path.join(data["dirName"], key),
+                                                options.algorithm, currentValue["size"])
+                _progress_queued(currentValue["size"])
+            if _wants_fingerprint(currentValue):
+                fp_future = _submit_fingerprint(data["dirName"], key, currentValue)
+    elif _needs_hash(currentValue, savedValue):
+        if options.quick and savedValue.get("fp"):
+            fp_future = _submit_fingerprint(data["dirName"], key, currentValue)
+        else:
+            future = _get_executor().submit(_compute_hash, os.path.join(data["dirName"], key),
+                                            data["_algorithm"], currentValue["size"])
+            _progress_queued(currentValue["size"])
+    window: deque = data["_window"]
+    window.append((key, currentValue, savedValue, future, fp_future))
+    _stream_drain(data, _stream_window())
+
+
+def _submit_fingerprint(dirName: str, key: str, currentValue: dict[str, Any]) -> Any:
+    _progress_queued(_sampled_bytes(currentValue["size"]))
+    return _get_executor().submit(_sample_fingerprint, os.path.join(dirName, key), currentValue["size"])
+
+
+def _stream_ready(entry: tuple[Any, ...]) -> bool:
+    return all(future is None or future.done() for future in entry[3:])
+
+
+def _stream_drain(data: dict[str, Any], limit: int) -> None:
+    window: deque = data["_window"]
+    while window and (len(window) > limit or _stream_ready(window[0])):
+        key, currentValue, savedValue, future, fp_future = window.popleft()
+        if future is not None:
+            try:
+                currentValue["hash"] = future.result()
+            except Exception:
+                currentValue["hash"] = "error"
+            if _journal is not None and data["_writer"] is not None:
+                _journal.hashed(currentValue)
+            _progress_hashed(currentValue["size"])
+        if fp_future is not None:
+            _fingerprint_result(fp_future, currentValue, data["_writer"] is not None)
+        if data["_writer"] is not None:
+            data["_writer"].write(currentValue)
+        elif currentValue is None:
+            if (not _deleted_ignored(data["dirName"], key, savedValue)
+                    and not _defer_move("deleted file", data["dirName"], key, None, savedValue, data["_algorithm"])):
+                _record_status("deleted file", key, data["dirName"], f"{data['dirName']} [deleted] {key}",
+                               None, savedValue)
+        else:
+            data["_count"] += 1
+            progress: str = f"{data['dirName']} [{data['_count']}] {key}"
+            if not options.quiet and not options.verbose:
+                _progress(progress)
+            status: str = _compare_entry(currentValue, savedValue, data["_algorithm"])
+            if not _defer_move(status, data["dirName"], key, currentValue, savedValue, data["_algorithm"]):
+                _record_status(status, key, data["dirName"], progress, currentValue, savedValue)
+
+
+def _stream_advance(data: dict[str, Any], key: str | None) -> dict[str, Any] | None:
+    saved: Iterator[dict[str, Any]] = data["_saved"]
+    while data["_next"] is not None and (key is None or data["_next"]["fileName"] < key):
+        _stream_push(data, data["_next"]["fileName"], None, data["_next"])
+        data["_next"] = next(saved, None)
+    if data["_next"] is not None and data["_next"]["fileName"] == key:
+        savedValue: dict[str, Any] = data["_next"]
+        data["_next"] = next(saved, None)
+        return savedValue
+    return None
+
+
+def streamFile(fileName: str, data: dict[str, Any]) -> bool | None:
+    if "_done" in data:
+        return None
+    if data["_invalid"] and data["_writer"] is None:
+        return False
+    _progress_state.scanned += 1
+    if not options.quiet and not options.verbose:
+        _progress(fileName)
+    if shouldIgnore(fileName):
+        return None
+    try:
+        currentValue: dict[str, Any] | None = makeInfo(fileName)
+    except (OSError, PermissionError, FileNotFoundError) as e:
+        error(f"cannot generate info for file {fileName}: {e}")
+        return None
+    if currentValue is None:
+        return None
+    key: str = currentValue["fileName"]
+    savedValue: dict[str, Any] | None = _stream_advance(data, key)
+    if options._skip_new_dirs and savedValue is None and currentValue["hash"] == "<DIR>":
+        _stream_push(data, key, currentValue, None)
+        return False
+    _stream_push(data, key, currentValue, savedValue)
+    return None
+
+
+def streamEnd(dirName: str, data: dict[str, Any]) -> None:
+    if not options.quiet and not options.verbose:
+        _clear_progress()
+    if "_done" in data:
+        return
+    writer: Any = data["_writer"]
+    try:
+        _stream_advance(data, None)
+        _stream_drain(data, 0)
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    if writer is not None:
+        try:
+            writer.close()
+        except (OSError, PermissionError) as e:
+            error(f"cannot save info for dir {dirName}: {e}")
+            return
+        if _journal is not None:
+            _journal.finished(dirName)
+
+
+def _print_status(status: str, path: str, currentValue: dict[str, Any] | None = None,
+                  savedValue: dict[str, Any] | None = None) -> None:
+    if not options.quiet and not options.verbose:
+        _clear_progress()
+    _emit_status(status, path, currentValue, savedValue)
+
+
+def migrateEnd(dirName: str, data: dict[str, Any]) -> None:
+    global check_exit_code, check_added, check_deleted, check_modified, check_same
+    if not options.quiet and not options.verbose:
+        _clear_progress()
+    savedData: dict[str, Any] | bool = _take_manifest(dirName, data)
+    if savedData is False:
+        error(f"invalid or corrupt manifest in {dirName}")
+        return
+    old_algo: str = savedData.get("algorithm", "md5")
+    new_algo: str = options.algorithm
+    if old_algo == new_algo:
+        return
+    new_data: dict[str, Any] = filecheckNew(dirName)
+    verify: dict[str, tuple[str, int | None]] = {}
+    rehash: dict[str, tuple[str, int | None]] = {}
+    statuses: dict[str, str] = {}
+    for key, currentValue in data["files"].items():
+        path: str = os.path.join(dirName, key)
+        savedValue: dict[str, Any] | None = savedData["files"].pop(key, None)
+        if savedValue is None:
+            new_data["files"][key] = currentValue
+            if currentValue["hash"] != "<DIR>":
+                rehash[key] = (path, currentValue["size"])
+            statuses[key] = "new item"
+        elif currentValue["hash"] == "<DIR>" or savedValue["hash"] == "<DIR>":
+            new_data["files"][key] = currentValue
+            statuses[key] = "same file" if currentValue["hash"] == savedValue["hash"] else "directory mismatch"
+        elif _metadata_changed(currentValue, savedValue):
+            new_data["files"][key] = currentValue
+            rehash[key] = (path, currentValue["size"])
+            statuses[key] = "changed, not verified"
+        else:
+            new_data["files"][key] = savedValue
+            verify[key] = (path, savedValue["size"])
+    for key, result in _compute_hashes_batch(verify, (old_algo, new_algo)).items():
+        savedValue = new_data["files"][key]
+        if result[old_algo] == savedValue["hash"]:
+            statuses[key] = "migrated"
+            savedValue["hash"] = result[new_algo]
+        else:
+            statuses[key] = f"{old_algo.upper()} mismatch"
+            savedValue["hash"] = "error"
+    for key, result in _compute_hashes_batch(rehash, (new_algo,)).items():
+        new_data["files"][key]["hash"] = result[new_algo]
+    for key, status in statuses.items():
+        if status in ("migrated", "same file"):
+            check_same += 1
+        elif status == "new item":
+            check_added += 1
+            check_exit_code += 1
+        else:
+            check_modified += 1
+            check_exit_code += 1
+        if options.show_same_files or status not in ("migrated", "same file"):
+            _print_status(status, os.path.join(dirName, key), new_data["files"].get(key, data["files"][key]))
+    for key, savedValue in savedData["files"].items():
+        if not _deleted_ignored(dirName, key, savedValue):
+            _print_status("deleted file", os.path.join(dirName, key), None, savedValue)
+            check_deleted += 1
+            check_exit_code += 1
+    new_data["algorithm"] = new_algo
+    new_data["format"] = options.manifest_format or savedData.get("format", "text")
+    _rewrite_manifest(new_data, dirName)
 
 
 def generateBegin(dirName: str) -> dict[str, Any]:
     if options.verbose:
-        print(dirName)
+        print(dirName, file=_text_out())
     elif not options.quiet:
         _progress(dirName)
     return filecheckNew(dirName)
@@ -454,6 +2637,7 @@ def generateFileWithoutHash(fileName: str, data: dict[str, Any]) -> None:
 
 
 def _generateFile(fileName: str, data: dict[str, Any], hashFunc: Callable[[str], str] | bool) -> None:
+    _progress_state.scanned += 1
     if not options.quiet and not options.verbose:
         _progress(fileName)
     try:
@@ -464,63 +2648,393 @@ def _generateFile(fileName: str, data: dict[str, Any], hashFunc: Callable[[str],
 
 
 def makeInfo(fileName: str, hashFunc: Callable[[str], str] | bool = False) -> dict[str, Any] | None:
+    if isinstance(fileName, _WalkEntry):
+        return _make_info(fileName.dirName, fileName.name, fileName.stat, fileName, hashFunc)
     path: Path = Path(fileName)
-    if path.is_dir():
-        hash_val: str = "<DIR>"
-    else:
-        hash_val = hashFunc(fileName) if callable(hashFunc) else ""
-
+    is_dir: bool = path.is_dir()
     try:
         stat_info: os.stat_result = path.stat()
-        info: dict[str, Any] = {
-            'dirName': str(path.parent),
-            'fileName': path.name,
-            'hash': hash_val,
-            'size': stat_info.st_size,
-            'ctime': getattr(stat_info, 'st_birthtime', 0) or stat_info.st_ctime,
-            'mtime': stat_info.st_mtime,
-            'atime': stat_info.st_atime
-        }
-        return info
     except (OSError, PermissionError, FileNotFoundError) as e:
         error(f"Error getting file info for {fileName}: {e}")
         return None
+    return _make_info(str(path.parent), path.name, stat_info, fileName, hashFunc, is_dir)
+
+
+def _make_info(dirName: str, name: str, stat_info: os.stat_result, fileName: str,
+               hashFunc: Callable[[str], str] | bool, is_dir: bool | None = None) -> dict[str, Any]:
+    if is_dir is None:
+        is_dir = stat.S_ISDIR(stat_info.st_mode)
+    if is_dir:
+        hash_val: str = "<DIR>"
+    else:
+        hash_val = hashFunc(fileName) if callable(hashFunc) else ""
+    birthtime: float = getattr(stat_info, 'st_birthtime', 0)
+    return {
+        'dirName': dirName,
+        'fileName': name,
+        'hash': hash_val,
+        'size': stat_info.st_size,
+        'ctime': birthtime or stat_info.st_ctime,
+        'mtime': stat_info.st_mtime,
+        'atime': stat_info.st_atime,
+        'ctime_ns': getattr(stat_info, 'st_birthtime_ns' if birthtime else 'st_ctime_ns', None),
+        'mtime_ns': getattr(stat_info, 'st_mtime_ns', None),
+        'atime_ns': getattr(stat_info, 'st_atime_ns', None),
+        'ino': getattr(stat_info, 'st_ino', 0),
+        'dev': getattr(stat_info, 'st_dev', 0),
+    }
 
 
 def analyze(directory: str) -> None:
+    global _moves
     print(f"ANALYZE: {directory}")
-    walkTree(directory, checkFile, options.recursive, options.follow_links, {}, checkBegin, analyzeEnd, bfs=True)
+    _open_store(directory)
+    completed: bool = False
+    try:
+        _open_journal(directory)
+        _moves = _MoveTracker() if options.detect_moves else None
+        if options.stream:
+            walkTree(directory, streamFile, options.recursive, options.follow_links, {}, streamAnalyzeBegin, streamEnd, bfs=True)
+        else:
+            walkTree(directory, checkFile, options.recursive, options.follow_links, {}, analyzeBegin, analyzeEnd, bfs=True)
+        if _moves is not None:
+            _finish_moves()
+        completed = True
+    finally:
+        _moves = None
+        _shutdown_executor()
+        _close_store()
+        _close_journal(completed)
+        _stop_progress()
     if not options.quiet and not options.verbose:
         _clear_progress()
 
 
 def check(directory: str) -> int:
-    global check_exit_code, check_added, check_deleted, check_modified, check_same
+    global _moves
+    _reset_counters()
+    _open_output()
+    print(f"CHECK: {directory}", file=_text_out())
+    if not _open_store(directory, create=False):
+        _close_output()
+        return 1
+    old_skip: bool = options._skip_new_dirs
+    options._skip_new_dirs = True
+    _moves = _MoveTracker() if options.detect_moves else None
+    try:
+        if options.stream:
+            walkTree(directory, streamFile, options.recursive, options.follow_links, {}, streamCheckBegin, streamEnd, bfs=True)
+        else:
+            walkTree(directory, checkFile, options.recursive, options.follow_links, {}, checkBegin, checkEnd, bfs=True)
+        if _moves is not None:
+            _report_moves()
+    finally:
+        _moves = None
+        options._skip_new_dirs = old_skip
+        _shutdown_executor()
+        _close_store()
+        _stop_progress()
+    _print_summary()
+    _close_output()
+    return check_exit_code
+
+
+def _reset_counters() -> None:
+    global check_exit_code, check_added, check_deleted, check_modified, check_same, check_moved, check_sampled
     check_exit_code = 0
     check_added = 0
     check_deleted = 0
     check_modified = 0
     check_same = 0
-    print(f"CHECK: {directory}")
+    check_moved = 0
+    check_sampled = 0
+
+
+def _print_summary() -> None:
+    if not options.quiet:
+        _clear_progress()
+        total: int = check_added + check_deleted + check_modified + check_same + check_moved + check_sampled
+        if options.format == "jsonl":
+            _out().write(json.dumps({"type": "summary", "total": total, "added": check_added, "deleted": check_deleted,
+                                     "modified": check_modified, "same": check_same, "moved": check_moved,
+                                     "sampled": check_sampled,
+                                     "exit_code": check_exit_code,
+                                     "elapsed": round(time.monotonic() - _run_start, 6)}) + "\n")
+        else:
+            moved: str = f"  Moved: {check_moved}" if options.detect_moves else ""
+            sampled: str = f"  Sampled: {check_sampled}" if options.quick else ""
+            print(f"Total: {total}  Added: {check_added}  Deleted: {check_deleted}  Modified: {check_modified}  "
+                  f"Same: {check_same}{moved}{sampled}", file=_out())
+
+
+def migrate(directory: str) -> int:
+    _reset_counters()
+    _open_output()
+    print(f"MIGRATE: {directory} -> {options.algorithm}", file=_text_out())
+    if not _open_store(directory, create=False):
+        _close_output()
+        return 1
     old_skip: bool = options._skip_new_dirs
     options._skip_new_dirs = True
     try:
-        walkTree(directory, checkFile, options.recursive, options.follow_links, {}, checkBegin, checkEnd, bfs=True)
+        walkTree(directory, checkFile, options.recursive, options.follow_links, {}, checkBegin, migrateEnd, bfs=True)
     finally:
         options._skip_new_dirs = old_skip
-    if not options.quiet:
-        _clear_progress()
-        total: int = check_added + check_deleted + check_modified + check_same
-        print(f"Total: {total}  Added: {check_added}  Deleted: {check_deleted}  Modified: {check_modified}  Same: {check_same}")
+        _shutdown_executor()
+        _close_store()
+        _stop_progress()
+    _print_summary()
+    _close_output()
     return check_exit_code
 
 
+_STATS_PHASES: tuple[str, ...] = ("walkTree", "makeInfo", "filecheckLoad", "filecheckSave", "compareData",
+                                  "_compute_hash", "_compute_hashes")
+
+
+class _RunStats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.start: float = time.monotonic()
+        self.phases: dict[str, list[Any]] = {name: [0, 0.0] for name in _STATS_PHASES}
+        self.algorithms: dict[str, list[Any]] = {}
+        self.originals: dict[str, Callable[..., Any]] = {}
+        self.jobs: int = 0
+        self.inflight: int = 0
+        self.max_inflight: int = 0
+        self.busy: float = 0.0
+
+    def timed(self, name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start: float = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed: float = time.perf_counter() - start
+                with self.lock:
+                    phase: list[Any] = self.phases[name]
+                    phase[0] += 1
+                    phase[1] += elapsed
+                    if name == "_compute_hashes":
+                        self._count_hash(args, kwargs, elapsed)
+        return wrapper
+
+    def _count_hash(self, args: tuple[Any, ...], kwargs: dict[str, Any], elapsed: float) -> None:
+        size: int | None = args[2] if len(args) > 2 else kwargs.get("size")
+        if size is None:
+            try:
+                size = os.path.getsize(args[0])
+            except OSError:
+                size = 0
+        self.busy += elapsed
+        for algo in args[1] if len(args) > 1 else kwargs["algorithms"]:
+            counts: list[Any] = self.algorithms.setdefault(algo, [0, 0, 0.0])
+            counts[0] += 1
+            counts[1] += size
+            counts[2] += elapsed
+
+    def submitted(self) -> None:
+        with self.lock:
+            self.jobs += 1
+            self.inflight += 1
+            self.max_inflight = max(self.max_inflight, self.inflight)
+
+    def finished(self, _future: Any) -> None:
+        with self.lock:
+            self.inflight -= 1
+
+
+class _StatsExecutor:
+    def __init__(self, executor: Executor, stats: _RunStats) -> None:
+        self._executor = executor
+        self._stats = stats
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        self._stats.submitted()
+        future = self._executor.submit(fn, *args, **kwargs)
+        future.add_done_callback(self._stats.finished)
+        return future
+
+
+_stats: _RunStats | None = None
+
+
+def _install_stats() -> None:
+    global _stats
+    _stats = _RunStats()
+    module: dict[str, Any] = globals()
+    for name in _STATS_PHASES:
+        _stats.originals[name] = module[name]
+        module[name] = _stats.timed(name, module[name])
+
+
+def _uninstall_stats() -> _RunStats | None:
+    global _stats
+    stats: _RunStats | None = _stats
+    if stats is not None:
+        globals().update(stats.originals)
+    _stats = None
+    return stats
+
+
+def _peak_rss() -> int:
+    if resource is None:
+        return 0
+    scale: int = 1 if sys.platform == "darwin" else 1024
+    return max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss) * scale
+
+
+def _report_stats(stats: _RunStats) -> None:
+    wall: float = time.monotonic() - stats.start
+    rss: int = _peak_rss()
+    out = sys.stderr
+    print(f"Stats: wall {wall:.2f} s, peak RSS {_format_bytes(rss) if rss else 'n/a'}", file=out)
+    print(f"  {'phase':<16}{'calls':>10}{'seconds':>12}", file=out)
+    for name, (calls, seconds) in stats.phases.items():
+        if calls:
+            print(f"  {name:<16}{calls:>10}{seconds:>12.3f}", file=out)
+    if stats.algorithms:
+        print(f"  {'algorithm':<16}{'files':>10}{'bytes':>12}{'seconds':>12}{'MB/s':>10}", file=out)
+        for algo, (files, nbytes, seconds) in stats.algorithms.items():
+            rate: float = nbytes / seconds / 1048576 if seconds > 0 else 0.0
+            print(f"  {algo:<16}{files:>10}{_format_bytes(nbytes):>12}{seconds:>12.3f}{rate:>10.1f}", file=out)
+    workers: int = _worker_count()
+    line: str = (f"  pool: {workers} {options.executor} workers, {stats.jobs} jobs, "
+                 f"max queue depth {max(stats.max_inflight - workers, 0)}")
+    if options.executor == "thread" and wall > 0:
+        line += f", utilization {stats.busy / (workers * wall):.0%}"
+    else:
+        line += ", hashing runs in worker processes and is not timed"
+    print(line, file=out)
+    print("  (phase seconds are summed over all threads, so nested and parallel phases can exceed wall time)", file=out)
+
+
+_profile_gen: int = 0
+_profile_lock = threading.Lock()
+_thread_profiles: list[cProfile.Profile] = []
+_PROFILE_TOP: int = 25
+
+
+def _profile_job(gen: int, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    if getattr(_thread_local, "profile_gen", 0) != gen:
+        _thread_local.profile = cProfile.Profile()
+        _thread_local.profile_gen = gen
+        _thread_local.profile_added = False
+    profile: cProfile.Profile = _thread_local.profile
+    try:
+        profile.enable()
+    except ValueError:
+        return fn(*args, **kwargs)
+    if not _thread_local.profile_added:
+        with _profile_lock:
+            _thread_profiles.append(profile)
+        _thread_local.profile_added = True
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        profile.disable()
+
+
+class _ProfilingExecutor:
+    def __init__(self, executor: Executor) -> None:
+        self._executor = executor
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        return self._executor.submit(_profile_job, _profile_gen, fn, *args, **kwargs)
+
+
+_profile_runs: int = 0
+
+
+def _profiled(command: Callable[[str], Any], directory: str) -> Any:
+    global _profile_gen, _profile_runs
+    _profile_runs += 1
+    _profile_gen = _profile_runs
+    _thread_profiles.clear()
+    profile: cProfile.Profile = cProfile.Profile()
+    profile.enable()
+    try:
+        return command(directory)
+    finally:
+        profile.disable()
+        _profile_gen = 0
+        stats: pstats.Stats = pstats.Stats(profile, stream=sys.stderr)
+        with _profile_lock:
+            for thread_profile in _thread_profiles:
+                stats.add(thread_profile)
+            _thread_profiles.clear()
+        try:
+            stats.dump_stats(options.profile)
+            print(f"Profile written to {options.profile}", file=sys.stderr)
+        except OSError as e:
+            error(f"cannot write profile {options.profile}: {e}")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(_PROFILE_TOP)
+
+
+def _run_command(command: str, directory: str) -> Any:
+    func: Callable[[str], Any] = globals()[command]
+    if options.ionice:
+        _set_io_priority(options.ionice)
+    if options.stats:
+        _install_stats()
+        func = globals()[command]
+    try:
+        if options.profile:
+            return _profiled(func, directory)
+        return func(directory)
+    finally:
+        stats: _RunStats | None = _uninstall_stats()
+        if stats is not None:
+            _report_stats(stats)
+
+
 def _build_shared_parent() -> argparse.ArgumentParser:
     parent: argparse.ArgumentParser = argparse.ArgumentParser(add_help=False)
     parent.add_argument('-r', '--recursive', action='store_true', help='recurse into subdirectories')
     parent.add_argument('-l', '--follow-links', action='store_true', dest='follow_links', help='follow symbolic links')
     parent.add_argument('-A', '--algorithm', choices=list(_ALGORITHMS.keys()), default="md5",
                         help='hash algorithm (default: md5)')
+    parent.add_argument('-j', '--jobs', type=int, default=4,
+                        help='number of hashing workers (0 = one per CPU, default: 4)')
+    parent.add_argument('--executor', choices=["thread", "process"], default="thread",
+                        help='hashing backend: threads for I/O-bound runs, processes to spread CPU-bound '
+                        'algorithms across cores (default: thread)')
+    parent.add_argument('--io-strategy', choices=["auto"] + list(_IO_STRATEGIES.keys()), default="auto",
+                        dest='io_strategy', help='how file contents are read for hashing (default: auto)')
+    parent.add_argument('--store', choices=["text", "sqlite"], default="text",
+                        help=f'where manifests are kept: a {filecheckName} file per directory, or one indexed '
+                        f'{filecheckDbName} database at the root (default: text)')
+    parent.add_argument('--manifest-format', choices=["text", "binary"], default=None, dest='manifest_format',
+                        help=f'format used when writing {filecheckName} files; both are read automatically '
+                        '(default: text; migrate keeps each manifest\'s format)')
+    parent.add_argument('--walk-jobs', type=int, default=1, dest='walk_jobs',
+                        help='list and stat up to N upcoming directories concurrently; callbacks still run in '
+                        'walk order (default: 1, no prefetching)')
+    parent.add_argument('--progress-rate', type=float, default=10.0, dest='progress_rate', metavar='HZ',
+                        help='how many times per second the progress line is redrawn (default: 10)')
+    parent.add_argument('--stats', action='store_true',
+                        help='print per-phase timings, hashing throughput per algorithm, peak memory and '
+                        'worker pool usage to stderr at the end of the run')
+    parent.add_argument('--stream', action='store_true',
+                        help='compare sorted directory listings against sorted manifests entry by entry instead of '
+                        'loading whole manifests, keeping memory bounded for very large directories')
+    parent.add_argument('--detect-moves', action='store_true', dest='detect_moves',
+                        help='match deleted and new entries by inode (or size and hash) across directories; '
+                             'check reports them as moved and analyze reuses their digests')
+    parent.add_argument('--max-read-rate', type=float, default=0.0, dest='max_read_rate', metavar='MB/S',
+                        help='limit the total read rate of all hashing workers to this many MiB per second '
+                             '(default: unlimited)')
+    parent.add_argument('--max-files-per-sec', type=float, default=0.0, dest='max_files_per_sec', metavar='N',
+                        help='limit file operations (stat by the walker, open for hashing) to N per second '
+                             '(default: unlimited)')
+    parent.add_argument('--ionice', choices=list(_IOPRIO_CLASSES), default="",
+                        help='lower the I/O scheduling priority on Linux: idle only gets disk time no one else '
+                             'wants, low is the lowest best-effort level')
+    parent.add_argument('--quick', action='store_true',
+                        help='analyze also stores a fingerprint of the size and a few sampled blocks of each file; '
+                             'check verifies files that have one by reading only those blocks')
     parent.add_argument('-a', '--check-atime', action='store_true', help='check access time')
     parent.add_argument('-c', '--check-ctime', action='store_true', help='check creation time')
     parent.add_argument('-M', '--ignore-mtime', action='store_true', help='ignore modification time')
@@ -533,8 +3047,11 @@ def _build_shared_parent() -> argparse.ArgumentParser:
 
 
 def main(argv: list[str] | None = None) -> None:
-    parser: argparse.ArgumentParser = argparse.ArgumentParser(description='File integrity checker – create, update, and verify file manifests using MD5/SHA256 hashes')
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(description='File integrity checker – create, update, and verify file manifests using MD5, SHA, BLAKE2, CRC or xxHash digests')
     parser.add_argument('-v', '--verbose', action='store_true', help='display more info')
+    parser.add_argument('--profile', default="", metavar='FILE',
+                        help='run the command under cProfile (including hashing threads), write pstats data to FILE '
+                        'and print the hottest functions to stderr')
     subparsers = parser.add_subparsers(dest="command", help='command to execute')
 
     shared: argparse.ArgumentParser = _build_shared_parent()
@@ -545,6 +3062,8 @@ def main(argv: list[str] | None = None) -> None:
                                            'and files that no longer exist are removed from the manifest. '
                                            'When no manifest exists, all files are treated as new.')
     parser_analyze.add_argument('directory', nargs='?', default=".", help='directory to scan (defaults to current dir)')
+    parser_analyze.add_argument('--resume', action='store_true',
+                                help=f'continue an interrupted run from its {filecheckJournalName}: skip finished directories and reuse journaled hashes')
 
     parser_check = subparsers.add_parser('check', parents=[shared], help='verify files against the existing manifest and report mismatches',
                                          conflict_handler='resolve', description='Compare the current directory state against the .filecheck manifest '
@@ -553,6 +3072,58 @@ def main(argv: list[str] | None = None) -> None:
     parser_check.add_argument('-s', '--show-same-files', action='store_true', help='show files that are the same')
     parser_check.add_argument('-H', '--ignore-hash', action='store_true', help='ignore hash (contents)')
     parser_check.add_argument('-q', '--quiet', action='store_true', help='suppress summary output')
+    parser_check.add_argument('--format', choices=["text", "jsonl"], default="text",
+                             help='report format: text lines, or one JSON object per event followed by a summary record (default: text)')
+    parser_check.add_argument('--output', default="", metavar='FILE', help='write the report to FILE instead of stdout')
+
+    parser_migrate = subparsers.add_parser('migrate', parents=[shared], help='re-hash manifests with the algorithm given by -A, verifying the old digests in the same pass',
+                                           conflict_handler='resolve', description='Read every file once, verify it against the digest stored in its '
+                                           '.filecheck and compute the digest for the -A algorithm at the same time. '
+                                           'Each manifest is rewritten with the new algorithm in its header. Files whose old '
+                                           'digest does not match are reported and recorded as "error".')
+    parser_migrate.add_argument('directory', nargs='?', default=".", help='directory to migrate (defaults to current dir)')
+    parser_migrate.add_argument('-s', '--show-same-files', action='store_true', help='show files that were verified and migrated')
+    parser_migrate.add_argument('-q', '--quiet', action='store_true', help='suppress summary output')
+    parser_migrate.add_argument('--format', choices=["text", "jsonl"], default="text",
+                               help='report format: text lines, or one JSON object per event followed by a summary record (default: text)')
+    parser_migrate.add_argument('--output', default="", metavar='FILE', help='write the report to FILE instead of stdout')
+
+    parser_query = subparsers.add_parser('query', help=f'search the {filecheckDbName} index by hash, size, mtime range or path glob',
+                                         description=f'Query the SQLite index written by "analyze --store sqlite". '
+                                         'All given filters must match. Exits with 1 when nothing matches.')
+    parser_query.add_argument('directory', nargs='?', default=".", help='root directory of the index (defaults to current dir)')
+    parser_query.add_argument('--hash', dest='query_hash', default="", help='match this digest')
+    parser_query.add_argument('--size', dest='query_size', type=int, default=None, help='match this size in bytes')
+    parser_query.add_argument('--mtime-after', dest='query_mtime_after', default="",
+                              help='modified at or after this time (epoch seconds or ISO 8601)')
+    parser_query.add_argument('--mtime-before', dest='query_mtime_before', default="",
+                              help='modified before this time (epoch seconds or ISO 8601)')
+    parser_query.add_argument('--glob', dest='query_glob', default="",
+                              help='match the path relative to the root, e.g. "photos/*.jpg"')
+    parser_query.add_argument('-q', '--quiet', action='store_true', help='suppress match count')
+    parser_query.set_defaults(store="sqlite")
+
+    parser_dupes = subparsers.add_parser('dupes', parents=[shared], help='list files with identical content, reusing digests stored in the manifests',
+                                         conflict_handler='resolve', description='Find duplicate files. Digests already stored in the manifests '
+                                         '(with the algorithm given by -A) are used as they are. Other files are compared by size, then by a '
+                                         'hash of their first and last block, and are fully hashed only when that still matches. '
+                                         'Hard links to the same file count once and empty files are skipped. Exits with 1 when no duplicates are found.')
+    parser_dupes.add_argument('directory', nargs='?', default=".", help='directory to search (defaults to current dir)')
+    parser_dupes.add_argument('-q', '--quiet', action='store_true', help='suppress the summary line')
+
+    parser_scrub = subparsers.add_parser('scrub', parents=[shared], help='re-verify the files verified longest ago, within a byte or time budget',
+                                         conflict_handler='resolve', description='Re-hash the files whose last verification is oldest '
+                                         '(never verified first) and compare them with their manifest digest, until the budget is used up. '
+                                         'The verification time of each matching file is recorded in its manifest, so repeated runs '
+                                         'spread a full verification of the tree across nights. Files changed since the last analyze are '
+                                         'reported and skipped.')
+    parser_scrub.add_argument('directory', nargs='?', default=".", help='directory to scrub (defaults to current dir)')
+    parser_scrub.add_argument('--budget-bytes', type=_parse_bytes, default=0, dest='budget_bytes', metavar='SIZE',
+                              help='stop after reading about this much data, e.g. 500G (default: no limit)')
+    parser_scrub.add_argument('--budget-time', type=_parse_duration, default=0.0, dest='budget_time', metavar='DURATION',
+                              help='stop starting new files after this long, e.g. 90m or 6h (default: no limit)')
+    parser_scrub.add_argument('-s', '--show-same-files', action='store_true', help='show files that were verified')
+    parser_scrub.add_argument('-q', '--quiet', action='store_true', help='suppress summary output')
 
     args = parser.parse_args(argv)
     global options
@@ -565,7 +3136,7 @@ def main(argv: list[str] | None = None) -> None:
     else:
         try:
             directory: str = args.directory if hasattr(args, 'directory') else "."
-            ret: Any = globals()[args.command](directory)
+            ret: Any = _run_command(args.command, directory)
             if isinstance(ret, int):
                 sys.exit(ret)
         except KeyboardInterrupt:
@@ -578,6 +3149,8 @@ def main(argv: list[str] | None = None) -> None:
                 import traceback
                 traceback.print_exc()
             sys.exit(1)
+        finally:
+            _close_output()
 
     sys.exit(0)
 
@@ -13,6 +13,13 @@ def reset_globals():
     filecheck.check_deleted = 0
     filecheck.check_modified = 0
     filecheck.check_same = 0
+    filecheck.check_moved = 0
+    filecheck.check_sampled = 0
+    yield
+    filecheck._shutdown_executor()
+    filecheck._close_store()
+    filecheck._stop_progress()
+    filecheck._close_output()
 
 
 def make_info(file_name, hash_val="abc123", size=100,
@@ -42,6 +49,27 @@ def create_file(path, content=b"hello"):
     return path
 
 
+def run_analyze(tmp_path, **opts):
+    filecheck.options.recursive = True
+    for name, value in opts.items():
+        setattr(filecheck.options, name, value)
+    filecheck.analyze(str(tmp_path))
+
+
+def run_check(tmp_path, **opts):
+    filecheck.options.recursive = True
+    for name, value in opts.items():
+        setattr(filecheck.options, name, value)
+    return filecheck.check(str(tmp_path))
+
+
+def count_hashes(monkeypatch):
+    hashed = []
+    real = filecheck._compute_hash
+    monkeypatch.setattr(filecheck, "_compute_hash", lambda p, *a: hashed.append(os.path.basename(p)) or real(p, *a))
+    return hashed
+
+
 @pytest.fixture
 def manifest_file(tmp_path):
     """Create a valid .filecheck manifest in tmp_path."""
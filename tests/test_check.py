@@ -164,6 +164,42 @@ class TestCompareData:
         assert len(new_hash) == 32
         assert new_hash != ""
 
+    def test_lazy_hashes_computed_in_one_batch(self, tmp_path, monkeypatch):
+        """Hash-needed entries are verified together and reported in listing order."""
+        import hashlib
+        names = [f"f{i}.txt" for i in range(6)]
+        cur, sav = [], []
+        for i, name in enumerate(names):
+            create_file(tmp_path / name, name.encode())
+            good = hashlib.md5(name.encode()).hexdigest()
+            cur.append(make_info(name, hash_val="", dir_name=str(tmp_path)))
+            sav.append(make_info(name, hash_val=good if i % 2 else "bad", dir_name=str(tmp_path)))
+        current = make_manifest(cur, dir_name=str(tmp_path))
+        saved = make_manifest(sav, dir_name=str(tmp_path))
+        batches = []
+        original_batch = filecheck._compute_hash_batch
+        def spy(files_dict, algorithm=None):
+            batches.append(sorted(files_dict))
+            original_batch(files_dict, algorithm)
+        monkeypatch.setattr(filecheck, '_compute_hash_batch', spy)
+        filecheck.options.show_same_files = True
+
+        import io, sys
+        buf = io.StringIO()
+        old = sys.stdout
+        sys.stdout = buf
+        try:
+            filecheck.compareData(current, saved, str(tmp_path))
+        finally:
+            sys.stdout = old
+        lines = buf.getvalue().splitlines()
+
+        assert batches == [names]
+        assert [l.rsplit(os.sep, 1)[1] for l in lines] == names
+        assert [l.split(":")[0] for l in lines] == ["MD5 mismatch", "same file"] * 3
+        assert filecheck.check_modified == 3
+        assert filecheck.check_same == 3
+
     def test_lazy_hash_no_recompute_when_ignore_hash(self, tmp_path):
         """With ignore_hash=True, lazy computation is skipped."""
         f = create_file(tmp_path / "f.txt", b"content")
@@ -398,6 +434,23 @@ class TestCheckEnd:
         assert "invalid or corrupt manifest" in captured.out
 
 
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_mismatch_named_after_manifest_algorithm(self, tmp_path, capsys, stream):
+        f = create_file(tmp_path / "f.txt", b"data")
+        filecheck.options.algorithm = "sha256"
+        filecheck.analyze(str(tmp_path))
+        st = os.stat(f)
+        f.write_bytes(b"DATA")
+        os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns))
+        filecheck.options.algorithm = "md5"
+        filecheck.options.stream = stream
+        capsys.readouterr()
+        assert filecheck.check(str(tmp_path)) == 1
+        out = capsys.readouterr().out
+        assert f"SHA256 mismatch: {f}" in out
+        assert "MD5" not in out
+
+
 class TestSummaryCounters:
     def test_new_item_increments_added(self):
         current = make_manifest([make_info("f.txt")])
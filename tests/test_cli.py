@@ -3,6 +3,8 @@ import filecheck
 import sys
 import os
 import io
+import hashlib
+import json
 from pathlib import Path
 
 
@@ -163,6 +165,157 @@ class TestCLI:
         loaded = filecheck.filecheckLoad(str(tmp_path))
         assert loaded["algorithm"] == "md5"
 
+    @pytest.mark.parametrize("algo", ["blake2b", "crc32"])
+    def test_algorithm_roundtrip(self, tmp_path, algo):
+        (tmp_path / "f.txt").write_text("data")
+        ret, out = self.run_main(["analyze", "-A", algo, "."], tmp_path)
+        assert ret == 0
+        assert filecheck.filecheckLoad(str(tmp_path))["algorithm"] == algo
+        ret, out = self.run_main(["check", "."], tmp_path)
+        assert ret == 0
+
+    def test_unavailable_manifest_algorithm_exits_nonzero(self, tmp_path):
+        (tmp_path / "f.txt").write_text("data")
+        (tmp_path / ".filecheck").write_text(
+            f"FILECHECK:{filecheck.version}:{filecheck.signature}:nosuchhash\n", encoding="utf-8")
+        ret, out = self.run_main(["check", "."], tmp_path)
+        assert ret == 1
+        assert "'nosuchhash' is not available" in out
+
+    def test_jobs_and_process_executor(self, tmp_path):
+        (tmp_path / "f.txt").write_text("data")
+        ret, out = self.run_main(["analyze", "-j", "2", "--executor", "process", "-A", "sha256", "."], tmp_path)
+        assert ret == 0
+        loaded = filecheck.filecheckLoad(str(tmp_path))
+        assert loaded["files"]["f.txt"]["hash"] == hashlib.sha256(b"data").hexdigest()
+        assert filecheck._executor is None
+        ret, out = self.run_main(["check", "-j", "2", "--executor", "process", "."], tmp_path)
+        assert ret == 0
+
+    def test_check_jsonl_format(self, tmp_path):
+        (tmp_path / "f.txt").write_text("data")
+        (tmp_path / "gone.txt").write_text("bye")
+        self.run_main(["analyze", "."], tmp_path)
+        (tmp_path / "f.txt").write_text("DATA")
+        (tmp_path / "gone.txt").unlink()
+        (tmp_path / "new.txt").write_text("hi")
+        out = io.StringIO()
+        old_out = sys.stdout
+        sys.stdout = out
+        orig_dir = os.getcwd()
+        os.chdir(str(tmp_path))
+        try:
+            with pytest.raises(SystemExit) as exc:
+                filecheck.main(["check", "--format", "jsonl", "."])
+        finally:
+            sys.stdout = old_out
+            os.chdir(orig_dir)
+        assert exc.value.code == 3
+        records = [json.loads(line) for line in out.getvalue().splitlines()]
+        entries = {os.path.basename(r["path"]): r for r in records if r["type"] == "entry"}
+        assert entries["f.txt"]["status"] == "MD5 mismatch"
+        assert entries["f.txt"]["saved"]["hash"] == hashlib.md5(b"data").hexdigest()
+        assert entries["f.txt"]["current"]["hash"] == hashlib.md5(b"DATA").hexdigest()
+        assert entries["gone.txt"]["status"] == "deleted file" and entries["gone.txt"]["current"] is None
+        assert entries["new.txt"]["status"] == "new item" and entries["new.txt"]["saved"] is None
+        assert all(r["elapsed"] >= 0 for r in records)
+        assert records[-1] == {**records[-1], "type": "summary", "total": 3, "added": 1, "deleted": 1,
+                               "modified": 1, "same": 0, "exit_code": 3}
+
+    def test_check_verbose_jsonl_is_pure_json(self, tmp_path, capsys):
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "f.txt").write_text("data")
+        self.run_main(["analyze", "-r", "."], tmp_path)
+        capsys.readouterr()
+        orig_dir = os.getcwd()
+        os.chdir(str(tmp_path))
+        try:
+            with pytest.raises(SystemExit):
+                filecheck.main(["-v", "check", "-r", "--format", "jsonl", "."])
+        finally:
+            os.chdir(orig_dir)
+        captured = capsys.readouterr()
+        records = [json.loads(line) for line in captured.out.splitlines()]
+        assert records[-1]["type"] == "summary"
+        assert captured.err.splitlines().count("sub") == 1
+
+    def test_check_output_file(self, tmp_path):
+        (tmp_path / "f.txt").write_text("data")
+        self.run_main(["analyze", "."], tmp_path)
+        (tmp_path / "f.txt").write_text("changed!")
+        report = tmp_path / "report.jsonl"
+        ret, out = self.run_main(["check", "--format", "jsonl", "--output", str(report),
+                                  "--exclude", "report.jsonl", "."], tmp_path)
+        assert ret == 1
+        assert "size mismatch" not in out
+        lines = [json.loads(line) for line in report.read_text().splitlines()]
+        assert [r["type"] for r in lines] == ["entry", "summary"]
+        assert lines[0]["status"] == "size mismatch"
+
+    def test_text_output_file(self, tmp_path):
+        (tmp_path / "f.txt").write_text("data")
+        self.run_main(["analyze", "."], tmp_path)
+        report = tmp_path / "report.txt"
+        ret, out = self.run_main(["check", "-s", "--output", str(report), "--exclude", "report.txt", "."], tmp_path)
+        assert ret == 0
+        assert "CHECK:" in out
+        text = report.read_text()
+        assert "same file:" in text and "Total: 1" in text
+
+    def test_stats_report(self, tmp_path):
+        (tmp_path / "f.txt").write_text("data")
+        original = filecheck._compute_hash
+        ret, out = self.run_main(["analyze", "--stats", "-A", "sha256", "."], tmp_path)
+        assert ret == 0
+        assert "Stats: wall" in out
+        assert "filecheckSave" in out
+        assert "sha256" in out and "MB/s" in out
+        assert "max queue depth" in out
+        assert filecheck._compute_hash is original
+        assert filecheck._stats is None
+
+    def test_stats_counts_calls(self, tmp_path):
+        (tmp_path / "a.txt").write_text("aa")
+        (tmp_path / "b.txt").write_text("bbb")
+        filecheck._install_stats()
+        try:
+            filecheck.analyze(str(tmp_path))
+        finally:
+            stats = filecheck._uninstall_stats()
+        assert stats.phases["makeInfo"][0] == 2
+        assert stats.phases["filecheckSave"][0] == 1
+        assert stats.algorithms["md5"][:2] == [2, 5]
+        assert stats.jobs == 2 and stats.inflight == 0
+
+    def test_profile_includes_hash_threads(self, tmp_path):
+        import pstats
+        (tmp_path / "f.txt").write_text("data")
+        prof = tmp_path / "run.prof"
+        ret, out = self.run_main(["--profile", str(prof), "analyze", "--exclude", "run.prof", "."], tmp_path)
+        assert ret == 0
+        assert "Profile written to" in out
+        assert "cumulative" in out
+        functions = {name for _, _, name in pstats.Stats(str(prof)).stats}
+        assert "analyze" in functions
+        assert "_compute_hashes" in functions
+        assert filecheck._profile_gen == 0
+
+    def test_profile_when_worker_profiler_unavailable(self, tmp_path, monkeypatch):
+        import cProfile
+        import threading
+        class SingleProfile(cProfile.Profile):
+            def enable(self, *args, **kwargs):
+                if threading.current_thread() is not threading.main_thread():
+                    raise ValueError("Another profiling tool is already active")
+                return super().enable(*args, **kwargs)
+        monkeypatch.setattr(filecheck.cProfile, "Profile", SingleProfile)
+        (tmp_path / "f.txt").write_text("data")
+        prof = tmp_path / "run.prof"
+        ret, out = self.run_main(["--profile", str(prof), "analyze", "--exclude", "run.prof", "."], tmp_path)
+        assert ret == 0
+        assert "Profile written to" in out
+        assert filecheck._thread_profiles == []
+
     def test_main_guard(self, tmp_path):
         """Trigger __name__ == '__main__' guard via runpy."""
         import runpy, sys
@@ -1,6 +1,7 @@
 import pytest
 import filecheck
 import os
+import hashlib
 from tests.conftest import create_file
 
 
@@ -101,3 +102,134 @@ class TestCheckCommand:
         filecheck.check(str(tmp_path))
         captured = capsys.readouterr()
         assert "deleted file" in captured.out
+
+    @pytest.mark.parametrize("command", ["analyze", "check", "migrate"])
+    def test_manifest_loaded_once_per_directory(self, tmp_path, monkeypatch, command):
+        create_file(tmp_path / "f.txt", b"data")
+        create_file(tmp_path / "sub" / "g.txt", b"more")
+        filecheck.options.recursive = True
+        filecheck.analyze(str(tmp_path))
+        loads = []
+        real = filecheck.filecheckLoad
+        monkeypatch.setattr(filecheck, "filecheckLoad", lambda d: loads.append(d) or real(d))
+        if command == "migrate":
+            filecheck.options.algorithm = "sha256"
+        getattr(filecheck, command)(str(tmp_path))
+        assert sorted(loads) == sorted([str(tmp_path), str(tmp_path / "sub")])
+
+    def test_manifest_released_after_directory(self, tmp_path, monkeypatch):
+        create_file(tmp_path / "sub" / "g.txt", b"more")
+        filecheck.options.recursive = True
+        filecheck.analyze(str(tmp_path))
+        ended = []
+        real = filecheck.checkEnd
+        monkeypatch.setattr(filecheck, "checkEnd", lambda d, data: real(d, data) or ended.append(data))
+        filecheck.check(str(tmp_path))
+        assert ended and all("_manifest" not in data for data in ended)
+
+
+class TestMigrateCommand:
+    def _analyze(self, tmp_path, algo="md5"):
+        filecheck.options.recursive = True
+        filecheck.options.algorithm = algo
+        filecheck.analyze(str(tmp_path))
+
+    def test_migrate_rewrites_manifest(self, tmp_path, capsys):
+        create_file(tmp_path / "f.txt", b"data")
+        create_file(tmp_path / "sub" / "g.txt", b"nested")
+        self._analyze(tmp_path)
+        filecheck.options.algorithm = "sha256"
+        ret = filecheck.migrate(str(tmp_path))
+        assert ret == 0
+        loaded = filecheck.filecheckLoad(str(tmp_path))
+        assert loaded["algorithm"] == "sha256"
+        assert loaded["files"]["f.txt"]["hash"] == hashlib.sha256(b"data").hexdigest()
+        assert loaded["files"]["sub"]["hash"] == "<DIR>"
+        sub = filecheck.filecheckLoad(str(tmp_path / "sub"))
+        assert sub["algorithm"] == "sha256"
+        assert sub["files"]["g.txt"]["hash"] == hashlib.sha256(b"nested").hexdigest()
+        assert "MIGRATE:" in capsys.readouterr().out
+
+    def test_migrate_reads_each_file_once(self, tmp_path, monkeypatch):
+        create_file(tmp_path / "f.txt", b"data")
+        self._analyze(tmp_path)
+        opened = []
+        import builtins
+        original_open = builtins.open
+        def counting_open(file, *args, **kwargs):
+            if str(file).endswith("f.txt"):
+                opened.append(file)
+            return original_open(file, *args, **kwargs)
+        monkeypatch.setattr(builtins, "open", counting_open)
+        filecheck.options.algorithm = "sha256"
+        filecheck.migrate(str(tmp_path))
+        assert len(opened) == 1
+
+    def test_migrate_reports_old_digest_mismatch(self, tmp_path, capsys):
+        f = create_file(tmp_path / "f.txt", b"data")
+        self._analyze(tmp_path)
+        st = os.stat(f)
+        f.write_bytes(b"rot!")
+        os.utime(f, ns=(st.st_atime_ns, st.st_mtime_ns))
+        filecheck.options.algorithm = "sha256"
+        ret = filecheck.migrate(str(tmp_path))
+        assert ret == 1
+        assert "MD5 mismatch" in capsys.readouterr().out
+        loaded = filecheck.filecheckLoad(str(tmp_path))
+        assert loaded["algorithm"] == "sha256"
+        assert loaded["files"]["f.txt"]["hash"] == "error"
+
+    def test_migrate_keeps_binary_format(self, tmp_path):
+        create_file(tmp_path / "f.txt", b"data")
+        filecheck.options.manifest_format = "binary"
+        self._analyze(tmp_path)
+        filecheck.options.manifest_format = None
+        filecheck.options.algorithm = "sha256"
+        assert filecheck.migrate(str(tmp_path)) == 0
+        loaded = filecheck.filecheckLoad(str(tmp_path))
+        assert (loaded["algorithm"], loaded["format"]) == ("sha256", "binary")
+        assert loaded["files"]["f.txt"]["hash"] == hashlib.sha256(b"data").hexdigest()
+
+    @pytest.mark.parametrize("before,requested", [("text", "binary"), ("binary", "text")])
+    def test_migrate_honors_explicit_format(self, tmp_path, before, requested):
+        create_file(tmp_path / "f.txt", b"data")
+        filecheck.options.manifest_format = before
+        self._analyze(tmp_path)
+        with pytest.raises(SystemExit) as exc:
+            filecheck.main(["migrate", "-A", "sha256", "--manifest-format", requested, str(tmp_path)])
+        assert exc.value.code == 0
+        loaded = filecheck.filecheckLoad(str(tmp_path))
+        assert loaded["algorithm"] == "sha256"
+        assert loaded.get("format", "text") == requested
+
+    def test_migrate_adds_new_and_drops_deleted_items(self, tmp_path, capsys):
+        create_file(tmp_path / "f.txt", b"data")
+        create_file(tmp_path / "gone.txt", b"gone")
+        self._analyze(tmp_path)
+        create_file(tmp_path / "new.txt", b"fresh")
+        os.remove(tmp_path / "gone.txt")
+        filecheck.options.algorithm = "sha256"
+        assert filecheck.migrate(str(tmp_path)) == 2
+        out = capsys.readouterr().out
+        assert f"new item: {tmp_path / 'new.txt'}" in out
+        assert f"deleted file: {tmp_path / 'gone.txt'}" in out
+        files = filecheck.filecheckLoad(str(tmp_path))["files"]
+        assert sorted(files) == ["f.txt", "new.txt"]
+        assert files["new.txt"]["hash"] == hashlib.sha256(b"fresh").hexdigest()
+
+    def test_migrate_same_algorithm_is_noop(self, tmp_path):
+        create_file(tmp_path / "f.txt", b"data")
+        self._analyze(tmp_path)
+        before = (tmp_path / ".filecheck").read_bytes()
+        filecheck.migrate(str(tmp_path))
+        assert (tmp_path / ".filecheck").read_bytes() == before
+
+
+class TestAnalyzeAlgorithmChange:
+    def test_changed_algorithm_rehashes_unchanged_files(self, tmp_path):
+        create_file(tmp_path / "f.txt", b"data")
+        filecheck.analyze(str(tmp_path))
+        filecheck.options.algorithm = "sha256"
+        filecheck.analyze(str(tmp_path))
+        loaded = filecheck.filecheckLoad(str(tmp_path))
+        assert loaded["files"]["f.txt"]["hash"] == hashlib.sha256(b"data").hexdigest()
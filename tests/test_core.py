@@ -1,6 +1,7 @@
 import pytest
 import filecheck
 import os
+import sys
 import hashlib
 
 
@@ -66,11 +67,54 @@ class TestComputeHash:
         expected = hashlib.sha256(b"hello world").hexdigest()
         assert filecheck._compute_hash(str(f), "sha256") == expected
 
-    def test_unknown_algorithm_falls_back_to_md5(self, tmp_path):
+    def test_unknown_algorithm_reports_error(self, tmp_path, capsys):
         f = tmp_path / "test.txt"
         f.write_text("hello")
-        expected = hashlib.md5(b"hello").hexdigest()
-        assert filecheck._compute_hash(str(f), "unknown_algo") == expected
+        assert filecheck._compute_hash(str(f), "unknown_algo") == "error"
+        assert "'unknown_algo' is not available" in capsys.readouterr().out
+
+    @pytest.mark.parametrize("algo", ["sha1", "sha512", "blake2b", "blake2s"])
+    def test_hashlib_algorithms(self, tmp_path, algo):
+        f = tmp_path / "test.txt"
+        f.write_text("hello world")
+        expected = hashlib.new(algo, b"hello world").hexdigest()
+        assert filecheck._compute_hash(str(f), algo) == expected
+
+    @pytest.mark.parametrize("algo", ["crc32", "adler32"])
+    @pytest.mark.parametrize("strategy", ["readinto", "mmap"])
+    def test_zlib_checksums(self, tmp_path, algo, strategy):
+        import zlib
+        data = b"hello world" * 200000
+        f = tmp_path / "test.bin"
+        f.write_bytes(data)
+        filecheck.options.io_strategy = strategy
+        filecheck.options.quiet = True
+        func = getattr(zlib, algo)
+        assert filecheck._compute_hash(str(f), algo) == f"{func(data):08x}"
+
+    def test_register_algorithm_rejects_broken_factory(self):
+        def broken():
+            raise ValueError("disabled by policy")
+        assert filecheck._register_algorithm("broken", broken) is False
+        assert "broken" not in filecheck._ALGORITHMS
+
+    def test_missing_optional_algorithm_message(self, monkeypatch):
+        monkeypatch.setitem(filecheck._MISSING_ALGORITHMS, "fakehash", "fakehash-pkg")
+        assert "requires the 'fakehash-pkg' package" in filecheck._algorithm_error("fakehash")
+
+    def test_old_xxhash_without_xxh3(self, monkeypatch):
+        import importlib.util
+        import types
+        old = types.ModuleType("xxhash")
+        old.xxh64 = hashlib.md5
+        monkeypatch.setitem(sys.modules, "xxhash", old)
+        spec = importlib.util.spec_from_file_location("filecheck_old_xxhash", filecheck.__file__)
+        module = importlib.util.module_from_spec(spec)
+        monkeypatch.setitem(sys.modules, spec.name, module)
+        spec.loader.exec_module(module)
+        assert "xxh64" in module._ALGORITHMS
+        assert "xxh3_64" not in module._ALGORITHMS
+        assert module._MISSING_ALGORITHMS["xxh3_128"] == "xxhash"
 
     def test_algorithm_from_options(self, tmp_path):
         f = tmp_path / "test.txt"
@@ -118,6 +162,73 @@ class TestComputeHash:
         filecheck._compute_hash(str(f))
         assert len(calls) == 0
 
+    @pytest.mark.parametrize("strategy", ["auto", "readinto", "mmap", "file_digest"])
+    @pytest.mark.parametrize("size", [0, 100, 65537, 3 * 1048576 + 7])
+    def test_io_strategies_agree(self, tmp_path, strategy, size):
+        if strategy not in filecheck._IO_STRATEGIES and strategy != "auto":
+            pytest.skip(f"{strategy} not available")
+        f = tmp_path / "data.bin"
+        data = bytes(range(256)) * (size // 256) + b"x" * (size % 256)
+        f.write_bytes(data)
+        filecheck.options.io_strategy = strategy
+        filecheck.options.quiet = True
+        assert filecheck._compute_hash(str(f), "sha256") == hashlib.sha256(data).hexdigest()
+
+    @pytest.mark.parametrize("strategy", ["mmap", "file_digest"])
+    def test_progress_keeps_requested_strategy(self, tmp_path, monkeypatch, strategy):
+        if strategy not in filecheck._IO_STRATEGIES:
+            pytest.skip(f"{strategy} not available")
+        f = tmp_path / "big.bin"
+        data = bytes(range(256)) * 12289
+        f.write_bytes(data)
+        filecheck.options.io_strategy = strategy
+        used = []
+        original = filecheck._IO_STRATEGIES[strategy]
+        monkeypatch.setitem(filecheck._IO_STRATEGIES, strategy,
+                            lambda *args: used.append(strategy) or original(*args))
+        calls = []
+        monkeypatch.setattr(filecheck, '_progress', lambda msg: calls.append(msg))
+        assert filecheck._compute_hash(str(f), "sha256") == hashlib.sha256(data).hexdigest()
+        assert used == [strategy]
+        assert any("(5%)" in c for c in calls)
+        assert any("(100%)" in c for c in calls)
+
+    def test_buffer_size_grows_with_file_size(self):
+        small = filecheck._buffer_size(10)
+        medium = filecheck._buffer_size(8 * 1048576)
+        large = filecheck._buffer_size(4 * 1024 ** 3)
+        assert small <= medium <= large
+        assert large == 1048576
+
+    def test_buffer_reused_per_thread(self):
+        first = filecheck._get_buffer(4096)
+        second = filecheck._get_buffer(1024)
+        assert first.obj is second.obj
+
+    def test_known_size_skips_stat(self, tmp_path, monkeypatch):
+        f = tmp_path / "test.txt"
+        f.write_bytes(b"hello world")
+        def no_stat(*_):
+            raise AssertionError("unexpected stat")
+        monkeypatch.setattr(filecheck.os, "fstat", no_stat)
+        monkeypatch.setattr(filecheck.os.path, "getsize", no_stat)
+        expected = hashlib.md5(b"hello world").hexdigest()
+        assert filecheck._compute_hash(str(f), "md5", 11) == expected
+
+    def test_compute_hashes_single_pass(self, tmp_path):
+        data = b"ABCDEFGH" * 100000
+        f = tmp_path / "multi.bin"
+        f.write_bytes(data)
+        result = filecheck._compute_hashes(str(f), ("md5", "sha256", "crc32"))
+        assert result["md5"] == hashlib.md5(data).hexdigest()
+        assert result["sha256"] == hashlib.sha256(data).hexdigest()
+        assert len(result["crc32"]) == 8
+
+    def test_compute_hashes_error(self, capsys):
+        result = filecheck._compute_hashes("/nonexistent_xyz/f.txt", ("md5", "sha256"))
+        assert result == {"md5": "error", "sha256": "error"}
+        assert "Error calculating md5, sha256" in capsys.readouterr().out
+
     def test_compute_hash_batch_exception(self, tmp_path, monkeypatch):
         """_compute_hash_batch's except clause when _compute_hash raises unexpectedly."""
         f = create_file(tmp_path / "f.txt", b"data")
@@ -132,6 +243,54 @@ class TestComputeHash:
         assert data["files"]["f.txt"]["hash"] == "error"
 
 
+# ── hashing executor ─────────────────────────────────────────────────
+
+class TestHashExecutor:
+    def _batch(self, tmp_path, count=5):
+        data = filecheck.filecheckNew(str(tmp_path))
+        for i in range(count):
+            create_file(tmp_path / f"f{i}.txt", f"content {i}".encode())
+            data["files"][f"f{i}.txt"] = {
+                "dirName": str(tmp_path), "fileName": f"f{i}.txt", "hash": "",
+            }
+        return data["files"]
+
+    def test_default_is_four_threads(self):
+        executor = filecheck._get_executor()
+        assert isinstance(executor, filecheck.ThreadPoolExecutor)
+        assert executor._max_workers == 4
+
+    def test_jobs_zero_uses_cpu_count(self, monkeypatch):
+        monkeypatch.setattr(filecheck.os, "cpu_count", lambda: 3)
+        filecheck.options.jobs = 0
+        assert filecheck._worker_count() == 3
+
+    def test_executor_reused_until_settings_change(self):
+        first = filecheck._get_executor()
+        assert filecheck._get_executor() is first
+        filecheck.options.jobs = 2
+        second = filecheck._get_executor()
+        assert second is not first
+        assert second._max_workers == 2
+
+    def test_process_pool_batch(self, tmp_path):
+        filecheck.options.executor = "process"
+        filecheck.options.jobs = 2
+        filecheck.options.quiet = True
+        files = self._batch(tmp_path)
+        filecheck._compute_hash_batch(files, "sha256")
+        assert isinstance(filecheck._executor, filecheck.ProcessPoolExecutor)
+        for i in range(5):
+            expected = hashlib.sha256(f"content {i}".encode()).hexdigest()
+            assert files[f"f{i}.txt"]["hash"] == expected
+
+    def test_shutdown_clears_executor(self):
+        filecheck._get_executor()
+        filecheck._shutdown_executor()
+        assert filecheck._executor is None
+
+
+
 # ── shouldIgnore() ────────────────────────────────────────────────────
 
 class TestShouldIgnore:
@@ -174,6 +333,50 @@ class TestShouldIgnore:
         filecheck.options.include = ["*.py"]
         assert filecheck.shouldIgnore(".filecheck")
 
+    @staticmethod
+    def reference(filename):
+        from fnmatch import fnmatch
+        from pathlib import Path
+        name = Path(filename).name
+        for pattern in filecheck.options.include:
+            if fnmatch(name, pattern) or fnmatch(filename, pattern):
+                return False
+        if name in filecheck._IGNORE_EXACT:
+            return True
+        if any(fnmatch(name, pattern) for pattern in filecheck._IGNORE_GLOB):
+            return True
+        return any(fnmatch(name, p) or fnmatch(filename, p) for p in filecheck.options.exclude)
+
+    @pytest.mark.parametrize("include,exclude", [
+        ([], ["*.log", "build", "*/cache/*", "tmp?", "[ab]*.bak"]),
+        (["keep.log", "*/cache/keep*"], ["*.log", "*cache*"]),
+        (["Icon*"], [".git", "*.tmp"]),
+    ])
+    def test_matches_fnmatch_semantics(self, include, exclude):
+        filecheck.options.include = include
+        filecheck.options.exclude = exclude
+        names = ["a.log", "keep.log", "build", "tmp1", "tmp12", "a.bak", "c.bak", "IconX",
+                 ".git", ".filecheck", "x.tmp", "plain.txt", "keepme", "cache"]
+        paths = names + [os.path.join(d, n) for d in ("/r/cache", "/r/src", "build") for n in names]
+        for path in paths:
+            assert filecheck.shouldIgnore(path) == self.reference(path), path
+
+    def test_recompiled_when_patterns_change(self):
+        filecheck.options.exclude = ["*.log"]
+        assert filecheck.shouldIgnore("a.log")
+        filecheck.options.exclude = ["*.txt"]
+        assert not filecheck.shouldIgnore("a.log")
+        filecheck.options.exclude.append("*.log")
+        assert filecheck.shouldIgnore("a.log")
+
+    def test_name_results_memoized(self, monkeypatch):
+        filecheck.options.exclude = ["*.log"]
+        filecheck.shouldIgnore("/a/x.log")
+        matcher = filecheck._get_matcher()
+        monkeypatch.setattr(matcher, "exclude_re", None)
+        assert filecheck.shouldIgnore("/b/x.log")
+        assert not filecheck.shouldIgnore("/b/y.log")
+
 
 # ── filecheckNew() ────────────────────────────────────────────────────
 
@@ -371,7 +574,7 @@ class TestFilecheckLoad:
         """Backward compat: manifest with \\r\\r\\n endlines is loadable."""
         mf = tmp_path / ".filecheck"
         raw = (
-            f"\ufeffFILECHECK:{filecheck.version}:{filecheck.signature}\r\r\n"
+            f"\ufeffFILECHECK:0.2:{filecheck.signature}\r\r\n"
             f"abc:10:1.0:2.0:3.0:f.txt\r\r\n"
         ).encode("utf-8")
         mf.write_bytes(raw)
@@ -383,7 +586,7 @@ class TestFilecheckLoad:
         """Backward compat: manifest with \\r\\n endlines is loadable."""
         mf = tmp_path / ".filecheck"
         raw = (
-            f"\ufeffFILECHECK:{filecheck.version}:{filecheck.signature}\r\n"
+            f"\ufeffFILECHECK:0.2:{filecheck.signature}\r\n"
             f"abc:10:1.0:2.0:3.0:f.txt\r\n"
         ).encode("utf-8")
         mf.write_bytes(raw)
@@ -402,6 +605,25 @@ class TestFilecheckLoad:
         loaded = filecheck.filecheckLoad(str(tmp_path))
         assert loaded["algorithm"] == "sha256"
 
+    def test_unavailable_algorithm_fails_clearly(self, tmp_path):
+        mf = tmp_path / ".filecheck"
+        mf.write_text(
+            f"FILECHECK:{filecheck.version}:{filecheck.signature}:nosuchhash\n"
+            f"abc:10:1.0:2.0:3.0:f.txt\n",
+            encoding="utf-8",
+        )
+        with pytest.raises(ValueError, match="'nosuchhash' is not available"):
+            filecheck.filecheckLoad(str(tmp_path))
+
+    def test_loads_registered_algorithm(self, tmp_path):
+        mf = tmp_path / ".filecheck"
+        mf.write_text(
+            f"FILECHECK:{filecheck.version}:{filecheck.signature}:crc32\n"
+            f"0d4a1185:10:1.0:2.0:3.0:f.txt\n",
+            encoding="utf-8",
+        )
+        assert filecheck.filecheckLoad(str(tmp_path))["algorithm"] == "crc32"
+
     def test_three_field_header_defaults_to_md5(self, tmp_path):
         """Header without algorithm field (3 fields) defaults to md5."""
         mf = tmp_path / ".filecheck"
@@ -414,6 +636,94 @@ class TestFilecheckLoad:
         assert loaded["algorithm"] == "md5"
 
 
+# ── binary manifest format ────────────────────────────────────────────
+
+class TestBinaryManifest:
+    def _save(self, tmp_path, files, algo="md5"):
+        filecheck.options.manifest_format = "binary"
+        filecheck.options.algorithm = algo
+        data = filecheck.filecheckNew(str(tmp_path))
+        for info in files:
+            data["files"][info["fileName"]] = info
+        filecheck.filecheckSave(data, str(tmp_path))
+        filecheck.options.manifest_format = "text"
+
+    def _info(self, name, hash_val, size=10, ctime=1.25, mtime=1700000000.123456, atime=3.5):
+        return {"fileName": name, "hash": hash_val, "size": size,
+                "ctime": ctime, "mtime": mtime, "atime": atime}
+
+    def test_roundtrip(self, tmp_path):
+        digest = hashlib.md5(b"x").hexdigest()
+        self._save(tmp_path, [
+            self._info("a.txt", digest, size=2 ** 40),
+            self._info("dir", "<DIR>"),
+            self._info("pending", ""),
+            self._info("broken", "error"),
+            self._info("ünïcode:name.txt", digest),
+        ])
+        loaded = filecheck.filecheckLoad(str(tmp_path))
+        files = loaded["files"]
+        assert loaded["algorithm"] == "md5"
+        assert files["a.txt"]["hash"] == digest
+        assert files["a.txt"]["size"] == 2 ** 40
+        assert files["a.txt"]["dirName"] == str(tmp_path)
+        assert files["dir"]["hash"] == "<DIR>"
+        assert files["pending"]["hash"] == ""
+        assert files["broken"]["hash"] == "error"
+        assert files["ünïcode:name.txt"]["hash"] == digest
+        assert files["a.txt"]["mtime"] == pytest.approx(1700000000.123456, abs=1e-6)
+        assert int(files["a.txt"]["mtime"]) == 1700000000
+        assert files["a.txt"]["ctime"] == 1.25
+
+    def test_header_names_version_and_algorithm(self, tmp_path):
+        self._save(tmp_path, [], algo="sha256")
+        first = (tmp_path / ".filecheck").read_bytes().split(b"\n", 1)[0]
+        assert first == f"FILECHECK:1.3:{filecheck.signature}:sha256:sorted".encode()
+        assert filecheck.filecheckLoad(str(tmp_path))["algorithm"] == "sha256"
+
+    def test_records_are_fixed_width(self, tmp_path):
+        digest = hashlib.sha256(b"x").hexdigest()
+        self._save(tmp_path, [self._info("a", digest)], algo="sha256")
+        one = (tmp_path / ".filecheck").stat().st_size
+        self._save(tmp_path, [self._info("a", digest), self._info("b", digest)], algo="sha256")
+        two = (tmp_path / ".filecheck").stat().st_size
+        assert two - one == filecheck._bin_record(32).size + 1
+
+    def test_non_hex_hash_stored_as_error(self, tmp_path):
+        self._save(tmp_path, [self._info("a", "not-a-digest")])
+        assert filecheck.filecheckLoad(str(tmp_path))["files"]["a"]["hash"] == "error"
+
+    def test_truncated_manifest_is_invalid(self, tmp_path, capsys):
+        self._save(tmp_path, [self._info("a.txt", hashlib.md5(b"x").hexdigest())])
+        mf = tmp_path / ".filecheck"
+        mf.write_bytes(mf.read_bytes()[:-3])
+        assert filecheck.filecheckLoad(str(tmp_path)) is False
+        assert "Invalid manifest" in capsys.readouterr().out
+
+    def test_nanosecond_timestamps_exact(self, tmp_path):
+        f = create_file(tmp_path / "f.txt", b"data")
+        os.utime(f, ns=(1_700_000_000_123_456_789, 1_700_000_001_987_654_321))
+        filecheck.options.manifest_format = "binary"
+        filecheck.analyze(str(tmp_path))
+        info = filecheck.filecheckLoad(str(tmp_path))["files"]["f.txt"]
+        assert info["mtime_ns"] == 1_700_000_001_987_654_321
+        filecheck.filecheckSave(filecheck.filecheckLoad(str(tmp_path)), str(tmp_path))
+        assert filecheck.filecheckLoad(str(tmp_path))["files"]["f.txt"]["mtime_ns"] == 1_700_000_001_987_654_321
+
+    def test_text_and_binary_compare_equal(self, tmp_path):
+        f = create_file(tmp_path / "f.txt", b"data")
+        filecheck.analyze(str(tmp_path))
+        text = filecheck.filecheckLoad(str(tmp_path))
+        filecheck.options.manifest_format = "binary"
+        filecheck.filecheckSave(text, str(tmp_path))
+        binary = filecheck.filecheckLoad(str(tmp_path))
+        assert binary["files"]["f.txt"]["hash"] == text["files"]["f.txt"]["hash"]
+        filecheck.options.manifest_format = "text"
+        filecheck.options.show_same_files = True
+        assert filecheck.check(str(tmp_path)) == 0
+
+
+
 # ── generateBegin() / generateEnd() ───────────────────────────────────
 
 class TestGenerateBeginEnd:
@@ -551,6 +861,88 @@ class TestProgress:
         filecheck._progress("/a/very/long/path/that/exceeds/width.txt")
         filecheck._clear_progress()
 
+
+class TestProgressReporter:
+    class Capture:
+        def __init__(self):
+            self.writes = []
+        def write(self, text):
+            self.writes.append(text)
+        def flush(self):
+            pass
+        def renders(self):
+            return [w for w in self.writes if "\033[K" in w]
+
+    def test_redraws_are_rate_limited(self, monkeypatch):
+        import time
+        err = self.Capture()
+        monkeypatch.setattr(sys, "stderr", err)
+        filecheck.options.progress_rate = 20
+        start = time.monotonic()
+        n = 0
+        while time.monotonic() - start < 0.3:
+            filecheck._progress(f"/dir/file{n}")
+            n += 1
+        filecheck._stop_progress()
+        assert n > 1000
+        assert 1 <= len(err.renders()) <= 10
+
+    def test_hidden_after_clear(self, monkeypatch):
+        import time
+        err = self.Capture()
+        monkeypatch.setattr(sys, "stderr", err)
+        filecheck.options.progress_rate = 100
+        filecheck._progress("/dir/file")
+        filecheck._clear_progress()
+        before = len(err.renders())
+        time.sleep(0.05)
+        assert len(err.renders()) == before
+        filecheck._progress("/dir/other")
+        time.sleep(0.05)
+        assert "/dir/other" in err.renders()[-1]
+
+    def test_clear_is_silent_when_nothing_drawn(self, monkeypatch):
+        import time
+        err = self.Capture()
+        monkeypatch.setattr(sys, "stderr", err)
+        filecheck.options.progress_rate = 100
+        for _ in range(5):
+            filecheck._clear_progress()
+        assert err.writes == []
+        filecheck._progress("/dir/file")
+        time.sleep(0.05)
+        filecheck._clear_progress()
+        filecheck._clear_progress()
+        assert len([w for w in err.writes if w.startswith("\r ")]) == 1
+
+    def test_format_shows_rates_and_eta(self):
+        state = filecheck._ProgressState()
+        state.start = 100.0
+        state.scanned = 40
+        state.hashed = 20
+        state.hashed_bytes = 20 * 1048576
+        state.queued_bytes = 120 * 1048576
+        line = filecheck._format_progress(state, 110.0)
+        assert "40 files" in line
+        assert "2.0 files/s" in line
+        assert "2.0 MB/s" in line
+        assert "100.0 MB left" in line
+        assert "ETA 0:00:50" in line
+
+    def test_hash_batch_updates_counters(self, tmp_path):
+        (tmp_path / "a").write_bytes(b"x" * 10)
+        (tmp_path / "b").write_bytes(b"y" * 20)
+        files = {n: {"dirName": str(tmp_path), "fileName": n, "hash": "", "size": sz}
+                 for n, sz in (("a", 10), ("b", 20))}
+        filecheck._compute_hash_batch(files)
+        state = filecheck._progress_state
+        assert (state.hashed, state.hashed_bytes, state.queued_bytes) == (2, 30, 30)
+
+    def test_worker_does_not_start_reporter(self, monkeypatch):
+        monkeypatch.setattr(filecheck, "_in_worker", True)
+        filecheck._progress("/dir/file")
+        assert filecheck._progress_thread is None
+
 # ── helpers ───────────────────────────────────────────────────────────
 
 def create_file(path, content=b"hello"):
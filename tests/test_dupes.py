@@ -0,0 +1,113 @@
+import pytest
+import filecheck
+import os
+import hashlib
+from tests.conftest import create_file
+
+
+def run_dupes(tmp_path, **opts):
+    filecheck.options.recursive = True
+    for name, value in opts.items():
+        setattr(filecheck.options, name, value)
+    return filecheck.dupes(str(tmp_path))
+
+
+def count_reads(monkeypatch):
+    calls = {"partial": [], "full": []}
+    real_partial = filecheck._partial_digest
+    real_full = filecheck._compute_hash
+    monkeypatch.setattr(filecheck, "_partial_digest",
+                        lambda p, *a: calls["partial"].append(os.path.basename(p)) or real_partial(p, *a))
+    monkeypatch.setattr(filecheck, "_compute_hash",
+                        lambda p, *a: calls["full"].append(os.path.basename(p)) or real_full(p, *a))
+    return calls
+
+
+def groups(out):
+    return [sorted(os.path.basename(line.split("  ")[2]) for line in block.splitlines())
+            for block in out.split("\n\n") if block and not block.startswith("Groups")]
+
+
+class TestDupes:
+    def test_identical_files_grouped(self, tmp_path, capsys):
+        create_file(tmp_path / "a" / "one.txt", b"same content")
+        create_file(tmp_path / "b" / "two.txt", b"same content")
+        create_file(tmp_path / "b" / "other.txt", b"SAME CONTENT")
+        create_file(tmp_path / "c.txt", b"different")
+        assert run_dupes(tmp_path) == 0
+        out = capsys.readouterr().out
+        assert groups(out) == [["one.txt", "two.txt"]]
+        assert f"{hashlib.md5(b'same content').hexdigest()}  12  {tmp_path / 'a' / 'one.txt'}" in out
+        assert "Groups: 1  Files: 2  Reclaimable: 12 B" in out
+
+    def test_no_duplicates_exit_code(self, tmp_path, capsys):
+        create_file(tmp_path / "a.txt", b"alpha")
+        create_file(tmp_path / "b.txt", b"bravo")
+        assert run_dupes(tmp_path) == 1
+        assert "Groups: 0" in capsys.readouterr().out
+
+    def test_stored_digests_are_not_recomputed(self, tmp_path, capsys, monkeypatch):
+        create_file(tmp_path / "a" / "one.txt", b"same content")
+        create_file(tmp_path / "b" / "two.txt", b"same content")
+        filecheck.options.recursive = True
+        filecheck.analyze(str(tmp_path))
+        capsys.readouterr()
+        calls = count_reads(monkeypatch)
+        assert run_dupes(tmp_path) == 0
+        assert calls == {"partial": [], "full": []}
+        assert groups(capsys.readouterr().out) == [["one.txt", "two.txt"]]
+
+    def test_stale_digest_is_not_trusted(self, tmp_path, capsys):
+        create_file(tmp_path / "one.txt", b"same content")
+        create_file(tmp_path / "two.txt", b"same content")
+        filecheck.options.recursive = True
+        filecheck.analyze(str(tmp_path))
+        create_file(tmp_path / "two.txt", b"same CONTENT")
+        os.utime(tmp_path / "two.txt", (1, 1))
+        capsys.readouterr()
+        assert run_dupes(tmp_path) == 1
+
+    def test_partial_hash_avoids_full_read(self, tmp_path, capsys, monkeypatch):
+        block = filecheck._DUPES_BLOCK
+        body = os.urandom(4 * block)
+        create_file(tmp_path / "one.bin", body)
+        create_file(tmp_path / "two.bin", body)
+        create_file(tmp_path / "head.bin", bytes([body[0] ^ 1]) + body[1:])
+        create_file(tmp_path / "small.bin", b"small")
+        calls = count_reads(monkeypatch)
+        assert run_dupes(tmp_path) == 0
+        assert sorted(calls["partial"]) == ["head.bin", "one.bin", "two.bin"]
+        assert sorted(calls["full"]) == ["one.bin", "two.bin"]
+        assert groups(capsys.readouterr().out) == [["one.bin", "two.bin"]]
+
+    def test_hard_links_counted_once(self, tmp_path, capsys):
+        create_file(tmp_path / "one.txt", b"same content")
+        os.link(tmp_path / "one.txt", tmp_path / "link.txt")
+        assert run_dupes(tmp_path) == 1
+        create_file(tmp_path / "copy.txt", b"same content")
+        capsys.readouterr()
+        assert run_dupes(tmp_path) == 0
+        assert len(groups(capsys.readouterr().out)[0]) == 2
+
+    def test_empty_and_ignored_files_skipped(self, tmp_path, capsys):
+        create_file(tmp_path / "a.txt", b"")
+        create_file(tmp_path / "b.txt", b"")
+        create_file(tmp_path / "keep.log", b"same")
+        create_file(tmp_path / "drop.log", b"same")
+        assert run_dupes(tmp_path, exclude=["drop.log"]) == 1
+
+    @pytest.mark.parametrize("chunk", [1, 4096])
+    def test_paginated_hashing(self, tmp_path, capsys, monkeypatch, chunk):
+        monkeypatch.setattr(filecheck, "_DUPES_CHUNK", chunk)
+        for i in range(5):
+            create_file(tmp_path / f"f{i}.txt", b"dup" if i % 2 else b"DUP")
+        assert run_dupes(tmp_path) == 0
+        assert sorted(groups(capsys.readouterr().out)) == [["f0.txt", "f2.txt", "f4.txt"], ["f1.txt", "f3.txt"]]
+
+    def test_cli(self, tmp_path, capsys):
+        create_file(tmp_path / "a.txt", b"alpha")
+        create_file(tmp_path / "b.txt", b"alpha")
+        with pytest.raises(SystemExit) as exc:
+            filecheck.main(["dupes", "-q", str(tmp_path)])
+        assert exc.value.code == 0
+        assert "Groups" not in capsys.readouterr().out
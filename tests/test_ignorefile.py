@@ -0,0 +1,116 @@
+import pytest
+import filecheck
+import os
+from tests.conftest import create_file
+
+
+def walk(tmp_path, **kwargs):
+    results = []
+    def cb(path, data):
+        results.append(os.path.relpath(path, tmp_path).replace("\\", "/"))
+    filecheck.walkTree(str(tmp_path), cb, True, False, {}, bfs=True, **kwargs)
+    return sorted(results)
+
+
+def write_rules(directory, *lines):
+    directory.mkdir(parents=True, exist_ok=True)
+    (directory / filecheck.filecheckIgnoreName).write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+class TestGitignoreRegex:
+    @pytest.mark.parametrize("pattern,path,matches", [
+        ("*.log", "a.log", True),
+        ("*.log", "dir/a.log", False),
+        ("a?c", "abc", True),
+        ("a?c", "a/c", False),
+        ("**/cache", "cache", True),
+        ("**/cache", "x/y/cache", True),
+        ("build/**", "build/x/y", True),
+        ("build/**", "build", False),
+        ("a/**/b", "a/b", True),
+        ("a/**/b", "a/x/y/b", True),
+        ("[!a]*.txt", "b.txt", True),
+        ("[!a]*.txt", "a.txt", False),
+        ("\\#name", "#name", True),
+    ])
+    def test_translation(self, pattern, path, matches):
+        import re
+        regex = re.compile(filecheck._gitignore_regex(pattern) + r"\Z", re.DOTALL)
+        assert (regex.match(path) is not None) is matches
+
+
+class TestIgnoreFile:
+    def test_unanchored_pattern_matches_at_any_depth(self, tmp_path):
+        write_rules(tmp_path, "# comment", "", "*.log")
+        create_file(tmp_path / "a.log")
+        create_file(tmp_path / "sub" / "b.log")
+        create_file(tmp_path / "sub" / "keep.txt")
+        assert walk(tmp_path) == [".filecheckignore", "sub", "sub/keep.txt"]
+
+    def test_anchored_pattern_relative_to_ignore_file(self, tmp_path):
+        write_rules(tmp_path / "sub", "/out.txt", "deep/x.txt")
+        create_file(tmp_path / "out.txt")
+        create_file(tmp_path / "sub" / "out.txt")
+        create_file(tmp_path / "sub" / "inner" / "out.txt")
+        create_file(tmp_path / "sub" / "deep" / "x.txt")
+        result = walk(tmp_path)
+        assert "out.txt" in result
+        assert "sub/out.txt" not in result
+        assert "sub/inner/out.txt" in result
+        assert "sub/deep/x.txt" not in result
+
+    def test_directory_only_pattern(self, tmp_path):
+        write_rules(tmp_path, "cache/")
+        create_file(tmp_path / "cache" / "blob")
+        create_file(tmp_path / "other" / "cache")
+        assert walk(tmp_path) == [".filecheckignore", "other", "other/cache"]
+
+    def test_negation_and_inheritance(self, tmp_path):
+        write_rules(tmp_path, "*.tmp")
+        write_rules(tmp_path / "sub", "!keep.tmp")
+        create_file(tmp_path / "drop.tmp")
+        create_file(tmp_path / "sub" / "keep.tmp")
+        create_file(tmp_path / "sub" / "drop.tmp")
+        assert walk(tmp_path) == [".filecheckignore", "sub", "sub/.filecheckignore", "sub/keep.tmp"]
+
+    def test_ignored_directory_is_never_listed(self, tmp_path, monkeypatch):
+        write_rules(tmp_path, "node_modules/")
+        create_file(tmp_path / "node_modules" / "pkg" / "index.js")
+        create_file(tmp_path / "src" / "main.js")
+        listed = []
+        real = os.scandir
+        monkeypatch.setattr(os, "scandir", lambda p=".": listed.append(str(p)) or real(p))
+        walk(tmp_path, walkJobs=4)
+        assert not any("node_modules" in p for p in listed)
+
+    def test_check_does_not_report_newly_ignored_entries(self, tmp_path, capsys):
+        create_file(tmp_path / "a.txt")
+        create_file(tmp_path / "build" / "out.o")
+        filecheck.options.recursive = True
+        filecheck.analyze(str(tmp_path))
+        write_rules(tmp_path, "build/", ".filecheckignore")
+        capsys.readouterr()
+        assert filecheck.check(str(tmp_path)) == 0
+        out = capsys.readouterr().out
+        assert "deleted" not in out
+        assert "Deleted: 0" in out
+
+    def test_anchored_rule_from_current_directory(self, tmp_path, capsys, monkeypatch):
+        create_file(tmp_path / "a.txt")
+        create_file(tmp_path / "build" / "out.o")
+        monkeypatch.chdir(tmp_path)
+        filecheck.options.recursive = True
+        filecheck.analyze(".")
+        write_rules(tmp_path, "/build", ".filecheckignore")
+        capsys.readouterr()
+        assert filecheck.check(".") == 0
+        assert "deleted" not in capsys.readouterr().out
+
+    def test_analyze_drops_ignored_entries(self, tmp_path):
+        create_file(tmp_path / "a.txt")
+        create_file(tmp_path / "b.bak")
+        filecheck.analyze(str(tmp_path))
+        write_rules(tmp_path, "*.bak")
+        filecheck.analyze(str(tmp_path))
+        files = filecheck.filecheckLoad(str(tmp_path))["files"]
+        assert sorted(files) == [".filecheckignore", "a.txt"]
@@ -0,0 +1,163 @@
+import pytest
+import filecheck
+import os
+import hashlib
+import shutil
+import sqlite3
+from tests.conftest import create_file, run_analyze
+
+
+def build_tree(tmp_path):
+    create_file(tmp_path / "a.txt", b"alpha")
+    create_file(tmp_path / "sub" / "b.log", b"bravo")
+    create_file(tmp_path / "sub" / "deep" / "c.txt", b"alpha")
+
+
+class TestSqliteStore:
+    def test_analyze_writes_single_database(self, tmp_path):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, store="sqlite")
+        assert (tmp_path / filecheck.filecheckDbName).is_file()
+        assert not (tmp_path / ".filecheck").exists()
+        assert not (tmp_path / "sub" / ".filecheck").exists()
+        con = sqlite3.connect(tmp_path / filecheck.filecheckDbName)
+        rows = dict(con.execute(
+            "SELECT dir || '/' || name, hash FROM entries WHERE hash != '<DIR>'").fetchall())
+        con.close()
+        assert rows["/a.txt"] == hashlib.md5(b"alpha").hexdigest()
+        assert rows["sub/b.log"] == hashlib.md5(b"bravo").hexdigest()
+        assert rows["sub/deep/c.txt"] == hashlib.md5(b"alpha").hexdigest()
+
+    def test_database_not_listed_as_entry(self, tmp_path):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, store="sqlite")
+        run_analyze(tmp_path, store="sqlite")
+        filecheck._open_store(str(tmp_path))
+        loaded = filecheck.filecheckLoad(str(tmp_path))
+        assert filecheck.filecheckDbName not in loaded["files"]
+
+    def test_load_roundtrip(self, tmp_path):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, store="sqlite")
+        filecheck._open_store(str(tmp_path))
+        loaded = filecheck.filecheckLoad(str(tmp_path / "sub"))
+        assert loaded["algorithm"] == "md5"
+        assert loaded["files"]["b.log"]["size"] == 5
+        assert loaded["files"]["deep"]["hash"] == "<DIR>"
+
+    def test_commits_are_fully_synced(self, tmp_path):
+        filecheck.options.store = "sqlite"
+        filecheck._open_store(str(tmp_path))
+        assert filecheck._index.execute("PRAGMA synchronous").fetchone()[0] == 2
+
+    def test_save_replaces_directory_rows(self, tmp_path):
+        filecheck.options.store = "sqlite"
+        filecheck._open_store(str(tmp_path))
+        data = filecheck.filecheckNew(str(tmp_path))
+        data["files"]["old.txt"] = {"fileName": "old.txt", "hash": "a", "size": 1,
+                                    "ctime": 1.0, "mtime": 1.0, "atime": 1.0}
+        filecheck.filecheckSave(data, str(tmp_path))
+        data["files"] = {"new.txt": {"fileName": "new.txt", "hash": "b", "size": 2,
+                                     "ctime": 2.0, "mtime": 2.0, "atime": 2.0}}
+        filecheck.filecheckSave(data, str(tmp_path))
+        assert list(filecheck.filecheckLoad(str(tmp_path))["files"]) == ["new.txt"]
+
+    def test_check_against_index(self, tmp_path, capsys):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, store="sqlite")
+        create_file(tmp_path / "sub" / "b.log", b"BRAVO")
+        (tmp_path / "a.txt").unlink()
+        ret = filecheck.check(str(tmp_path))
+        out = capsys.readouterr().out
+        assert ret == 2
+        assert "deleted file" in out and "a.txt" in out
+        assert "b.log" in out
+
+    def test_check_without_database_fails(self, tmp_path, capsys):
+        build_tree(tmp_path)
+        filecheck.options.store = "sqlite"
+        assert filecheck.check(str(tmp_path)) == 1
+        assert "no index database" in capsys.readouterr().out
+
+    def test_batched_commits(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(filecheck, "_INDEX_COMMIT_EVERY", 2)
+        filecheck.options.store = "sqlite"
+        filecheck._open_store(str(tmp_path))
+        for i in range(3):
+            d = tmp_path / f"d{i}"
+            d.mkdir()
+            filecheck.filecheckSave(filecheck.filecheckNew(str(d)), str(d))
+        assert filecheck._index_pending == 1
+        other = sqlite3.connect(tmp_path / filecheck.filecheckDbName)
+        assert other.execute("SELECT COUNT(*) FROM dirs").fetchone()[0] == 2
+        other.close()
+        filecheck._close_store()
+        other = sqlite3.connect(tmp_path / filecheck.filecheckDbName)
+        assert other.execute("SELECT COUNT(*) FROM dirs").fetchone()[0] == 3
+        other.close()
+
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_removed_directory_subtree_dropped(self, tmp_path, capsys, stream):
+        build_tree(tmp_path)
+        create_file(tmp_path / "gone" / "b", b"bravo")
+        create_file(tmp_path / "gone" / "deeper" / "c", b"charlie")
+        create_file(tmp_path / "gone_sibling" / "d", b"delta")
+        run_analyze(tmp_path, store="sqlite")
+        shutil.rmtree(tmp_path / "gone")
+        filecheck.options.stream = stream
+        run_analyze(tmp_path, store="sqlite")
+        con = sqlite3.connect(tmp_path / filecheck.filecheckDbName)
+        dirs = sorted(row[0] for row in con.execute("SELECT dir FROM dirs"))
+        entries = {row[0] for row in con.execute("SELECT dir FROM entries")}
+        con.close()
+        assert dirs == ["", "gone_sibling", "sub", "sub/deep"]
+        assert entries == {"", "gone_sibling", "sub", "sub/deep"}
+        capsys.readouterr()
+        filecheck.options.query_glob = "gone/*"
+        assert filecheck.query(str(tmp_path)) == 1
+        assert filecheck.scrub(str(tmp_path)) == 0
+        assert "gone" + os.sep not in capsys.readouterr().out
+
+
+class TestQuery:
+    def run_query(self, tmp_path, capsys, **filters):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, store="sqlite")
+        capsys.readouterr()
+        for k, v in filters.items():
+            setattr(filecheck.options, k, v)
+        ret = filecheck.query(str(tmp_path))
+        lines = [l for l in capsys.readouterr().out.splitlines() if not l.startswith("Matches:")]
+        return ret, lines
+
+    def test_by_hash(self, tmp_path, capsys):
+        ret, lines = self.run_query(tmp_path, capsys, query_hash=hashlib.md5(b"alpha").hexdigest())
+        assert ret == 0
+        assert len(lines) == 2
+        assert lines[0].endswith("a.txt")
+        assert lines[1].endswith(os.path.join("sub/deep", "c.txt"))
+
+    def test_by_glob(self, tmp_path, capsys):
+        ret, lines = self.run_query(tmp_path, capsys, query_glob="sub/*.log")
+        assert len(lines) == 1
+        assert lines[0].endswith("b.log")
+
+    def test_by_size_and_mtime(self, tmp_path, capsys):
+        ret, lines = self.run_query(tmp_path, capsys, query_size=5,
+                                    query_mtime_after="0", query_mtime_before="2999-01-01")
+        assert len(lines) == 3
+
+    def test_no_match_exit_code(self, tmp_path, capsys):
+        ret, lines = self.run_query(tmp_path, capsys, query_hash="nope")
+        assert ret == 1
+        assert lines == []
+
+    def test_cli(self, tmp_path, capsys):
+        build_tree(tmp_path)
+        with pytest.raises(SystemExit) as exc:
+            filecheck.main(["analyze", "-r", "--store", "sqlite", str(tmp_path)])
+        assert exc.value.code == 0
+        with pytest.raises(SystemExit) as exc:
+            filecheck.main(["query", "--glob", "*.txt", str(tmp_path)])
+        assert exc.value.code == 0
+        assert "Matches: 2" in capsys.readouterr().out
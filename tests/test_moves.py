@@ -0,0 +1,208 @@
+import pytest
+import filecheck
+import os
+import sqlite3
+import hashlib
+from tests.conftest import count_hashes, create_file, run_analyze, run_check
+
+
+def build_tree(tmp_path):
+    create_file(tmp_path / "a" / "one.txt", b"first file")
+    create_file(tmp_path / "a" / "two.txt", b"second file")
+    create_file(tmp_path / "b" / "keep.txt", b"kept")
+    create_file(tmp_path / "z" / "deep" / "three.txt", b"third file")
+
+
+def report(out):
+    return [line for line in out.splitlines() if line.startswith(("moved", "new item", "deleted file"))]
+
+
+class TestIdentityStored:
+    @pytest.mark.parametrize("fmt", ["text", "binary"])
+    def test_manifest_round_trip(self, tmp_path, fmt):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, manifest_format=fmt)
+        info = filecheck.filecheckLoad(str(tmp_path / "a"))["files"]["one.txt"]
+        st = os.stat(tmp_path / "a" / "one.txt")
+        assert (info["ino"], info["dev"]) == (st.st_ino, st.st_dev)
+
+    def test_text_extra_field(self, tmp_path):
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        lines = (tmp_path / "a" / ".filecheck").read_text(encoding="utf-8").splitlines()
+        assert lines[0].startswith("FILECHECK:0.3:")
+        st = os.stat(tmp_path / "a" / "one.txt")
+        assert f":ino={st.st_ino};dev={st.st_dev}:one.txt" in lines[1]
+
+    def test_unknown_extra_keys_are_ignored(self, tmp_path):
+        (tmp_path / ".filecheck").write_text(
+            f"FILECHECK:0.3:{filecheck.signature}:md5:sorted\n"
+            "abc:1:1.0:2.0:3.0:ino=7;future=x:odd:name\n", encoding="utf-8")
+        info = filecheck.filecheckLoad(str(tmp_path))["files"]["odd:name"]
+        assert (info["hash"], info["ino"], info["dev"]) == ("abc", 7, 0)
+
+    def test_legacy_binary_manifest_loads(self, tmp_path):
+        data = filecheck.filecheckNew(str(tmp_path))
+        data["files"]["a"] = {"fileName": "a", "dirName": str(tmp_path), "hash": "<DIR>", "size": 0,
+                              "ctime": 1.0, "mtime": 2.0, "atime": 3.0}
+        filecheck.options.manifest_format = "binary"
+        filecheck.filecheckSave(data, str(tmp_path))
+        raw = (tmp_path / ".filecheck").read_bytes()
+        header, body = raw.split(b"\n", 1)
+        head = filecheck._BIN_HEADER.size
+        record = filecheck._bin_record(16)
+        legacy = filecheck._bin_record(16, "1.0")
+        fields = record.unpack_from(body, head)
+        body = body[:head] + legacy.pack(*fields[:6], *fields[-2:]) + body[head + record.size:]
+        (tmp_path / ".filecheck").write_bytes(header.replace(f":{filecheck._BINARY_VERSIONS[-1]}:".encode(), b":1.0:") + b"\n" + body)
+        info = filecheck.filecheckLoad(str(tmp_path))["files"]["a"]
+        assert (info["hash"], info["mtime"], info["ino"]) == ("<DIR>", 2.0, 0)
+
+    def test_sqlite_columns_added_to_old_index(self, tmp_path):
+        db = sqlite3.connect(tmp_path / filecheck.filecheckDbName)
+        db.executescript(filecheck._INDEX_SCHEMA.replace("    ino INTEGER NOT NULL DEFAULT 0,\n", "")
+                         .replace("    dev INTEGER NOT NULL DEFAULT 0,\n", ""))
+        db.close()
+        build_tree(tmp_path)
+        run_analyze(tmp_path, store="sqlite")
+        filecheck._open_store(str(tmp_path))
+        info = filecheck.filecheckLoad(str(tmp_path / "a"))["files"]["one.txt"]
+        assert info["ino"] == os.stat(tmp_path / "a" / "one.txt").st_ino
+
+
+class TestCheckMoves:
+    def test_renamed_file_across_directories(self, tmp_path, capsys):
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        os.rename(tmp_path / "a" / "one.txt", tmp_path / "b" / "renamed.txt")
+        capsys.readouterr()
+        assert run_check(tmp_path, detect_moves=True) == 1
+        out = capsys.readouterr().out
+        assert report(out) == [f"moved: {tmp_path / 'a' / 'one.txt'} -> {tmp_path / 'b' / 'renamed.txt'}"]
+        assert (filecheck.check_moved, filecheck.check_added, filecheck.check_deleted) == (1, 0, 0)
+        assert "Moved: 1" in out
+
+    def test_copy_and_delete_matched_by_hash(self, tmp_path, capsys):
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        create_file(tmp_path / "b" / "copy.txt", b"third file")
+        (tmp_path / "z" / "deep" / "three.txt").unlink()
+        capsys.readouterr()
+        run_check(tmp_path, detect_moves=True)
+        assert report(capsys.readouterr().out) == [
+            f"moved: {tmp_path / 'z' / 'deep' / 'three.txt'} -> {tmp_path / 'b' / 'copy.txt'}"]
+
+    def test_same_size_different_content_is_not_moved(self, tmp_path, capsys):
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        create_file(tmp_path / "b" / "other.txt", b"THIRD FILE")
+        (tmp_path / "z" / "deep" / "three.txt").unlink()
+        capsys.readouterr()
+        run_check(tmp_path, detect_moves=True)
+        assert sorted(report(capsys.readouterr().out)) == [
+            f"deleted file: {tmp_path / 'z' / 'deep' / 'three.txt'}",
+            f"new item: {tmp_path / 'b' / 'other.txt'}",
+        ]
+
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_moved_directory_reported_once(self, tmp_path, capsys, stream):
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        os.rename(tmp_path / "z" / "deep", tmp_path / "b" / "deep")
+        capsys.readouterr()
+        run_check(tmp_path, detect_moves=True, stream=stream)
+        assert report(capsys.readouterr().out) == [f"moved: {tmp_path / 'z' / 'deep'} -> {tmp_path / 'b' / 'deep'}"]
+
+    def test_jsonl_record_has_source(self, tmp_path, capsys):
+        import json
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        os.rename(tmp_path / "a" / "two.txt", tmp_path / "a" / "2.txt")
+        capsys.readouterr()
+        run_check(tmp_path, detect_moves=True, format="jsonl")
+        records = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+        moved = [r for r in records if r.get("status") == "moved"]
+        assert moved[0]["from"] == str(tmp_path / "a" / "two.txt")
+        assert moved[0]["path"] == str(tmp_path / "a" / "2.txt")
+        assert records[-1]["moved"] == 1
+
+    def test_without_flag_reports_deleted_and_new(self, tmp_path, capsys):
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        os.rename(tmp_path / "a" / "one.txt", tmp_path / "b" / "renamed.txt")
+        capsys.readouterr()
+        run_check(tmp_path, detect_moves=False)
+        out = capsys.readouterr().out
+        assert (filecheck.check_added, filecheck.check_deleted, filecheck.check_moved) == (1, 1, 0)
+        assert "Moved" not in out
+
+
+class TestAnalyzeMoves:
+    @pytest.mark.parametrize("src,dst", [("a", "z"), ("z/deep", "a")])
+    def test_moved_file_not_rehashed(self, tmp_path, monkeypatch, src, dst):
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        name = "one.txt" if src == "a" else "three.txt"
+        os.rename(tmp_path / src / name, tmp_path / dst / f"moved-{name}")
+        hashed = count_hashes(monkeypatch)
+        run_analyze(tmp_path, detect_moves=True)
+        assert hashed == []
+        files = filecheck.filecheckLoad(str(tmp_path / dst))["files"]
+        content = b"first file" if src == "a" else b"third file"
+        assert files[f"moved-{name}"]["hash"] == hashlib.md5(content).hexdigest()
+        assert name not in filecheck.filecheckLoad(str(tmp_path / src))["files"]
+
+    def test_stream_carries_digest_when_source_seen_first(self, tmp_path, monkeypatch):
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        os.rename(tmp_path / "a" / "one.txt", tmp_path / "z" / "one.txt")
+        hashed = count_hashes(monkeypatch)
+        run_analyze(tmp_path, detect_moves=True, stream=True)
+        assert hashed == []
+        assert filecheck.filecheckLoad(str(tmp_path / "z"))["files"]["one.txt"]["hash"] == \
+            hashlib.md5(b"first file").hexdigest()
+
+    def test_deferred_dir_saved_once_source_seen(self, tmp_path, monkeypatch):
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        os.rename(tmp_path / "z" / "deep" / "three.txt", tmp_path / "a" / "three.txt")
+        saved = []
+        real = filecheck.filecheckSave
+        monkeypatch.setattr(filecheck, "filecheckSave",
+                            lambda data, d: saved.append(os.path.basename(d)) or real(data, d))
+        hashed = count_hashes(monkeypatch)
+        run_analyze(tmp_path, detect_moves=True)
+        assert hashed == []
+        assert saved[-2:] == ["a", "deep"]
+
+    def test_pending_dirs_capped(self, tmp_path, monkeypatch):
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        os.rename(tmp_path / "z" / "deep" / "three.txt", tmp_path / "a" / "three.txt")
+        monkeypatch.setattr(filecheck, "_MOVES_PENDING_MAX", 0)
+        hashed = count_hashes(monkeypatch)
+        run_analyze(tmp_path, detect_moves=True)
+        assert hashed == ["three.txt"]
+        assert filecheck.filecheckLoad(str(tmp_path / "a"))["files"]["three.txt"]["hash"] == \
+            hashlib.md5(b"third file").hexdigest()
+
+    def test_modified_after_move_is_rehashed(self, tmp_path, monkeypatch):
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        os.rename(tmp_path / "a" / "one.txt", tmp_path / "b" / "one.txt")
+        with open(tmp_path / "b" / "one.txt", "ab") as f:
+            f.write(b"!")
+        hashed = count_hashes(monkeypatch)
+        run_analyze(tmp_path, detect_moves=True)
+        assert hashed == ["one.txt"]
+
+    def test_sqlite_moved_directory_not_rehashed(self, tmp_path, monkeypatch):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, store="sqlite")
+        os.rename(tmp_path / "z" / "deep", tmp_path / "a" / "deep")
+        hashed = count_hashes(monkeypatch)
+        run_analyze(tmp_path, store="sqlite", detect_moves=True)
+        assert hashed == []
+        filecheck._open_store(str(tmp_path))
+        files = filecheck.filecheckLoad(str(tmp_path / "a" / "deep"))["files"]
+        assert files["three.txt"]["hash"] == hashlib.md5(b"third file").hexdigest()
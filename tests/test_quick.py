@@ -0,0 +1,119 @@
+import pytest
+import filecheck
+import os
+import json
+from tests.conftest import count_hashes, create_file, run_analyze, run_check
+
+
+def build_tree(tmp_path):
+    create_file(tmp_path / "small.txt", b"small file")
+    create_file(tmp_path / "sub" / "big.bin", bytes(range(256)) * 8192)
+
+
+def corrupt(path, offset, data=b"XXXX"):
+    st = os.stat(path)
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        f.write(data)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+class TestSampleFingerprint:
+    def test_offsets_cover_head_tail_and_samples(self):
+        block = filecheck._QUICK_BLOCK
+        size = 100 * block
+        offsets = filecheck._sample_offsets(size)
+        assert len(offsets) == filecheck._QUICK_SAMPLES + 2
+        assert offsets[0] == 0 and offsets[-1] == size - block
+        assert offsets == sorted(offsets)
+
+    def test_small_file_read_whole(self):
+        block = filecheck._QUICK_BLOCK
+        assert list(filecheck._sample_offsets(3 * block + 1)) == [0, block, 2 * block, 3 * block]
+        assert list(filecheck._sample_offsets(0)) == []
+
+    def test_includes_size(self, tmp_path):
+        create_file(tmp_path / "a", b"abc")
+        create_file(tmp_path / "b", b"abc")
+        fp = filecheck._sample_fingerprint(str(tmp_path / "a"))
+        assert fp == filecheck._sample_fingerprint(str(tmp_path / "b"))
+        assert fp != filecheck._sample_fingerprint(str(tmp_path / "a"), 4)
+        assert filecheck._sample_fingerprint(str(tmp_path / "missing")) == "error"
+
+
+class TestStoredFingerprint:
+    @pytest.mark.parametrize("fmt,store", [("text", "text"), ("binary", "text"), ("text", "sqlite")])
+    def test_round_trip(self, tmp_path, fmt, store):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, quick=True, manifest_format=fmt, store=store)
+        filecheck._open_store(str(tmp_path))
+        info = filecheck.filecheckLoad(str(tmp_path / "sub"))["files"]["big.bin"]
+        filecheck._close_store()
+        assert info["fp"] == filecheck._sample_fingerprint(str(tmp_path / "sub" / "big.bin"))
+
+    def test_kept_by_plain_analyze(self, tmp_path):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, quick=True)
+        run_analyze(tmp_path, quick=False)
+        assert filecheck.filecheckLoad(str(tmp_path))["files"]["small.txt"]["fp"]
+
+    def test_not_stored_without_flag(self, tmp_path):
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        assert "fp=" not in (tmp_path / ".filecheck").read_text(encoding="utf-8")
+
+    def test_added_to_existing_manifest_without_rehash(self, tmp_path, monkeypatch):
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        hashed = count_hashes(monkeypatch)
+        run_analyze(tmp_path, quick=True)
+        assert hashed == []
+        assert filecheck.filecheckLoad(str(tmp_path))["files"]["small.txt"]["fp"]
+
+
+class TestQuickCheck:
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_unchanged_files_are_sampled(self, tmp_path, capsys, monkeypatch, stream):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, quick=True)
+        hashed = count_hashes(monkeypatch)
+        capsys.readouterr()
+        assert run_check(tmp_path, quick=True, stream=stream, show_same_files=True) == 0
+        out = capsys.readouterr().out
+        assert hashed == []
+        assert f"sampled: {tmp_path / 'sub' / 'big.bin'}" in out
+        assert (filecheck.check_sampled, filecheck.check_same) == (2, 1)
+        assert "Sampled: 2" in out
+
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_corrupted_sample_block_detected(self, tmp_path, capsys, stream):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, quick=True)
+        corrupt(tmp_path / "sub" / "big.bin", len(bytes(range(256)) * 8192) - 8)
+        capsys.readouterr()
+        assert run_check(tmp_path, quick=True, stream=stream) == 1
+        assert f"sample mismatch: {tmp_path / 'sub' / 'big.bin'}" in capsys.readouterr().out
+
+    def test_corruption_between_samples_is_missed(self, tmp_path, capsys):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, quick=True)
+        gap = filecheck._sample_offsets(2 * 1048576)[1] - 16
+        corrupt(tmp_path / "sub" / "big.bin", gap)
+        assert run_check(tmp_path, quick=True) == 0
+        assert run_check(tmp_path, quick=False) == 1
+
+    def test_files_without_fingerprint_fully_hashed(self, tmp_path, capsys, monkeypatch):
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        hashed = count_hashes(monkeypatch)
+        assert run_check(tmp_path, quick=True) == 0
+        assert sorted(hashed) == ["big.bin", "small.txt"]
+        assert (filecheck.check_sampled, filecheck.check_same) == (0, 3)
+
+    def test_jsonl_summary(self, tmp_path, capsys):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, quick=True)
+        capsys.readouterr()
+        run_check(tmp_path, quick=True, format="jsonl")
+        summary = json.loads(capsys.readouterr().out.splitlines()[-1])
+        assert (summary["sampled"], summary["total"]) == (2, 3)
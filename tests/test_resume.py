@@ -0,0 +1,177 @@
+import pytest
+import filecheck
+import os
+import json
+import hashlib
+from tests.conftest import count_hashes, create_file, run_analyze
+
+
+def build_tree(tmp_path):
+    create_file(tmp_path / "a.txt", b"alpha")
+    create_file(tmp_path / "sub1" / "b.txt", b"bravo")
+    create_file(tmp_path / "sub2" / "c.txt", b"charlie")
+    create_file(tmp_path / "sub2" / "d.txt", b"delta")
+
+
+def interrupt_in(monkeypatch, dirname):
+    real = filecheck.filecheckSave
+    def save(data, dirName):
+        if os.path.basename(data["dirName"]) == dirname:
+            raise KeyboardInterrupt
+        return real(data, dirName)
+    monkeypatch.setattr(filecheck, "filecheckSave", save)
+
+
+def journal_records(tmp_path):
+    lines = (tmp_path / filecheck.filecheckJournalName).read_text(encoding="utf-8").splitlines()
+    return [json.loads(line) for line in lines[1:]]
+
+
+class TestJournal:
+    def test_removed_after_successful_run(self, tmp_path):
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        assert not (tmp_path / filecheck.filecheckJournalName).exists()
+        assert filecheck.filecheckJournalName not in filecheck.filecheckLoad(str(tmp_path))["files"]
+
+    def test_kept_after_interrupt(self, tmp_path, monkeypatch):
+        build_tree(tmp_path)
+        interrupt_in(monkeypatch, "sub2")
+        with pytest.raises(KeyboardInterrupt):
+            run_analyze(tmp_path)
+        records = journal_records(tmp_path)
+        assert ["D", "."] in records and ["D", "sub1"] in records
+        assert ["D", "sub2"] not in records
+        hashes = {(r[1], r[2]): r[6] for r in records if r[0] == "H"}
+        assert hashes[("sub2", "c.txt")] == hashlib.md5(b"charlie").hexdigest()
+
+    def test_finished_dirs_fsynced_in_batches(self, tmp_path, monkeypatch):
+        for i in range(20):
+            create_file(tmp_path / f"d{i}" / "f.txt", b"x")
+        synced = []
+        real = os.fsync
+        def fsync(fd):
+            if filecheck._journal is not None and fd == filecheck._journal.file.fileno():
+                synced.append(fd)
+            real(fd)
+        monkeypatch.setattr(filecheck.os, "fsync", fsync)
+        run_analyze(tmp_path)
+        assert len(synced) < 5
+
+    @pytest.mark.parametrize("manifest_format", ["text", "binary"])
+    def test_manifest_synced_before_dir_is_journaled(self, tmp_path, monkeypatch, manifest_format):
+        build_tree(tmp_path)
+        filecheck.options.manifest_format = manifest_format
+        events = []
+        real_fsync = os.fsync
+        real_fsync_dir = filecheck._fsync_dir
+        real_finished = filecheck._Journal.finished
+        monkeypatch.setattr(filecheck.os, "fsync", lambda fd: events.append(("file", os.fstat(fd).st_ino)) or real_fsync(fd))
+        monkeypatch.setattr(filecheck, "_fsync_dir", lambda d: events.append(("dir", d)) or real_fsync_dir(d))
+        monkeypatch.setattr(filecheck._Journal, "finished",
+                            lambda self, d: events.append(("D", d)) or real_finished(self, d))
+        run_analyze(tmp_path)
+        for sub in (tmp_path, tmp_path / "sub1", tmp_path / "sub2"):
+            done = events.index(("D", str(sub)))
+            assert events.index(("file", (sub / filecheck.filecheckName).stat().st_ino)) < done
+            assert events.index(("dir", str(sub))) < done
+
+    def test_truncated_record_is_ignored(self, tmp_path, monkeypatch):
+        build_tree(tmp_path)
+        interrupt_in(monkeypatch, "sub2")
+        with pytest.raises(KeyboardInterrupt):
+            run_analyze(tmp_path)
+        monkeypatch.undo()
+        with open(tmp_path / filecheck.filecheckJournalName, "a", encoding="utf-8") as f:
+            f.write('["H", "sub2", "d.t')
+        journal = filecheck._Journal(str(tmp_path), True)
+        journal.close(False)
+        assert "sub1" in journal.done
+        assert set(journal.hashes["sub2"]) == {"c.txt", "d.txt"}
+        assert (tmp_path / filecheck.filecheckJournalName).read_text(encoding="utf-8").endswith("\n")
+
+
+class TestResume:
+    @pytest.mark.parametrize("stream", [False, True])
+    def test_skips_finished_dirs_and_reuses_hashes(self, tmp_path, monkeypatch, stream):
+        build_tree(tmp_path)
+        if stream:
+            monkeypatch.setattr(filecheck, "_manifest_writer", _failing_writer("sub2"))
+        else:
+            interrupt_in(monkeypatch, "sub2")
+        with pytest.raises(KeyboardInterrupt):
+            run_analyze(tmp_path, stream=stream)
+        monkeypatch.undo()
+        (tmp_path / "sub1" / ".filecheck").unlink()
+        hashed = count_hashes(monkeypatch)
+        run_analyze(tmp_path, resume=True, stream=stream)
+        assert hashed == []
+        assert not (tmp_path / "sub1" / ".filecheck").exists()
+        files = filecheck.filecheckLoad(str(tmp_path / "sub2"))["files"]
+        assert files["d.txt"]["hash"] == hashlib.md5(b"delta").hexdigest()
+        assert not (tmp_path / filecheck.filecheckJournalName).exists()
+
+    def test_changed_file_is_rehashed(self, tmp_path, monkeypatch):
+        build_tree(tmp_path)
+        interrupt_in(monkeypatch, "sub2")
+        with pytest.raises(KeyboardInterrupt):
+            run_analyze(tmp_path)
+        monkeypatch.undo()
+        create_file(tmp_path / "sub2" / "c.txt", b"CHARLIE!")
+        hashed = count_hashes(monkeypatch)
+        run_analyze(tmp_path, resume=True)
+        assert hashed == ["c.txt"]
+        files = filecheck.filecheckLoad(str(tmp_path / "sub2"))["files"]
+        assert files["c.txt"]["hash"] == hashlib.md5(b"CHARLIE!").hexdigest()
+
+    def test_other_algorithm_is_not_reused(self, tmp_path, monkeypatch):
+        build_tree(tmp_path)
+        interrupt_in(monkeypatch, "sub2")
+        with pytest.raises(KeyboardInterrupt):
+            run_analyze(tmp_path)
+        monkeypatch.undo()
+        (tmp_path / "sub2" / ".filecheck").unlink(missing_ok=True)
+        hashed = count_hashes(monkeypatch)
+        run_analyze(tmp_path, resume=True, algorithm="sha256")
+        assert sorted(hashed) == ["c.txt", "d.txt"]
+
+    def test_without_resume_starts_over(self, tmp_path, monkeypatch):
+        build_tree(tmp_path)
+        interrupt_in(monkeypatch, "sub2")
+        with pytest.raises(KeyboardInterrupt):
+            run_analyze(tmp_path)
+        monkeypatch.undo()
+        hashed = count_hashes(monkeypatch)
+        run_analyze(tmp_path)
+        assert sorted(hashed) == ["c.txt", "d.txt"]
+        assert filecheck.filecheckLoad(str(tmp_path / "sub1"))["files"]["b.txt"]["hash"]
+
+    def test_sqlite_store_marks_dirs_after_commit(self, tmp_path, monkeypatch):
+        build_tree(tmp_path)
+        monkeypatch.setattr(filecheck, "_INDEX_COMMIT_EVERY", 100)
+        interrupt_in(monkeypatch, "sub2")
+        with pytest.raises(KeyboardInterrupt):
+            run_analyze(tmp_path, store="sqlite")
+        records = journal_records(tmp_path)
+        assert [r for r in records if r[0] == "D"] == [["D", "."], ["D", "sub1"]]
+
+    def test_cli_flag(self, tmp_path):
+        build_tree(tmp_path)
+        with pytest.raises(SystemExit) as exc:
+            filecheck.main(["analyze", "-r", "--resume", str(tmp_path)])
+        assert exc.value.code == 0
+        assert filecheck.options.resume is True
+        assert (tmp_path / "sub2" / ".filecheck").exists()
+
+
+def _failing_writer(dirname):
+    real = filecheck._manifest_writer
+    def writer(dirName):
+        w = real(dirName)
+        if os.path.basename(dirName) == dirname:
+            def close():
+                w.abort()
+                raise KeyboardInterrupt
+            w.close = close
+        return w
+    return writer
@@ -0,0 +1,120 @@
+import pytest
+import filecheck
+import os
+from tests.conftest import count_hashes, create_file, run_analyze
+
+
+def build_tree(tmp_path):
+    create_file(tmp_path / "a.txt", b"a" * 100)
+    create_file(tmp_path / "sub" / "b.txt", b"b" * 200)
+    create_file(tmp_path / "sub" / "c.txt", b"c" * 300)
+
+
+def run_scrub(tmp_path, **opts):
+    filecheck.options.recursive = True
+    for name, value in opts.items():
+        setattr(filecheck.options, name, value)
+    return filecheck.scrub(str(tmp_path))
+
+
+def verified(tmp_path, dirname, name):
+    filecheck._open_store(str(tmp_path))
+    info = filecheck.filecheckLoad(str(tmp_path / dirname))["files"][name]
+    filecheck._close_store()
+    return info["verified"]
+
+
+def corrupt(path):
+    st = os.stat(path)
+    with open(path, "r+b") as f:
+        f.write(b"X")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+class TestScrub:
+    @pytest.mark.parametrize("fmt,store", [("text", "text"), ("binary", "text"), ("text", "sqlite")])
+    def test_records_verification_time(self, tmp_path, fmt, store):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, manifest_format=fmt, store=store)
+        assert verified(tmp_path, "sub", "b.txt") == 0
+        assert run_scrub(tmp_path) == 0
+        assert verified(tmp_path, "sub", "b.txt") > 0
+        assert verified(tmp_path, ".", "a.txt") > 0
+
+    def test_byte_budget_picks_oldest_first(self, tmp_path, monkeypatch):
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        hashed = count_hashes(monkeypatch)
+        run_scrub(tmp_path, budget_bytes=250)
+        assert hashed == ["a.txt", "b.txt"]
+        run_scrub(tmp_path, budget_bytes=250)
+        assert hashed == ["a.txt", "b.txt", "c.txt"]
+        run_scrub(tmp_path, budget_bytes=1)
+        assert hashed == ["a.txt", "b.txt", "c.txt", "a.txt"]
+
+    def test_time_budget(self, tmp_path, monkeypatch):
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        hashed = count_hashes(monkeypatch)
+        monkeypatch.setattr(filecheck, "_SCRUB_BATCH", 1)
+        run_scrub(tmp_path, budget_time=1e-9)
+        assert hashed == []
+        run_scrub(tmp_path, budget_time=3600)
+        assert sorted(hashed) == ["a.txt", "b.txt", "c.txt"]
+
+    @pytest.mark.parametrize("store", ["text", "sqlite"])
+    def test_small_batches_cover_tree_once(self, tmp_path, monkeypatch, store):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, store=store)
+        monkeypatch.setattr(filecheck, "_SCRUB_BATCH", 1)
+        hashed = count_hashes(monkeypatch)
+        run_scrub(tmp_path)
+        assert sorted(hashed) == ["a.txt", "b.txt", "c.txt"]
+
+    def test_mismatch_reported_and_not_marked(self, tmp_path, capsys, monkeypatch):
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        corrupt(tmp_path / "sub" / "c.txt")
+        monkeypatch.setattr(filecheck, "_SCRUB_BATCH", 2)
+        capsys.readouterr()
+        assert run_scrub(tmp_path) == 1
+        out = capsys.readouterr().out
+        assert out.count(f"MD5 mismatch: {tmp_path / 'sub' / 'c.txt'}") == 1
+        assert verified(tmp_path, "sub", "c.txt") == 0
+        assert verified(tmp_path, "sub", "b.txt") > 0
+
+    def test_changed_file_skipped(self, tmp_path, capsys, monkeypatch):
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        create_file(tmp_path / "a.txt", b"changed")
+        hashed = count_hashes(monkeypatch)
+        capsys.readouterr()
+        assert run_scrub(tmp_path) == 1
+        assert "a.txt" not in hashed
+        assert f"changed, not verified: {tmp_path / 'a.txt'}" in capsys.readouterr().out
+
+    def test_analyze_keeps_timestamp(self, tmp_path):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, manifest_format="binary")
+        run_scrub(tmp_path)
+        stamp = verified(tmp_path, "sub", "b.txt")
+        run_analyze(tmp_path, manifest_format="text")
+        assert verified(tmp_path, "sub", "b.txt") == pytest.approx(stamp)
+        assert filecheck.filecheckLoad(str(tmp_path / "sub")).get("format") is None
+
+    def test_manifest_algorithm_and_format_kept(self, tmp_path):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, algorithm="sha256", manifest_format="binary")
+        filecheck.options.algorithm = "md5"
+        filecheck.options.manifest_format = "text"
+        assert run_scrub(tmp_path) == 0
+        saved = filecheck.filecheckLoad(str(tmp_path / "sub"))
+        assert (saved["algorithm"], saved["format"]) == ("sha256", "binary")
+
+    def test_cli_budget_units(self, tmp_path):
+        build_tree(tmp_path)
+        run_analyze(tmp_path)
+        with pytest.raises(SystemExit) as exc:
+            filecheck.main(["scrub", "-r", "--budget-bytes", "1K", "--budget-time", "2h", str(tmp_path)])
+        assert exc.value.code == 0
+        assert (filecheck.options.budget_bytes, filecheck.options.budget_time) == (1024, 7200)
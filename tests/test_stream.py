@@ -0,0 +1,149 @@
+import pytest
+import filecheck
+import os
+import hashlib
+from tests.conftest import create_file, run_analyze, run_check
+
+
+def build_tree(tmp_path):
+    create_file(tmp_path / "b.txt", b"bravo")
+    create_file(tmp_path / "a.txt", b"alpha")
+    create_file(tmp_path / "sub" / "c.txt", b"charlie")
+
+
+def status_lines(out):
+    return [line for line in out.splitlines() if ": " in line and not line.startswith(("CHECK", "ANALYZE", "Total"))]
+
+
+class TestSortedManifest:
+    def test_entries_written_in_name_order(self, tmp_path):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, stream=False)
+        lines = (tmp_path / ".filecheck").read_text(encoding="utf-8").splitlines()
+        assert lines[0].endswith(":sorted")
+        assert [line.rsplit(":", 1)[1] for line in lines[1:]] == ["a.txt", "b.txt", "sub"]
+
+    def test_unsorted_manifest_is_sorted_on_read(self, tmp_path):
+        (tmp_path / ".filecheck").write_text(
+            f"FILECHECK:0.2:{filecheck.signature}:md5\n"
+            "x:1:1.0:1.0:1.0:zeta\n"
+            "y:1:1.0:1.0:1.0:alpha\n", encoding="utf-8")
+        res = {}
+        entries = filecheck._saved_entries(str(tmp_path), res)
+        assert res["sorted"] is False
+        assert [info["fileName"] for info in entries] == ["alpha", "zeta"]
+
+    @pytest.mark.parametrize("fmt", ["text", "binary"])
+    def test_saved_entries_stream_in_order(self, tmp_path, fmt):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, stream=False, manifest_format=fmt)
+        res = {}
+        entries = filecheck._saved_entries(str(tmp_path), res)
+        assert res["sorted"] is True
+        assert [info["fileName"] for info in entries] == ["a.txt", "b.txt", "sub"]
+
+
+class TestStreamAnalyze:
+    @pytest.mark.parametrize("fmt", ["text", "binary"])
+    def test_matches_dict_mode(self, tmp_path, fmt):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, stream=False, manifest_format=fmt)
+        def entries():
+            files = filecheck.filecheckLoad(str(tmp_path))["files"]
+            return [(k, v["hash"], v["size"]) for k, v in files.items()]
+        expected = entries()
+        (tmp_path / ".filecheck").unlink()
+        (tmp_path / "sub" / ".filecheck").unlink()
+        run_analyze(tmp_path, stream=True, manifest_format=fmt)
+        assert entries() == expected
+        loaded = filecheck.filecheckLoad(str(tmp_path / "sub"))
+        assert loaded["files"]["c.txt"]["hash"] == hashlib.md5(b"charlie").hexdigest()
+
+    def test_reuses_unchanged_and_drops_deleted(self, tmp_path, monkeypatch):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, stream=True)
+        (tmp_path / "b.txt").unlink()
+        create_file(tmp_path / "d.txt", b"delta")
+        hashed = []
+        real = filecheck._compute_hash
+        monkeypatch.setattr(filecheck, "_compute_hash", lambda p, *a: hashed.append(os.path.basename(p)) or real(p, *a))
+        run_analyze(tmp_path, stream=True)
+        assert hashed == ["d.txt"]
+        files = filecheck.filecheckLoad(str(tmp_path))["files"]
+        assert sorted(files) == ["a.txt", "d.txt", "sub"]
+
+    def test_listing_holds_names_and_stats_lazily(self, tmp_path, monkeypatch):
+        build_tree(tmp_path)
+        filecheck.options.stream = True
+        assert filecheck._list_dir(str(tmp_path)) == [("a.txt", None), ("b.txt", None), ("sub", None)]
+        stats = []
+        real = filecheck._stat_entry
+        def stat_entry(dirName, name):
+            stats.append(name)
+            return real(dirName, name)
+        monkeypatch.setattr(filecheck, "_stat_entry", stat_entry)
+        run_analyze(tmp_path, stream=True)
+        assert stats == ["a.txt", "b.txt", "sub", "c.txt"]
+        assert filecheck.filecheckLoad(str(tmp_path / "sub"))["files"]["c.txt"]["size"] == 7
+
+    def test_sqlite_store(self, tmp_path):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, stream=True, store="sqlite")
+        (tmp_path / "a.txt").unlink()
+        run_analyze(tmp_path, stream=True, store="sqlite")
+        filecheck._open_store(str(tmp_path))
+        files = filecheck.filecheckLoad(str(tmp_path))["files"]
+        assert sorted(files) == ["b.txt", "sub"]
+        assert files["b.txt"]["hash"] == hashlib.md5(b"bravo").hexdigest()
+
+
+class TestStreamCheck:
+    def test_reports_in_name_order(self, tmp_path, capsys):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, stream=True)
+        (tmp_path / "a.txt").unlink()
+        create_file(tmp_path / "aa.txt", b"new")
+        create_file(tmp_path / "b.txt", b"BRAVO")
+        capsys.readouterr()
+        assert run_check(tmp_path, stream=True) != 0
+        lines = status_lines(capsys.readouterr().out)
+        assert lines == [
+            f"deleted file: {os.path.join(str(tmp_path), 'a.txt')}",
+            f"new item: {os.path.join(str(tmp_path), 'aa.txt')}",
+            f"MD5 mismatch: {os.path.join(str(tmp_path), 'b.txt')}",
+        ]
+        assert (filecheck.check_added, filecheck.check_deleted, filecheck.check_modified) == (1, 1, 1)
+
+    def test_clean_tree(self, tmp_path):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, stream=True)
+        assert run_check(tmp_path, stream=True) == 0
+        assert filecheck.check_same == 4
+
+    def test_new_directory_not_entered(self, tmp_path, capsys):
+        build_tree(tmp_path)
+        run_analyze(tmp_path, stream=True)
+        create_file(tmp_path / "new" / "x.txt", b"x")
+        capsys.readouterr()
+        run_check(tmp_path, stream=True)
+        out = capsys.readouterr().out
+        assert f"new item: {os.path.join(str(tmp_path), 'new')}" in out
+        assert "x.txt" not in out
+
+    def test_small_window_keeps_order(self, tmp_path, capsys, monkeypatch):
+        for i in range(20):
+            create_file(tmp_path / f"f{i:02d}.txt", str(i).encode())
+        run_analyze(tmp_path, stream=True)
+        for i in range(0, 20, 3):
+            create_file(tmp_path / f"f{i:02d}.txt", b"X" * len(str(i)))
+            os.utime(tmp_path / f"f{i:02d}.txt", (1000, 1000))
+        run_analyze(tmp_path, stream=False)
+        for i in range(0, 20, 3):
+            create_file(tmp_path / f"f{i:02d}.txt", str(i).encode())
+            os.utime(tmp_path / f"f{i:02d}.txt", (1000, 1000))
+        monkeypatch.setattr(filecheck, "_stream_window", lambda: 2)
+        capsys.readouterr()
+        run_check(tmp_path, stream=True, show_same_files=True)
+        names = [os.path.basename(line.split(": ", 1)[1]) for line in status_lines(capsys.readouterr().out)]
+        assert names == sorted(names)
+        assert filecheck.check_modified == 7
@@ -0,0 +1,97 @@
+import pytest
+import filecheck
+import os
+import sys
+import time
+import hashlib
+from tests.conftest import create_file
+
+
+class TestTokenBucket:
+    def test_burst_is_free(self, monkeypatch):
+        slept = []
+        monkeypatch.setattr(filecheck.time, "sleep", slept.append)
+        bucket = filecheck._TokenBucket(100)
+        bucket.take(10)
+        assert slept == []
+
+    def test_debt_is_slept_off(self, monkeypatch):
+        slept = []
+        monkeypatch.setattr(filecheck.time, "sleep", slept.append)
+        bucket = filecheck._TokenBucket(100)
+        bucket.take(10)
+        bucket.take(50)
+        assert slept and slept[-1] == pytest.approx(0.5, abs=0.05)
+        bucket.take(50)
+        assert slept[-1] == pytest.approx(1.0, abs=0.05)
+
+    def test_buckets_follow_options(self):
+        assert filecheck._get_buckets() == (None, None)
+        filecheck.options.max_read_rate = 2
+        read, files = filecheck._get_buckets()
+        assert read.rate == 2 * 1048576 and files is None
+        assert filecheck._get_buckets()[0] is read
+        filecheck.options.max_read_rate = 0
+        assert filecheck._get_buckets() == (None, None)
+
+    def test_split_between_worker_processes(self, monkeypatch):
+        monkeypatch.setattr(filecheck, "_in_worker", True)
+        filecheck.options.executor = "process"
+        filecheck.options.jobs = 4
+        filecheck.options.max_files_per_sec = 100
+        assert filecheck._get_buckets()[1].rate == 25
+        monkeypatch.setattr(filecheck, "_in_worker", False)
+        assert filecheck._get_buckets()[1].rate == 100
+
+
+class TestThrottledHashing:
+    def test_read_rate_limits_hashing(self, tmp_path):
+        data = os.urandom(512 * 1024)
+        create_file(tmp_path / "f.bin", data)
+        filecheck.options.max_read_rate = 1
+        start = time.monotonic()
+        digest = filecheck._compute_hash(str(tmp_path / "f.bin"), "md5")
+        assert time.monotonic() - start >= 0.35
+        assert digest == hashlib.md5(data).hexdigest()
+
+    def test_throttled_strategy_used(self, tmp_path):
+        filecheck.options.io_strategy = "mmap"
+        assert filecheck._pick_strategy(1 << 30) is filecheck._read_mmap
+        filecheck.options.max_read_rate = 100
+        assert filecheck._pick_strategy(1 << 30) is filecheck._read_throttled
+
+    def test_files_per_sec_counts_stats_and_opens(self, tmp_path, monkeypatch):
+        for i in range(3):
+            create_file(tmp_path / f"f{i}.txt", b"x")
+        taken = []
+        filecheck.options.max_files_per_sec = 1000
+        bucket = filecheck._get_buckets()[1]
+        monkeypatch.setattr(bucket, "take", taken.append)
+        filecheck.options.quiet = True
+        filecheck.analyze(str(tmp_path))
+        assert len(taken) == 6
+
+
+class TestIoPriority:
+    @pytest.mark.skipif(not sys.platform.startswith("linux") or os.uname().machine != "x86_64",
+                        reason="ioprio syscall numbers checked on x86_64 Linux")
+    def test_sets_priority_of_calling_thread(self):
+        import ctypes
+        import threading
+        result = {}
+
+        def run():
+            result["ok"] = filecheck._set_io_priority("low")
+            libc = ctypes.CDLL(None, use_errno=True)
+            result["prio"] = libc.syscall(252, 1, 0)
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        thread.join()
+        assert result["ok"] is True
+        assert result["prio"] == (2 << 13) | 7
+
+    def test_unsupported_platform(self, monkeypatch, capsys):
+        monkeypatch.setattr(filecheck.sys, "platform", "darwin")
+        assert filecheck._set_io_priority("idle") is False
+        assert "only supported on Linux" in capsys.readouterr().out
@@ -5,6 +5,50 @@ import stat
 from pathlib import Path
 
 
+class FakeEntry:
+    """Wraps an os.DirEntry so tests can override its lstat result."""
+    def __init__(self, entry, override):
+        self._entry = entry
+        self._override = override
+        self.name = entry.name
+        self.path = entry.path
+
+    def stat(self, follow_symlinks=True):
+        if isinstance(self._override, BaseException):
+            raise self._override
+        if self._override is not None:
+            return self._override
+        return self._entry.stat(follow_symlinks=follow_symlinks)
+
+
+class FakeScandir:
+    def __init__(self, entries):
+        self._entries = entries
+
+    def __enter__(self):
+        return iter(self._entries)
+
+    def __exit__(self, *_):
+        return False
+
+
+def patch_scandir(monkeypatch, overrides=None, fail=()):
+    """Replace os.scandir; overrides maps path -> stat result or exception."""
+    real_scandir = os.scandir
+    overrides = overrides or {}
+    def mock_scandir(path="."):
+        if str(path) in fail:
+            raise PermissionError("cannot read")
+        with real_scandir(path) as it:
+            return FakeScandir([FakeEntry(e, overrides.get(e.path)) for e in it])
+    monkeypatch.setattr(os, "scandir", mock_scandir)
+
+
+class MockStat:
+    def __init__(self, mode):
+        self.st_mode = mode
+
+
 class TestWalkTree:
     def collect(self, tmp_path, **kwargs):
         """Walk a tree and collect all callback paths."""
@@ -84,12 +128,7 @@ class TestWalkTree:
         (tmp_path / "good.txt").write_text("ok")
         (tmp_path / "bad.txt").write_text("secret")
         bad_path = str(tmp_path / "bad.txt")
-        original_lstat = Path.lstat
-        def mock_lstat(self):
-            if str(self) == bad_path:
-                raise PermissionError(f"cannot stat {self}")
-            return original_lstat(self)
-        monkeypatch.setattr(Path, 'lstat', mock_lstat)
+        patch_scandir(monkeypatch, {bad_path: PermissionError(f"cannot stat {bad_path}")})
         results = self.collect(tmp_path)
         assert "good.txt" in results
         captured = capsys.readouterr()
@@ -98,18 +137,11 @@ class TestWalkTree:
     # ── Symlinks (mocked — avoids platform dependency) ──────────────
 
     def test_symlink_skipped_when_follow_false(self, tmp_path, monkeypatch):
-        """Symlink is skipped when followLink=False (mock Path.lstat)."""
+        """Symlink is skipped when followLink=False (mocked lstat result)."""
         (tmp_path / "target.txt").write_text("real")
         link_path = str(tmp_path / "link.txt")
         (tmp_path / "link.txt").write_text("dummy")
-        original_lstat = Path.lstat
-        def mock_lstat(self):
-            if str(self) == link_path:
-                class MockStat:
-                    st_mode = stat.S_IFLNK | 0o777
-                return MockStat()
-            return original_lstat(self)
-        monkeypatch.setattr(Path, 'lstat', mock_lstat)
+        patch_scandir(monkeypatch, {link_path: MockStat(stat.S_IFLNK | 0o777)})
         results = self.collect(tmp_path, follow_links=False)
         assert "target.txt" in results
         assert "link.txt" not in results
@@ -119,14 +151,7 @@ class TestWalkTree:
         (tmp_path / "target.txt").write_text("real")
         link_path = str(tmp_path / "link.txt")
         (tmp_path / "link.txt").write_text("dummy")
-        original_lstat = Path.lstat
-        def mock_lstat(self):
-            if str(self) == link_path:
-                class MockStat:
-                    st_mode = stat.S_IFLNK | 0o777
-                return MockStat()
-            return original_lstat(self)
-        monkeypatch.setattr(Path, 'lstat', mock_lstat)
+        patch_scandir(monkeypatch, {link_path: MockStat(stat.S_IFLNK | 0o777)})
         results = self.collect(tmp_path, follow_links=True)
         assert "target.txt" in results
         captured = capsys.readouterr()
@@ -185,14 +210,7 @@ class TestWalkTree:
         special_path = tmp_path / "special_device"
         special_path.write_text("")  # create it so listdir finds it
         special = str(special_path)
-        original_lstat = Path.lstat
-        def mock_lstat(self):
-            if str(self) == special:
-                class MockStat:
-                    st_mode = stat.S_IFIFO | 0o644
-                return MockStat()
-            return original_lstat(self)
-        monkeypatch.setattr(Path, 'lstat', mock_lstat)
+        patch_scandir(monkeypatch, {special: MockStat(stat.S_IFIFO | 0o644)})
         results = self.collect(tmp_path)
         assert "regular.txt" in results
         captured = capsys.readouterr()
@@ -226,17 +244,11 @@ class TestWalkTree:
         filecheck.walkTree(base, cb, True, False, {})
         assert results == expected
 
-    # ── iterdir failure ──────────────────────────────────────────────
+    # ── scandir failure ──────────────────────────────────────────────
 
-    def test_iterdir_failure_skips_directory(self, tmp_path, monkeypatch):
+    def test_scandir_failure_skips_directory(self, tmp_path, monkeypatch):
         (tmp_path / "f.txt").write_text("x")
-        from pathlib import Path
-        original_iterdir = Path.iterdir
-        def mock_iterdir(self):
-            if str(self) == str(tmp_path):
-                raise PermissionError("cannot read")
-            return original_iterdir(self)
-        monkeypatch.setattr(Path, 'iterdir', mock_iterdir)
+        patch_scandir(monkeypatch, fail={str(tmp_path)})
         results = self.collect(tmp_path)
         assert results == []
 
@@ -267,3 +279,121 @@ class TestWalkTree:
     def test_empty_directory(self, tmp_path):
         results = self.collect(tmp_path)
         assert results == []
+
+
+class TestStatCalls:
+    def count_stats(self, monkeypatch):
+        calls = []
+        real_scandir, real_stat, real_lstat = os.scandir, os.stat, os.lstat
+        class CountingEntry(FakeEntry):
+            def stat(self, follow_symlinks=True):
+                calls.append(self.path)
+                return super().stat(follow_symlinks)
+        def counting_scandir(path="."):
+            with real_scandir(path) as it:
+                return FakeScandir([CountingEntry(e, None) for e in it])
+        monkeypatch.setattr(os, "scandir", counting_scandir)
+        monkeypatch.setattr(os, "stat", lambda p, *a, **kw: calls.append(str(p)) or real_stat(p, *a, **kw))
+        monkeypatch.setattr(os, "lstat", lambda p, *a, **kw: calls.append(str(p)) or real_lstat(p, *a, **kw))
+        return calls
+
+    def test_one_stat_per_entry(self, tmp_path, monkeypatch):
+        for i in range(10):
+            (tmp_path / f"f{i}.txt").write_text("x")
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "sub" / "g.txt").write_text("y")
+        filecheck.options.recursive = True
+        filecheck.options.ignore_hash = True
+        filecheck.analyze(str(tmp_path))
+        calls = self.count_stats(monkeypatch)
+        filecheck.check(str(tmp_path))
+        entries = [c for c in calls if not c.endswith(filecheck.filecheckName)]
+        assert len(entries) == 12
+        assert len(set(entries)) == 12
+
+    def test_callback_receives_path_with_stat(self, tmp_path):
+        (tmp_path / "f.txt").write_text("data")
+        seen = []
+        filecheck.walkTree(str(tmp_path), lambda p, d: seen.append(p), False, False, {})
+        assert seen == [str(tmp_path / "f.txt")]
+        assert seen[0].name == "f.txt"
+        assert seen[0].stat.st_size == 4
+        info = filecheck.makeInfo(seen[0])
+        assert info["fileName"] == "f.txt" and info["size"] == 4
+
+
+class TestParallelWalk:
+    def build(self, tmp_path):
+        for top in ("a", "b", "c"):
+            for sub in ("x", "y"):
+                for name in ("1.txt", "2.txt"):
+                    (tmp_path / top / sub).mkdir(parents=True, exist_ok=True)
+                    (tmp_path / top / sub / name).write_text(top + sub + name)
+            (tmp_path / top / "f.txt").write_text(top)
+
+    def trace(self, tmp_path, bfs, jobs):
+        events = []
+        def begin(dn):
+            events.append(("begin", dn))
+            return {"dir": dn}
+        def cb(path, data):
+            assert os.path.dirname(path) == data["dir"]
+            events.append(("file", str(path)))
+        def end(dn, data):
+            assert data["dir"] == dn
+            events.append(("end", dn))
+        filecheck.walkTree(str(tmp_path), cb, True, False, {}, begin, end, bfs=bfs, walkJobs=jobs)
+        return events
+
+    @pytest.mark.parametrize("bfs", [True, False])
+    def test_same_callback_order_as_serial(self, tmp_path, bfs):
+        self.build(tmp_path)
+        assert self.trace(tmp_path, bfs, 4) == self.trace(tmp_path, bfs, 1)
+
+    def test_directories_listed_concurrently(self, tmp_path, monkeypatch):
+        import threading
+        import time
+        self.build(tmp_path)
+        real_scandir = os.scandir
+        lock = threading.Lock()
+        active = [0, 0]
+        def slow_scandir(path="."):
+            with lock:
+                active[0] += 1
+                active[1] = max(active[1], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return real_scandir(path)
+        monkeypatch.setattr(os, "scandir", slow_scandir)
+        filecheck.walkTree(str(tmp_path), lambda p, d: None, True, False, {}, bfs=True, walkJobs=4)
+        assert active[1] > 1
+
+    def test_queued_listings_cancelled_on_error(self, tmp_path, monkeypatch):
+        import time
+        self.build(tmp_path)
+        listed = []
+        real = filecheck._list_dir
+        def slow_list(d):
+            listed.append(os.path.basename(d))
+            time.sleep(0.05)
+            return real(d)
+        monkeypatch.setattr(filecheck, "_list_dir", slow_list)
+        def begin(dn):
+            if dn != str(tmp_path):
+                raise RuntimeError("stop")
+            return {}
+        with pytest.raises(RuntimeError):
+            filecheck.walkTree(str(tmp_path), lambda p, d: None, True, False, {}, begin, bfs=True, walkJobs=2)
+        assert "c" not in listed
+
+    def test_option_used_by_default(self, tmp_path, monkeypatch):
+        self.build(tmp_path)
+        submitted = []
+        real = filecheck._list_dir
+        monkeypatch.setattr(filecheck, "_list_dir", lambda d: submitted.append(d) or real(d))
+        filecheck.options.walk_jobs = 3
+        filecheck.options.recursive = True
+        filecheck.analyze(str(tmp_path))
+        assert len(submitted) == 10
+        assert filecheck.filecheckLoad(str(tmp_path / "b" / "y"))["files"]["2.txt"]["size"] == 7